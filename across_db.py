@@ -3,10 +3,30 @@ Across DB 直接クエリモジュール
 V_D系ビュー（読み取り専用）への安全なアクセスを提供
 """
 
-import pyodbc
+import os
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from decimal import Decimal
 from datetime import datetime, date
+from pathlib import Path
+
+import across_mirror
+from utils.data_utils import DataUtils
+from utils.delivery_utils import DeliveryUtils
+from utils.merge_utils import MergeUtils
+
+# pyodbc は Across DB（'odbc'）接続時のみ必要。unixODBC の無い環境でもスタンドイン・ミラーは使えるようにする
+try:
+    import pyodbc
+except ImportError as e:
+    pyodbc = None
+    _pyodbc_import_error = e
 
 
 # 利用可能なビュー一覧
@@ -22,13 +42,554 @@ AVAILABLE_VIEWS = {
 # DSN接続設定
 DSN_CONNECTION = "DSN=Across;"
 
+# 接続先（configure_backend() で変更可能）
+#   'odbc'   : Across DB（SQL Server、DSN_CONNECTION）
+#   'standin': across_standin.py で作成したローカルのスタンドイン（SQLite、社外での動作確認・ベンチマーク用）
+BACKENDS = ('odbc', 'standin')
+STANDIN_PATH = Path('cache') / 'across_standin.db'
+_backend = 'odbc'
+
+# コネクションプール設定（configure_pool() で変更可能）
+POOL_MAX_SIZE = 8               # 同時に貸し出す接続の上限
+POOL_IDLE_RECYCLE_SEC = 300     # この秒数以上アイドルだった接続は作り直す
+POOL_CHECKOUT_TIMEOUT_SEC = 30  # 空きを待つ最大秒数
+
+# タイムアウト・サーキットブレーカー設定（configure_resilience() で変更可能）
+CONNECT_TIMEOUT_SEC = 10        # ログインのタイムアウト
+QUERY_TIMEOUT_SEC = 30          # クエリ1本のタイムアウト（get_connection(timeout=) で個別指定可）
+BREAKER_FAILURE_THRESHOLD = 5   # 連続でこの回数失敗したら遮断
+BREAKER_RESET_SEC = 30          # 遮断後、この秒数で1本だけ試行を通す
+
+# 接続不可とみなすエラー（タイムアウト・通信断・接続失敗）のSQLSTATE
+UNAVAILABLE_SQLSTATES = ('HYT00', 'HYT01', '08S01', '08001', '08004')
+
 
-def get_connection():
-    """読み取り専用でAcross DBに接続"""
-    conn = pyodbc.connect(DSN_CONNECTION, readonly=True)
-    cursor = conn.cursor()
-    cursor.execute("USE acrossDB;")
-    return conn, cursor
+class AcrossUnavailableError(ConnectionError):
+    """サーキットブレーカーが遮断中のため Across DB に問い合わせなかった"""
+
+
+def _is_unavailable_error(error):
+    """Across DB が応答しない・接続できないことを示すエラーか（SQLの誤りなどは含めない）"""
+    if pyodbc is None:
+        return False
+    if isinstance(error, pyodbc.OperationalError):
+        return True
+    if isinstance(error, pyodbc.Error) and error.args:
+        return str(error.args[0]) in UNAVAILABLE_SQLSTATES
+    return False
+
+
+class CircuitBreaker:
+    """
+    Across DB 用サーキットブレーカー（スレッドセーフ）
+
+    - closed   : 通常。接続不可エラーが failure_threshold 回続いたら open
+    - open     : 問い合わせずに即失敗（AcrossUnavailableError）。reset_timeout 秒後に half_open
+    - half_open: 1本だけ試行を通し、成功で closed・失敗で再び open
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SEC):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = 0
+        self._probe_started = 0
+        self._last_error = None
+        self._stats = {'opened': 0, 'rejected': 0, 'failures': 0}
+
+    def allow(self):
+        """問い合わせてよいか（open 中は False、half_open では試行中の1本以外 False）"""
+        with self._lock:
+            now = time.time()
+            if self._state == 'closed':
+                return True
+            if self._state == 'open' and now - self._opened_at >= self.reset_timeout:
+                self._state = 'half_open'
+                self._probe_started = 0
+            if self._state == 'half_open' and now - self._probe_started >= self.reset_timeout:
+                # 試行中の1本が結果を返さないまま reset_timeout 経ったら次を通す
+                self._probe_started = now
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def retry_in(self):
+        """次の試行までの秒数"""
+        with self._lock:
+            if self._state == 'closed':
+                return 0
+            return max(0, round(self._opened_at + self.reset_timeout - time.time()))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != 'closed':
+                self._state = 'closed'
+                print("[AcrossDB] 接続回復（サーキットブレーカー解除）")
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            self._stats['failures'] += 1
+            self._last_error = str(error)
+            if self._state == 'half_open' or (
+                    self._state == 'closed' and self._failures >= self.failure_threshold):
+                self._state = 'open'
+                self._opened_at = time.time()
+                self._stats['opened'] += 1
+                print(f"[AcrossDB] 連続{self._failures}回失敗のため {self.reset_timeout}秒間遮断: {error}")
+
+    def is_open(self):
+        """遮断中か（half_open の試行待ちを含む）"""
+        with self._lock:
+            return self._state != 'closed'
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, state=self._state, consecutive_failures=self._failures,
+                         last_error=self._last_error)
+        stats['retry_in_sec'] = self.retry_in()
+        stats['failure_threshold'] = self.failure_threshold
+        stats['reset_timeout_sec'] = self.reset_timeout
+        return stats
+
+
+_breaker = CircuitBreaker()
+
+
+class GuardedCursor:
+    """execute の結果（接続不可エラー・成功）をサーキットブレーカーに記録するカーソル"""
+
+    def __init__(self, raw):
+        object.__setattr__(self, '_raw', raw)
+
+    def execute(self, sql, *params):
+        try:
+            self._raw.execute(sql, *params)
+        except Exception as e:
+            if _is_unavailable_error(e):
+                _breaker.record_failure(e)
+            raise
+        _breaker.record_success()
+        return self
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)
+
+
+class PooledConnection:
+    """
+    プールから貸し出した接続のラッパー
+
+    close() で実接続を閉じずにプールへ返却する（既存の conn.close() 呼び出しをそのまま使える）
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._cursors = []
+        self._returned = False
+
+    def cursor(self):
+        cursor = self._raw.cursor()
+        self._cursors.append(cursor)
+        return GuardedCursor(cursor)
+
+    def set_timeout(self, seconds):
+        """この貸出中のクエリタイムアウト（秒、0で無制限）"""
+        try:
+            self._raw.timeout = seconds
+        except Exception:
+            pass
+
+    def _close_cursors(self):
+        """読み残しの結果セットで次の利用者がブロックされないようカーソルを閉じる"""
+        for cursor in self._cursors:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._cursors = []
+
+    def close(self):
+        """プールへ返却（二重返却は無視）"""
+        if not self._returned:
+            self._returned = True
+            self._close_cursors()
+            self._pool._release(self._raw)
+
+    def invalidate(self):
+        """接続を破棄して返却（エラーで状態が不明になった場合）"""
+        if not self._returned:
+            self._returned = True
+            self._close_cursors()
+            self._pool._discard(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class AcrossConnectionPool:
+    """
+    Across DB 接続プール（スレッドセーフ）
+
+    - 上限付き: 同時貸出数は max_size まで。超えた場合は checkout_timeout 秒まで待つ
+    - プレピング: 貸出前に SELECT 1 で生存確認し、切れていれば作り直す
+    - アイドル再生成: idle_recycle 秒以上使われていない接続は閉じて作り直す
+    - 1接続は同時に1スレッドにだけ貸し出す（pyodbc接続はスレッド間で共有しない）
+    - connector を渡すと pyodbc の代わりにその関数で接続を作る（スタンドイン用）
+    """
+
+    def __init__(self, connection_string, max_size=POOL_MAX_SIZE,
+                 idle_recycle=POOL_IDLE_RECYCLE_SEC, checkout_timeout=POOL_CHECKOUT_TIMEOUT_SEC,
+                 connector=None):
+        self.connection_string = connection_string
+        self.connector = connector
+        self.max_size = max_size
+        self.idle_recycle = idle_recycle
+        self.checkout_timeout = checkout_timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []  # [(接続, 最終利用時刻)]（末尾が直近に返却された接続）
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'discarded': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'in_use': 0,
+            'wait_ms_total': 0.0,
+        }
+
+    def _connect(self):
+        if self.connector is not None:
+            raw = self.connector()
+        else:
+            if pyodbc is None:
+                raise ConnectionError(f"pyodbc を読み込めないため Across DB に接続できません: {_pyodbc_import_error}")
+            raw = pyodbc.connect(self.connection_string, readonly=True, timeout=CONNECT_TIMEOUT_SEC)
+            raw.cursor().execute("USE acrossDB;")
+        with self._lock:
+            self._stats['created'] += 1
+        return raw
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _ping(raw):
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        接続を1本借りる
+
+        Returns:
+            PooledConnection: close() でプールに返却される接続
+
+        Raises:
+            TimeoutError: checkout_timeout 秒以内に空きが出なかった場合
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise TimeoutError(f"Across DB接続プールの空き待ちがタイムアウトしました（上限{self.max_size}本）")
+
+        try:
+            raw = None
+            while raw is None:
+                with self._lock:
+                    candidate, last_used = self._idle.pop() if self._idle else (None, None)
+
+                if candidate is None:
+                    raw = self._connect()
+                elif time.time() - last_used > self.idle_recycle:
+                    self._close_quietly(candidate)
+                    with self._lock:
+                        self._stats['recycled'] += 1
+                elif not self._ping(candidate):
+                    self._close_quietly(candidate)
+                    with self._lock:
+                        self._stats['ping_failures'] += 1
+                else:
+                    raw = candidate
+                    with self._lock:
+                        self._stats['reused'] += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+            self._stats['wait_ms_total'] += (time.perf_counter() - start) * 1000
+        return PooledConnection(self, raw)
+
+    def _release(self, raw):
+        """返却: 暗黙トランザクションを終了してアイドルリストへ戻す"""
+        try:
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self._lock:
+            self._idle.append((raw, time.time()))
+            self._stats['in_use'] -= 1
+        self._slots.release()
+
+    def _discard(self, raw):
+        self._close_quietly(raw)
+        with self._lock:
+            self._stats['discarded'] += 1
+            self._stats['in_use'] -= 1
+        self._slots.release()
+
+    def close_idle(self):
+        """アイドル中の接続をすべて閉じる"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for raw, _ in idle:
+            self._close_quietly(raw)
+        return len(idle)
+
+    def stats(self):
+        """プールの利用状況"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        stats['max_size'] = self.max_size
+        stats['idle_recycle_sec'] = self.idle_recycle
+        stats['avg_wait_ms'] = round(stats['wait_ms_total'] / stats['checkouts'], 2) if stats['checkouts'] else 0
+        stats['wait_ms_total'] = round(stats['wait_ms_total'], 1)
+        return stats
+
+
+_pool = AcrossConnectionPool(DSN_CONNECTION)
+
+
+def configure_pool(max_size=None, idle_recycle=None, checkout_timeout=None):
+    """
+    接続プールの設定を変更（アプリ起動時に config から呼ぶ）
+
+    上限を変更した場合はプールを作り直す（アイドル接続は閉じる）
+    """
+    global _pool
+    if max_size is not None and max_size != _pool.max_size:
+        old = _pool
+        _pool = AcrossConnectionPool(DSN_CONNECTION, max_size,
+                                     old.idle_recycle, old.checkout_timeout, old.connector)
+        old.close_idle()
+        _resize_fetch_executor(max_size)
+    if idle_recycle is not None:
+        _pool.idle_recycle = idle_recycle
+    if checkout_timeout is not None:
+        _pool.checkout_timeout = checkout_timeout
+    return _pool
+
+
+# 独立したビュー読み込みの並行実行用（各タスクがプールから接続を1本借りるため、スレッド数はプール上限に合わせる）
+_fetch_executor = ThreadPoolExecutor(max_workers=POOL_MAX_SIZE, thread_name_prefix='across-fetch')
+_fetch_executor_lock = threading.Lock()
+
+
+def _resize_fetch_executor(max_workers):
+    """並行読み込み用スレッドプールをプール上限に合わせて作り直す（実行中のタスクは旧プールで完了させる）"""
+    global _fetch_executor
+    with _fetch_executor_lock:
+        if _fetch_executor._max_workers == max_workers:
+            return
+        old = _fetch_executor
+        _fetch_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='across-fetch')
+    old.shutdown(wait=False)
+
+
+def get_pool_stats():
+    """接続プールの利用状況（監視用）"""
+    return dict(_pool.stats(), backend=_backend, breaker=_breaker.stats(),
+                query_timeout_sec=QUERY_TIMEOUT_SEC)
+
+
+def configure_resilience(query_timeout=None, connect_timeout=None,
+                         failure_threshold=None, reset_timeout=None):
+    """クエリ・ログインのタイムアウト（秒）とサーキットブレーカーの設定を変更"""
+    global QUERY_TIMEOUT_SEC, CONNECT_TIMEOUT_SEC
+    if query_timeout is not None:
+        QUERY_TIMEOUT_SEC = query_timeout
+    if connect_timeout is not None:
+        CONNECT_TIMEOUT_SEC = connect_timeout
+    if failure_threshold is not None:
+        _breaker.failure_threshold = failure_threshold
+    if reset_timeout is not None:
+        _breaker.reset_timeout = reset_timeout
+
+
+def is_available():
+    """Across DB に問い合わせられる状態か（サーキットブレーカーが遮断中でない）"""
+    return not _breaker.is_open()
+
+
+def get_breaker_stats():
+    """サーキットブレーカーの状態（state・連続失敗数・次の試行までの秒数）"""
+    return _breaker.stats()
+
+
+def _connect_standin():
+    """スタンドイン（SQLite）への読み取り専用接続"""
+    if not Path(STANDIN_PATH).exists():
+        raise FileNotFoundError(f"スタンドインDBがありません: {STANDIN_PATH}（python across_standin.py で作成）")
+    conn, _ = across_mirror.open_sqlite(STANDIN_PATH)
+    return conn
+
+
+def configure_backend(backend=None, standin_path=None):
+    """
+    接続先を切り替える（アプリ起動時に config から、またはベンチマーク・テストから呼ぶ）
+
+    接続プールを作り直し、接続先ごとに異なる状態（更新検知のウォーターマーク・
+    列構成・クエリ結果のキャッシュ）を切り替える
+
+    Args:
+        backend: 'odbc'（Across DB）/ 'standin'（ローカルのスタンドイン）
+        standin_path: スタンドインのSQLiteファイル
+
+    Raises:
+        ValueError: 不正な接続先
+    """
+    global _pool, _backend, STANDIN_PATH, WATERMARK_FILE, _watermarks
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"不正な接続先: {backend}")
+    if standin_path is not None:
+        STANDIN_PATH = Path(standin_path)
+    if backend is None or (backend == _backend and standin_path is None):
+        return _backend
+
+    _backend = backend
+    old = _pool
+    _pool = AcrossConnectionPool(DSN_CONNECTION, old.max_size, old.idle_recycle, old.checkout_timeout,
+                                 _connect_standin if backend == 'standin' else None)
+    old.close_idle()
+
+    with _watermark_lock:
+        WATERMARK_FILE = Path('cache') / ('across_watermarks.json' if backend == 'odbc'
+                                          else f'across_watermarks_{backend}.json')
+        _watermarks = None
+    clear_view_schema_cache()
+    invalidate_result_cache()
+    print(f"[AcrossDB] 接続先: {backend}" + (f" ({STANDIN_PATH})" if backend == 'standin' else ''))
+    return _backend
+
+
+# 読み出し元（configure_mirror() で変更可能）
+#   'off'     : 常に Across DB（ミラーは使わない）
+#   'fallback': Across DB に接続できない場合だけローカルミラーを読む
+#   'offline' : 常にローカルミラーを読む（Across DB には同期時のみ接続）
+MIRROR_MODES = ('off', 'fallback', 'offline')
+_read_mode = 'off'
+
+
+def configure_mirror(mode=None, path=None, sync_interval=None, full_sync_interval=None):
+    """
+    ローカルミラーの読み出しモード・保存先・同期間隔を変更（アプリ起動時に config から呼ぶ）
+
+    Raises:
+        ValueError: 不正なモード
+    """
+    global _read_mode
+    if mode is not None:
+        if mode not in MIRROR_MODES:
+            raise ValueError(f"不正なミラーモード: {mode}")
+        _read_mode = mode
+    across_mirror.configure(path, sync_interval, full_sync_interval)
+    return _read_mode
+
+
+def get_mirror_status():
+    """ミラーの鮮度と現在の読み出しモード（画面の鮮度表示用）"""
+    return dict(across_mirror.get_status(), mode=_read_mode)
+
+
+def get_live_connection(timeout=None):
+    """
+    Across DB への接続をプールから借りる（ミラー設定に関係なく実DB、ミラー同期元）
+
+    Args:
+        timeout: この接続でのクエリタイムアウト（秒、Noneで QUERY_TIMEOUT_SEC）
+
+    Returns:
+        tuple: (接続, カーソル)。接続の close() でプールに返却される
+
+    Raises:
+        AcrossUnavailableError: サーキットブレーカーが遮断中（問い合わせずに即失敗）
+    """
+    if not _breaker.allow():
+        raise AcrossUnavailableError(
+            f"Across DBが応答しないため一時停止中です（{_breaker.retry_in()}秒後に再試行）")
+    try:
+        conn = _pool.acquire()
+    except Exception as e:
+        # 空き待ちのタイムアウトはDB側の障害ではないので数えない
+        if not isinstance(e, TimeoutError):
+            _breaker.record_failure(e)
+        raise
+    conn.set_timeout(QUERY_TIMEOUT_SEC if timeout is None else timeout)
+    return conn, conn.cursor()
+
+
+def get_connection(timeout=None):
+    """
+    読み取り専用のAcross DB接続を借りる
+
+    ミラーモードが 'offline' ならローカルミラー、'fallback' で Across DB に接続できなければ
+    （サーキットブレーカー遮断中を含む）ローカルミラーへの接続を返す（SQLは同じものがそのまま使える）
+
+    Args:
+        timeout: クエリタイムアウト（秒、Noneで QUERY_TIMEOUT_SEC。ミラーには適用しない）
+
+    Returns:
+        tuple: (接続, カーソル)。接続の close() でプールに返却される
+    """
+    if _read_mode == 'offline':
+        return across_mirror.connect()
+    try:
+        return get_live_connection(timeout)
+    except Exception as e:
+        if _read_mode != 'fallback' or not across_mirror.is_available():
+            raise
+        print(f"[AcrossDB] 接続失敗のためローカルミラーを使用: {e}")
+        return across_mirror.connect()
+
+
+# IN句1回あたりのパラメータ数（SQL Server のパラメータ上限2100未満に抑える）
+IN_CHUNK_SIZE = 500
+
+
+def _chunked(values, size=IN_CHUNK_SIZE):
+    """リストをIN句用のチャンクに分割"""
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
 
 
 def format_value(value):
@@ -45,49 +606,190 @@ def format_value(value):
         return str(value).strip()
 
 
-def query_view(view_name, where_clause=None, params=None, limit=100):
+# ========================================
+# 列単位の結果変換
+# ========================================
+# format_value と同じ変換を、列の型ごとに1回だけ選んだ関数で列まるごと適用する
+# （セルごとの isinstance 分岐をなくし、取得件数の多い検索・マージで効く）
+
+def _format_str_column(values):
+    return [None if v is None else v.strip() for v in values]
+
+
+def _format_decimal_column(values):
+    return [None if v is None else (int(v) if v == int(v) else float(v)) for v in values]
+
+
+def _format_date_column(values):
+    return [None if v is None else f"{v.year % 100:02d}/{v.month:02d}/{v.day:02d}" for v in values]
+
+
+def _format_text_column(values):
+    """int・float など（format_value と同じく文字列化）"""
+    return [None if v is None else str(v).strip() for v in values]
+
+
+def _format_mixed_column(values):
+    return [format_value(v) for v in values]
+
+
+def _formatter_for_type(value_type):
+    if issubclass(value_type, str):
+        return _format_str_column
+    if issubclass(value_type, Decimal):
+        return _format_decimal_column
+    if issubclass(value_type, date):   # datetime は date のサブクラス
+        return _format_date_column
+    return _format_text_column
+
+
+def _column_formatters(description, rows):
     """
-    指定ビューからデータ取得
+    列ごとの変換関数を選ぶ
+
+    pyodbc は cursor.description に列のPython型を持つのでそれを使う。
+    ミラー（SQLite）は型を持たないため、バッチ内の値の型が揃っていればその型、
+    混在していれば format_value をセルごとに適用する。
+    """
+    formatters = []
+    for idx, col in enumerate(description):
+        type_code = col[1]
+        if isinstance(type_code, type):
+            formatters.append(_formatter_for_type(type_code))
+            continue
+        types = {type(row[idx]) for row in rows if row[idx] is not None}
+        formatters.append(_formatter_for_type(types.pop()) if len(types) == 1 else _format_mixed_column)
+    return formatters
+
+
+def format_columns(description, rows):
+    """
+    行バッチを列単位で整形
 
     Args:
-        view_name: ビュー名 (AVAILABLE_VIEWS のキー)
-        where_clause: WHERE条件文字列 (例: "製番 = ?")
-        params: パラメータリスト (例: ['MHT0620'])
-        limit: 最大取得件数
+        description: cursor.description
+        rows: fetchall / fetchmany の結果
 
     Returns:
-        dict: { columns: [...], rows: [[...], ...], count: int }
+        list: 整形済みの列（値リスト）のリスト（description の列順）
     """
-    if view_name not in AVAILABLE_VIEWS:
-        raise ValueError(f"不正なビュー名: {view_name}")
+    if not rows:
+        return [[] for _ in description]
+    formatters = _column_formatters(description, rows)
+    return [fmt(values) for fmt, values in zip(formatters, zip(*rows))]
 
-    conn = None
-    try:
-        conn, cursor = get_connection()
 
-        sql = f"SELECT TOP {int(limit)} * FROM dbo.[{view_name}]"
-        if where_clause:
-            sql += f" WHERE {where_clause}"
+def format_rows(description, rows):
+    """行バッチを列単位で整形し、行（値リスト）のリストに戻す"""
+    return [list(row) for row in zip(*format_columns(description, rows))]
 
-        cursor.execute(sql, params or [])
 
-        columns = [col[0] for col in cursor.description]
-        raw_rows = cursor.fetchall()
+def fetch_columns(cursor):
+    """
+    直前に実行したクエリの結果を列単位で取得
 
-        rows = []
-        for row in raw_rows:
-            rows.append([format_value(v) for v in row])
+    Returns:
+        dict: {列名: 整形済みの値リスト}（列順を保持）
+    """
+    description = cursor.description
+    columns = format_columns(description, cursor.fetchall())
+    return {col[0]: values for col, values in zip(description, columns)}
 
-        return {
-            'columns': columns,
-            'rows': rows,
-            'count': len(rows)
-        }
+
+# ========================================
+# ストリーミング取得（大きな結果セット用）
+# ========================================
+# iter_* 関数は次のイベントdictを順に返すジェネレータ:
+#   {'type': 'columns', 'columns': [...]}   列名（先頭に1回）
+#   {'type': 'rows', 'rows': [...]}         整形済みの行バッチ（FETCH_ARRAYSIZE 件ずつ）
+#   {'type': 'end', 'count': int, ...}      件数・統計（最後に1回）
+# 接続はジェネレータが閉じられた時点（最後まで読んだ・クライアント切断）で返却される
+
+# fetchmany 1回あたりの取得件数
+FETCH_ARRAYSIZE = 1000
+
+
+def _iter_formatted(cursor, arraysize=FETCH_ARRAYSIZE):
+    """直前に実行したクエリの結果を fetchmany で arraysize 件ずつ取り出し、整形済みの行リストを返す"""
+    cursor.arraysize = arraysize
+    description = cursor.description
+    while True:
+        batch = cursor.fetchmany(arraysize)
+        if not batch:
+            return
+        yield format_rows(description, batch)
+
+
+def _iter_query(sql, params=None):
+    """SQLを実行し、列名・行バッチ・件数のイベントを順に返す"""
+    conn = None
+    try:
+        conn, cursor = get_connection()
+        cursor.execute(sql, params or [])
+        yield {'type': 'columns', 'columns': [col[0] for col in cursor.description]}
+
+        count = 0
+        for batch in _iter_formatted(cursor):
+            count += len(batch)
+            yield {'type': 'rows', 'rows': batch}
+        yield {'type': 'end', 'count': count}
     finally:
         if conn:
             conn.close()
 
 
+def collect_stream(events):
+    """
+    iter_* のイベントを一括レスポンス形式にまとめる
+
+    Returns:
+        dict: {'columns': [...], 'rows': [...], 'count': int, ...終端イベントの項目}
+    """
+    result = {'columns': [], 'rows': []}
+    for event in events:
+        kind = event['type']
+        if kind == 'columns':
+            result['columns'] = event['columns']
+        elif kind == 'rows':
+            result['rows'].extend(event['rows'])
+        elif kind == 'end':
+            result.update({k: v for k, v in event.items() if k != 'type'})
+    result.setdefault('count', len(result['rows']))
+    return result
+
+
+def iter_view(view_name, where_clause=None, params=None, limit=100):
+    """
+    指定ビューからデータをストリーミング取得（引数は query_view と同じ）
+
+    Raises:
+        ValueError: 不正なビュー名（ストリーム開始前に検査する）
+    """
+    if view_name not in AVAILABLE_VIEWS:
+        raise ValueError(f"不正なビュー名: {view_name}")
+
+    sql = f"SELECT TOP {int(limit)} * FROM dbo.[{view_name}]"
+    if where_clause:
+        sql += f" WHERE {where_clause}"
+    return _iter_query(sql, params)
+
+
+def query_view(view_name, where_clause=None, params=None, limit=100):
+    """
+    指定ビューからデータ取得
+
+    Args:
+        view_name: ビュー名 (AVAILABLE_VIEWS のキー)
+        where_clause: WHERE条件文字列 (例: "製番 = ?")
+        params: パラメータリスト (例: ['MHT0620'])
+        limit: 最大取得件数
+
+    Returns:
+        dict: { columns: [...], rows: [[...], ...], count: int }
+    """
+    return collect_stream(iter_view(view_name, where_clause, params, limit))
+
+
 def search_order(order_number):
     """
     発注番号で検索（ゼロパディング対応）
@@ -145,199 +847,922 @@ def search_receipts(order_number):
     return query_view('V_D仕入', '発注番号 = ?', [padded])
 
 
-def get_view_columns(view_name):
-    """ビューのカラム一覧を取得"""
+def get_receipt_summary(order_numbers, timeout=None):
+    """
+    複数発注番号の仕入（納入実績）をまとめて集計
+
+    分納は最新の納入日・納入数の合計に集約する（集計はSQL側、IN句はチャンク分割）
+
+    Args:
+        order_numbers: 発注番号のリスト（ゼロパディング有無どちらでも可）
+        timeout: クエリタイムアウト（秒、Noneで QUERY_TIMEOUT_SEC）
+
+    Returns:
+        dict: {発注番号（入力値の前後空白除去）: {'納入日': str or None, '納入数': float}}
+              実績のない発注番号は含まない
+    """
+    # DBの発注番号（8桁ゼロパディング）→ 入力値
+    padded_map = {}
+    for order_number in order_numbers:
+        key = str(order_number).strip() if order_number is not None else ''
+        if key:
+            padded_map.setdefault(key.zfill(8), []).append(key)
+    if not padded_map:
+        return {}
+
+    summary = {}
+    conn = None
+    try:
+        conn, cursor = get_connection(timeout)
+        for chunk in _chunked(list(padded_map.keys())):
+            placeholders = ','.join(['?' for _ in chunk])
+            cursor.execute(f"""
+                SELECT 発注番号, MAX(納入日) AS 納入日, SUM(納入数) AS 納入数
+                FROM dbo.[V_D仕入]
+                WHERE 発注番号 IN ({placeholders})
+                GROUP BY 発注番号
+            """, chunk)
+            for order_number, latest_date, total_qty in cursor.fetchall():
+                info = {
+                    '納入日': format_value(latest_date),
+                    '納入数': float(total_qty or 0)
+                }
+                for key in padded_map.get(str(order_number).strip(), []):
+                    summary[key] = info
+        return summary
+    finally:
+        if conn:
+            conn.close()
+
+
+# ビューの列構成キャッシュ（ビュー定義はほぼ変わらないため、一定時間は再問い合わせしない）
+VIEW_SCHEMA_TTL_SEC = 3600
+_view_schema_cache = {}   # {ビュー名: (取得時刻, [列名])}
+_view_schema_lock = threading.Lock()
+
+
+def get_view_columns(view_name, refresh=False):
+    """
+    ビューのカラム一覧を取得（VIEW_SCHEMA_TTL_SEC の間はキャッシュを返す）
+
+    Args:
+        view_name: ビュー名
+        refresh: Trueでキャッシュを使わず取得し直す
+    """
     if view_name not in AVAILABLE_VIEWS:
         raise ValueError(f"不正なビュー名: {view_name}")
 
+    if not refresh:
+        with _view_schema_lock:
+            cached = _view_schema_cache.get(view_name)
+        if cached and time.time() - cached[0] < VIEW_SCHEMA_TTL_SEC:
+            return list(cached[1])
+
     conn = None
     try:
         conn, cursor = get_connection()
         cursor.execute(f"SELECT TOP 0 * FROM dbo.[{view_name}]")
         columns = [col[0] for col in cursor.description]
-        return columns
     finally:
         if conn:
             conn.close()
 
+    with _view_schema_lock:
+        _view_schema_cache[view_name] = (time.time(), columns)
+    return list(columns)
+
+
+def clear_view_schema_cache():
+    """ビュー列構成のキャッシュを破棄"""
+    with _view_schema_lock:
+        _view_schema_cache.clear()
+
+
+# ========================================
+# クエリ結果キャッシュ（stale-while-revalidate）
+# ========================================
+# 画面で同じ製番・発注番号を行き来するたびに同じSQLを流さないよう、結果をビューごとのTTLで保持する
+#   TTL内                         : キャッシュを返す（hit）
+#   TTL切れ〜TTL+RESULT_CACHE_STALE_SEC : 古い結果をすぐ返し、裏で取り直す（stale）
+#   それより古い・未取得          : その場で取得（miss）。取得に失敗した場合（DB停止・遮断中）は
+#                                   期限切れの結果があればそれを返す（expired）
+# 失敗結果（'success': False）は保持しない。check_db_updates() が変更を検出したビューは破棄する
+
+# ビューごとの有効期限（秒）（configure_result_cache() で変更可能）
+RESULT_CACHE_TTL_SEC = {
+    'V_D発注': 300,
+    'V_D発注残': 120,
+    'V_D仕入': 120,
+    'V_D手配リスト': 300,
+    'V_D未発注': 300,
+    'V_D受注': 1800,
+}
+RESULT_CACHE_DEFAULT_TTL_SEC = 300
+RESULT_CACHE_STALE_SEC = 600     # TTL切れ後、古い結果を返しつつ裏で更新する猶予
+RESULT_CACHE_MAX_SIZE = 500      # 保持する結果の上限（超えたら古い順に破棄）
+
+
+class QueryResultCache:
+    """
+    クエリ結果のLRUキャッシュ（ビューごとのTTL・期限切れ後の裏更新、スレッドセーフ）
+
+    キーは (ビュー名, 関数名, 引数) で、先頭のビュー名単位でTTL・統計・破棄を行う
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()     # {キー: (取得時刻, 結果)}
+        self._lock = threading.Lock()
+        self._refreshing = set()       # 裏で取り直し中のキー
+        self._generation = {}          # {ビュー名: 破棄回数}（破棄前に始まった取得結果を保存しない）
+        self._stats = {}               # {ビュー名: 統計}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='across-result-refresh')
+
+    def _view_stats(self, view_name):
+        return self._stats.setdefault(view_name, {
+            'hits': 0, 'stale_hits': 0, 'expired_hits': 0, 'misses': 0, 'bypasses': 0,
+            'refreshes': 0, 'refresh_errors': 0, 'invalidations': 0, 'evictions': 0,
+        })
+
+    @staticmethod
+    def ttl(view_name):
+        return RESULT_CACHE_TTL_SEC.get(view_name, RESULT_CACHE_DEFAULT_TTL_SEC)
+
+    def get_or_load(self, view_name, key, loader, bypass=False):
+        """
+        キャッシュ済みの結果を返す（なければ loader() で取得して保存）
+
+        Args:
+            bypass: Trueでキャッシュを読まずに取得し直す（結果は保存する）
+
+        Returns:
+            tuple: (結果, 'hit' / 'stale' / 'miss' / 'bypass' / 'expired')
+        """
+        refresh = False
+        serve_stale = False
+        with self._lock:
+            stats = self._view_stats(view_name)
+            generation = self._generation.get(view_name, 0)
+            entry = self._data.get(key)
+            if entry is not None and not bypass:
+                age = time.time() - entry[0]
+                if age < self.ttl(view_name):
+                    self._data.move_to_end(key)
+                    stats['hits'] += 1
+                    return entry[1], 'hit'
+                if age < self.ttl(view_name) + RESULT_CACHE_STALE_SEC:
+                    self._data.move_to_end(key)
+                    stats['stale_hits'] += 1
+                    serve_stale = True
+                    refresh = key not in self._refreshing
+                    if refresh:
+                        self._refreshing.add(key)
+            if not serve_stale:
+                stats['bypasses' if bypass else 'misses'] += 1
+
+        if serve_stale:
+            if refresh:
+                self._executor.submit(self._refresh, view_name, key, loader, generation)
+            return entry[1], 'stale'
+
+        # その場で取得。失敗した場合は期限切れの結果があればそれを返す
+        status = 'bypass' if bypass else 'miss'
+        try:
+            result = loader()
+        except Exception:
+            if entry is None:
+                raise
+            result = None
+        failed = result is None or (isinstance(result, dict) and result.get('success') is False)
+        if not failed:
+            self._store(view_name, key, result, generation)
+            return result, status
+        if entry is None:
+            return result, status
+        with self._lock:
+            stats['expired_hits'] += 1
+        return entry[1], 'expired'
+
+    def _store(self, view_name, key, result, generation):
+        """結果を保存（失敗結果・取得中に破棄されたビューの結果は保存しない）"""
+        if isinstance(result, dict) and result.get('success') is False:
+            return False
+        with self._lock:
+            if self._generation.get(view_name, 0) != generation:
+                return False
+            self._data[key] = (time.time(), result)
+            self._data.move_to_end(key)
+            while len(self._data) > RESULT_CACHE_MAX_SIZE:
+                evicted_key, _ = self._data.popitem(last=False)
+                self._view_stats(evicted_key[0])['evictions'] += 1
+        return True
+
+    def _refresh(self, view_name, key, loader, generation):
+        try:
+            stored = self._store(view_name, key, loader(), generation)
+        except Exception as e:
+            print(f"クエリ結果キャッシュ更新エラー ({view_name}): {e}")
+            stored = False
+        with self._lock:
+            self._refreshing.discard(key)
+            self._view_stats(view_name)['refreshes' if stored else 'refresh_errors'] += 1
+
+    def invalidate(self, views=None):
+        """指定ビュー（Noneで全ビュー）の結果を破棄し、破棄件数を返す"""
+        with self._lock:
+            targets = set(views) if views is not None else set(AVAILABLE_VIEWS) | {k[0] for k in self._data}
+            keys = [k for k in self._data if k[0] in targets]
+            for key in keys:
+                del self._data[key]
+                self._view_stats(key[0])['invalidations'] += 1
+            for view_name in targets:
+                self._generation[view_name] = self._generation.get(view_name, 0) + 1
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            sizes = {}
+            for key in self._data:
+                sizes[key[0]] = sizes.get(key[0], 0) + 1
+            views = {name: dict(s, size=sizes.get(name, 0), ttl_sec=self.ttl(name))
+                     for name, s in self._stats.items()}
+            size = len(self._data)
+            refreshing = len(self._refreshing)
+        for s in views.values():
+            lookups = s['hits'] + s['stale_hits'] + s['misses']
+            s['hit_rate'] = round((s['hits'] + s['stale_hits']) / lookups * 100, 1) if lookups else 0
+        return {
+            'views': views,
+            'size': size,
+            'max_size': RESULT_CACHE_MAX_SIZE,
+            'stale_sec': RESULT_CACHE_STALE_SEC,
+            'refreshing': refreshing,
+        }
+
+
+_result_cache = QueryResultCache()
+
+
+def configure_result_cache(ttl=None, default_ttl=None, stale=None, max_size=None):
+    """
+    クエリ結果キャッシュの設定を変更
+
+    Args:
+        ttl: {ビュー名: 有効期限（秒）}（指定したビューのみ上書き）
+        default_ttl: 上記にないビューの有効期限（秒）
+        stale: 期限切れ後に古い結果を返す猶予（秒）
+        max_size: 保持する結果の上限
+    """
+    global RESULT_CACHE_DEFAULT_TTL_SEC, RESULT_CACHE_STALE_SEC, RESULT_CACHE_MAX_SIZE
+    if ttl:
+        RESULT_CACHE_TTL_SEC.update(ttl)
+    if default_ttl is not None:
+        RESULT_CACHE_DEFAULT_TTL_SEC = default_ttl
+    if stale is not None:
+        RESULT_CACHE_STALE_SEC = stale
+    if max_size is not None:
+        RESULT_CACHE_MAX_SIZE = max_size
+
+
+def cached_call(view_name, func, *args, bypass=False):
+    """
+    func(*args) の結果を view_name のTTLでキャッシュして返す
+
+    Args:
+        view_name: 結果の元になるビュー名（TTL・統計・破棄の単位）
+        func: across_db の検索関数（query_view・search_mihatchu など）
+        bypass: Trueでキャッシュを読まずに取得し直す
+
+    Returns:
+        tuple: (結果, 'hit' / 'stale' / 'miss' / 'bypass' / 'expired')
+    """
+    key = (view_name, func.__name__, json.dumps(args, ensure_ascii=False, default=str))
+    return _result_cache.get_or_load(view_name, key, lambda: func(*args), bypass)
+
+
+def invalidate_result_cache(views=None):
+    """指定ビュー（Noneで全ビュー）のクエリ結果キャッシュを破棄"""
+    return _result_cache.invalidate(views)
+
+
+def get_result_cache_stats():
+    """クエリ結果キャッシュの統計（ビューごとのヒット率・件数など）"""
+    return _result_cache.stats()
+
+
+# マージ元データ取得SQL（プレビュー・取込・一括取込で共通、WHERE句は呼び出し側で付与）
+TEHAI_MERGE_SELECT = """
+    SELECT 製番, 担当者, ページNo, 行No, 部品No, 階層, 品目CD,
+           品名, 仕様１, 仕様２, 手配区分CD, 手配区分, メーカー,
+           材質, 員数, 必要数, 手配数, 単位, 備考, 日付
+    FROM dbo.[V_D手配リスト]
+"""
+
+HATCHU_MERGE_SELECT = """
+    SELECT 発注番号, 製番, 品名, 仕様１, 仕様２, 手配区分CD, 手配区分,
+           材質, 仕入先CD, 仕入先名, 仕入先略称, 発注数, 単位,
+           発注単価, 発注金額, 発注日, 納期, 回答納期, 備考
+    FROM dbo.[V_D発注]
+"""
+
+MIHATCHU_MERGE_SELECT = """
+    SELECT 製番, 品名, 仕様１, 仕様２, 手配区分CD, 手配区分, メーカー,
+           材質, 仕入先CD, 仕入先略称, 発注数, 単位, 納期, 備考,
+           ページNo, 行No, 階層
+    FROM dbo.[V_D未発注]
+"""
+
+# 社内加工品（MHT+11）の条件
+MIHATCHU_MERGE_FILTER = "仕入先CD = 'MHT' AND 手配区分CD = '11'"
+
+# マージ方式（configure_merge() で変更可能）
+#   'python': V_D手配リスト・V_D発注を読み込んで MergeUtils で照合
+#   'sql'   : 照合をDB側で行い（OUTER APPLY TOP 1）、マージ済みの列だけを受け取る
+MERGE_MODES = ('python', 'sql')
+MERGE_MODE = 'python'
+
+# SQLでマージする場合に手配リストから受け取る列（save_to_database() が使う列のみ）
+PUSHDOWN_TEHAI_COLUMNS = [
+    '製番', 'ページNo', '行No', '部品No', '階層', '品目CD', '品名', '仕様１', '仕様２',
+    '手配区分CD', '手配区分', 'メーカー', '材質', '員数', '必要数', '手配数', '単位', '備考'
+]
+PUSHDOWN_HATCHU_COLUMNS = ['発注番号', '仕入先略称', '仕入先CD', '納期', '回答納期']
+
+
+def configure_merge(mode=None):
+    """マージ方式（'python' / 'sql'）を変更"""
+    global MERGE_MODE
+    if mode is not None:
+        if mode not in MERGE_MODES:
+            raise ValueError(f"不明なマージ方式です: {mode}（{' / '.join(MERGE_MODES)}）")
+        MERGE_MODE = mode
+    return MERGE_MODE
+
+
+def _order_date_filter(order_date_from=None, order_date_to=None, alias=''):
+    """発注日フィルタのSQL断片（' AND ...'）とパラメータ"""
+    sql = ''
+    params = []
+    if order_date_from:
+        sql += f" AND {alias}発注日 >= ?"
+        params.append(order_date_from)
+    if order_date_to:
+        sql += f" AND {alias}発注日 <= ?"
+        params.append(order_date_to)
+    return sql, params
+
+
+def _sql_dialect(cursor):
+    """カーソルの接続先のSQL方言（'mssql': Across DB / 'sqlite': ミラー・スタンドイン）"""
+    raw = cursor._raw if isinstance(cursor, GuardedCursor) else cursor
+    return 'sqlite' if isinstance(raw, across_mirror.SqliteCursor) else 'mssql'
+
+
+def _merge_key_sql(dialect, alias, col):
+    """
+    マッチキー列のSQL式（MergeUtils.normalize_key() と同じ正規化）
+
+    NULLは空にし、前後から MergeUtils.KEY_WHITESPACE（str.strip() が除去する空白類）を除去する。
+    SQLite は TRIM(値, 除去文字)。SQL Server の LTRIM/RTRIM は半角スペースしか除去しないため、
+    PATINDEX で空白類以外の最初と最後の文字を探して切り出す。
+    DBのキー列は文字列型のため、normalize_key() の整数値 float の変換（Excel由来の値向け）は不要
+    """
+    codes = ', '.join(str(ord(c)) for c in MergeUtils.KEY_WHITESPACE)
+    if dialect == 'sqlite':
+        return f"TRIM(IFNULL({alias}.{col}, ''), char({codes}))"
+    # 既定の CI_AS 照合順序では大文字小文字・全角半角・かなの違いを同一視するためバイナリ照合にする
+    value = f"(ISNULL({alias}.{col}, N'') COLLATE Japanese_BIN2)"
+    # 空白類以外の1文字（空白類は制御文字も含め文字列リテラルにそのまま埋め込む）
+    pattern = f"N'%[^{MergeUtils.KEY_WHITESPACE}]%'"
+    start = f"PATINDEX({pattern}, {value})"
+    end = f"PATINDEX({pattern}, REVERSE({value}))"
+    return (f"(CASE WHEN {start} = 0 THEN N'' "
+            f"ELSE SUBSTRING({value}, {start}, LEN({value} + N'x') - {start} - {end} + 1) END)")
+
+
+def _pushdown_merge_sql(dialect, condition, date_sql):
+    """
+    V_D手配リストの各行に V_D発注 の1行をDB側で照合するSQL（MergeUtils と同じマッチポリシー）
+
+    - Primary: 製番・仕様１・材質が一致する発注のうち発注番号が最小の行
+    - Fallback: 製番・仕様１が一致し手配区分が両立する（どちらかが空なら問わない）発注のうち発注番号が最小の行
+    - Primary があればそれを採用（取込側の発注データを発注番号順に並べた先勝ちと同じ結果）
+    - SQL Server は OUTER APPLY (SELECT TOP 1 ...)、SQLite は相関サブクエリで照合行の rowid を求めて結合
+    - キーは _merge_key_sql() で MergeUtils.normalize_key() と同じく正規化し、バイナリ照合で比較する
+    - 製番は索引を使うため生の値同士の一致も条件に残す（取込側も製番条件で取得した行だけを照合する）
+
+    Args:
+        dialect: 'mssql' / 'sqlite'
+        condition: 手配リストの製番条件（_seiban_condition()）
+        date_sql: 発注日フィルタ（_order_date_filter(alias='h.')）
+
+    Returns:
+        str: SQL（パラメータは 発注日フィルタ（Primary）→ 発注日フィルタ（Fallback）→ 製番 の順）
+    """
+    key = partial(_merge_key_sql, dialect)
+    fallback = (
+        f"h.製番 = t.製番 AND {key('h', '製番')} = {key('t', '製番')}"
+        f" AND {key('t', '仕様１')} <> '' AND {key('h', '仕様１')} = {key('t', '仕様１')}"
+    )
+    primary = f"{fallback} AND {key('t', '材質')} <> '' AND {key('h', '材質')} = {key('t', '材質')}{date_sql}"
+    fallback += (
+        f" AND ({key('t', '手配区分')} = '' OR {key('h', '手配区分')} = ''"
+        f" OR {key('h', '手配区分')} = {key('t', '手配区分')}){date_sql}"
+    )
+    tehai_columns = ', '.join(f"t.{c}" for c in PUSHDOWN_TEHAI_COLUMNS)
+    hatchu_columns = ', '.join(f"h.{c}" for c in PUSHDOWN_HATCHU_COLUMNS)
+
+    if dialect == 'sqlite':
+        return f"""
+            SELECT {tehai_columns}, {hatchu_columns},
+                   CASE WHEN t.発注行1 IS NOT NULL THEN 1 WHEN t.発注行2 IS NOT NULL THEN 2 END AS 一致
+            FROM (
+                SELECT t.*,
+                       (SELECT h.rowid FROM dbo.[V_D発注] h WHERE {primary}
+                        ORDER BY h.発注番号 LIMIT 1) AS 発注行1,
+                       (SELECT h.rowid FROM dbo.[V_D発注] h WHERE {fallback}
+                        ORDER BY h.発注番号 LIMIT 1) AS 発注行2
+                FROM dbo.[V_D手配リスト] t
+                WHERE t.{condition}
+            ) t
+            LEFT JOIN dbo.[V_D発注] h ON h.rowid = COALESCE(t.発注行1, t.発注行2)
+        """
+    return f"""
+        SELECT {tehai_columns}, {', '.join(f"m.{c}" for c in PUSHDOWN_HATCHU_COLUMNS)}, m.一致
+        FROM dbo.[V_D手配リスト] t
+        OUTER APPLY (
+            SELECT TOP 1 c.* FROM (
+                SELECT * FROM (
+                    SELECT TOP 1 {hatchu_columns}, 1 AS 一致 FROM dbo.[V_D発注] h
+                    WHERE {primary} ORDER BY h.発注番号
+                ) p
+                UNION ALL
+                SELECT * FROM (
+                    SELECT TOP 1 {hatchu_columns}, 2 AS 一致 FROM dbo.[V_D発注] h
+                    WHERE {fallback} ORDER BY h.発注番号
+                ) f
+            ) c
+            ORDER BY c.一致
+        ) m
+        WHERE t.{condition}
+    """
+
+
+def _seiban_condition(seibans):
+    """製番条件のWHERE句（1件なら =、複数なら IN）"""
+    if len(seibans) == 1:
+        return "製番 = ?"
+    placeholders = ','.join(['?' for _ in seibans])
+    return f"製番 IN ({placeholders})"
+
+
+def _fetch_records(cursor):
+    """直前に実行したクエリの結果を整形済みdictのリストで返す"""
+    columns = fetch_columns(cursor)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def _run_queries(queries):
+    """
+    プールから借りた1本の接続で複数クエリを順に実行し、結果レコードを連結して返す
+
+    Args:
+        queries: [(SQL, パラメータ), ...]（SQLは文字列、または方言を受け取ってSQLを返す関数）
+    """
+    conn = None
+    try:
+        conn, cursor = get_connection()
+        records = []
+        for sql, params in queries:
+            if callable(sql):
+                sql = sql(_sql_dialect(cursor))
+            cursor.execute(sql, params)
+            records.extend(_fetch_records(cursor))
+        return records
+    finally:
+        if conn:
+            conn.close()
+
+
+def _fetch_concurrently(tasks):
+    """
+    独立したビューの読み込みをそれぞれ別のプール接続で並行実行
+
+    Args:
+        tasks: {名前: [(SQL, パラメータ), ...]}
+
+    Returns:
+        dict: {名前: レコードリスト}（すべての結果が揃ってから返す）
+    """
+    if len(tasks) <= 1:
+        return {name: _run_queries(queries) for name, queries in tasks.items()}
+    # 作り直し中の旧プールに投入しないよう、投入はロック内で行う
+    with _fetch_executor_lock:
+        futures = {name: _fetch_executor.submit(_run_queries, queries) for name, queries in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def _merge_source_tasks(seibans, order_date_from=None, order_date_to=None, include_mihatchu=False,
+                        mode='python'):
+    """
+    マージ元ビュー（V_D手配リスト・V_D発注・V_D未発注）の取得クエリを組み立てる
+
+    mode='sql' では V_D手配リスト・V_D発注の代わりに、DB側で照合したマージ済み行（'merged'）を取得する
+    """
+    date_sql, date_params = _order_date_filter(order_date_from, order_date_to)
+
+    tasks = {'merged': []} if mode == 'sql' else {'tehai': [], 'hatchu': []}
+    if include_mihatchu:
+        tasks['mihatchu'] = []
+
+    for chunk in _chunked(seibans):
+        condition = _seiban_condition(chunk)
+        if mode == 'sql':
+            pushdown_date_sql, _ = _order_date_filter(order_date_from, order_date_to, alias='h.')
+            tasks['merged'].append((
+                partial(_pushdown_merge_sql, condition=condition, date_sql=pushdown_date_sql),
+                date_params * 2 + chunk
+            ))
+        else:
+            tasks['tehai'].append((f"{TEHAI_MERGE_SELECT} WHERE {condition}", chunk))
+            # 照合は発注データの並びで先勝ちのため、発注番号順に固定する
+            tasks['hatchu'].append(
+                (f"{HATCHU_MERGE_SELECT} WHERE {condition}{date_sql} ORDER BY 発注番号", chunk + date_params)
+            )
+        if include_mihatchu:
+            tasks['mihatchu'].append(
+                (f"{MIHATCHU_MERGE_SELECT} WHERE {condition} AND {MIHATCHU_MERGE_FILTER}", chunk)
+            )
+    return tasks
+
+
+def _group_by_seiban(seibans, results):
+    """ビューごとの取得結果を製番ごとに振り分ける"""
+    sources = {s: {kind: [] for kind in results} for s in seibans}
+    for kind, records in results.items():
+        for rec in records:
+            bucket = sources.get(rec.get('製番') or '')
+            if bucket is not None:
+                bucket[kind].append(rec)
+    return sources
+
+
+def fetch_merge_sources(seibans, order_date_from=None, order_date_to=None, include_mihatchu=True,
+                        mode=None):
+    """
+    複数製番のマージ元データをまとめて取得
+
+    V_D手配リスト・V_D発注・V_D未発注は互いに独立なので、それぞれ別のプール接続で並行に読み込む
+    （所要時間は最も遅いビュー1本分）。複数製番はIN句でまとめて取得し、製番ごとに振り分ける。
+
+    Args:
+        seibans: 製番リスト
+        order_date_from: 発注日フィルタ開始日
+        order_date_to: 発注日フィルタ終了日
+        include_mihatchu: V_D未発注の社内加工品も取得するか
+        mode: マージ方式（Noneで MERGE_MODE）。'sql' では 'tehai'・'hatchu' の代わりに
+              DB側で照合済みの 'merged' を返す
+
+    Returns:
+        dict: {製番: {'tehai': [...], 'hatchu': [...], 'mihatchu': [...]}}
+    """
+    seibans = list(dict.fromkeys(s.strip() for s in seibans if s and s.strip()))
+    if not seibans:
+        return {}
+
+    tasks = _merge_source_tasks(seibans, order_date_from, order_date_to, include_mihatchu,
+                                mode or MERGE_MODE)
+    return _group_by_seiban(seibans, _fetch_concurrently(tasks))
+
+
+# マージテスト結果の列
+MERGE_TEST_COLUMNS = [
+    '品名', '仕様１', '仕様２', '手配区分', '材質',
+    '手配数', '単位', '発注番号', '仕入先略称', '納期',
+    '納入済数', 'match_type', '階層', '部品No', '員数', '必要数'
+]
+
+
+def iter_merge_test_by_seiban(seiban):
+    """
+    製番でV_D手配リストとV_D発注をマージテスト（結果行をストリーミング）
+
+    V_D発注・V_D発注残は索引用に先に読み切り、V_D手配リストは fetchmany で
+    読みながら照合して結果行を順に返す（統計は終端イベント）
+
+    Args:
+        seiban: 製番 (例: 'MHT0620')
+
+    Yields:
+        dict: ストリーミングイベント（終端に 'success'・'seiban'・'stats' を含む）
+    """
+    seiban = seiban.strip()
+
+    # V_D発注（発注データ）・V_D発注残（納入状況）を並行取得
+    # （接続を持ったまま他の接続を待たないよう、手配リストの読み出しはこの後に開始する）
+    tasks = _merge_source_tasks([seiban], mode='python')
+    tehai_sql, tehai_params = tasks['tehai'][0]
+    results = _fetch_concurrently({
+        'hatchu': tasks['hatchu'],
+        'remaining': [("""
+            SELECT 発注番号, 製番, 品名, 仕様１, 発注数, 納入済数, 納入済金額
+            FROM dbo.[V_D発注残]
+            WHERE 製番 = ?
+        """, [seiban])],
+    })
+
+    hatchu_list = _group_by_seiban([seiban], {'hatchu': results['hatchu']})[seiban]['hatchu']
+    # 発注残データを辞書化（発注番号→納入済数）
+    remaining_map = {}
+    for rec in results['remaining']:
+        remaining_map[rec.get('発注番号', '')] = rec
+
+    index = MergeUtils.index_records(hatchu_list)
+    totals = {'total': 0, 'primary': 0, 'fallback': 0}
+    units = {}
+
+    with closing(_iter_query(tehai_sql, tehai_params)) as tehai_events:
+        tehai_columns = next(tehai_events)['columns']
+        yield {'type': 'columns', 'columns': MERGE_TEST_COLUMNS}
+
+        for event in tehai_events:
+            if event['type'] != 'rows':
+                continue
+            tehai_records = [dict(zip(tehai_columns, row)) for row in event['rows']]
+
+            # 取込と共通のマッチ処理（発注データの索引は使い回す）
+            positions, match_types, match_stats = MergeUtils.match_records(
+                tehai_records, hatchu_list, index=index
+            )
+            for key in totals:
+                totals[key] += match_stats[key]
+
+            rows = []
+            for tehai_rec, pos, match_type in zip(tehai_records, positions, match_types):
+                # マージ結果の初期値
+                merged = dict(tehai_rec)
+                merged['発注番号'] = ''
+                merged['仕入先略称'] = ''
+                merged['仕入先CD'] = ''
+                merged['納期'] = ''
+                merged['納入済数'] = ''
+                merged['match_type'] = match_type
+
+                if pos >= 0:
+                    h = hatchu_list[pos]
+                    merged['発注番号'] = h.get('発注番号', '')
+                    merged['仕入先略称'] = h.get('仕入先略称', '')
+                    merged['仕入先CD'] = h.get('仕入先CD', '')
+                    merged['納期'] = h.get('納期', '')
+
+                # 納入済数を追加
+                order_num = merged.get('発注番号', '')
+                if order_num and order_num in remaining_map:
+                    merged['納入済数'] = remaining_map[order_num].get('納入済数', '')
+
+                # ユニット（材質）を記録
+                units.setdefault(str(merged.get('材質', '') or '').strip(), None)
+                rows.append([merged.get(c, '') for c in MERGE_TEST_COLUMNS])
+
+            yield {'type': 'rows', 'rows': rows}
+
+    matched = totals['primary'] + totals['fallback']
+    yield {
+        'type': 'end',
+        'count': totals['total'],
+        'success': True,
+        'seiban': seiban,
+        'stats': {
+            'tehai_count': totals['total'],
+            'hatchu_count': len(hatchu_list),
+            'match_count': matched,
+            'unmatch_count': totals['total'] - matched,
+            'primary_count': totals['primary'],
+            'fallback_count': totals['fallback'],
+            'match_rate': round(matched / totals['total'] * 100, 1) if totals['total'] else 0,
+            'unit_count': len(units),
+            'units': list(units.keys())
+        }
+    }
+
+
+def merge_test_by_seiban(seiban):
+    """
+    製番でV_D手配リストとV_D発注をマージテスト
+    取込（merge_from_db）と同じ MergeUtils のマッチ処理で結果をプレビュー
+
+    Args:
+        seiban: 製番 (例: 'MHT0620')
+
+    Returns:
+        dict: マージ結果と統計情報
+    """
+    try:
+        result = collect_stream(iter_merge_test_by_seiban(seiban))
+        return {
+            'success': True,
+            'seiban': result['seiban'],
+            'columns': result['columns'],
+            'rows': result['rows'],
+            'stats': result['stats']
+        }
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def _merged_row(tehai_rec, h, match_type):
+    """手配リスト1行と照合した発注（未マッチはNone）から save_to_database() 用の行を作成"""
+    # 基本カラム（手配リストから）
+    merged = {
+        '納期': '',
+        '回答納期': '',
+        '仕入先略称': '',
+        '仕入先CD': '',
+        '発注番号': '',
+        '手配数': tehai_rec.get('手配数', 0) or 0,
+        '単位': tehai_rec.get('単位', '') or '',
+        '品名': tehai_rec.get('品名', '') or '',
+        '仕様１': tehai_rec.get('仕様１', '') or '',
+        '仕様２': tehai_rec.get('仕様２', '') or '',
+        '品目CD': tehai_rec.get('品目CD', '') or '',
+        '手配区分CD': tehai_rec.get('手配区分CD', '') or '',
+        '手配区分': tehai_rec.get('手配区分', '') or '',
+        'メーカー': tehai_rec.get('メーカー', '') or '',
+        '備考': tehai_rec.get('備考', '') or '',
+        '員数': tehai_rec.get('員数', 0) or 0,
+        '必要数': tehai_rec.get('必要数', 0) or 0,
+        '製番': tehai_rec.get('製番', '') or '',
+        '材質': tehai_rec.get('材質', '') or '',
+        '部品No': tehai_rec.get('部品No', '') or '',
+        'ページNo': tehai_rec.get('ページNo', '') or '',
+        '行No': tehai_rec.get('行No', '') or '',
+        '階層': tehai_rec.get('階層', 0) or 0,
+        'match_type': match_type,
+    }
+
+    if h is not None:
+        merged['発注番号'] = str(h.get('発注番号', '') or '')
+        merged['仕入先略称'] = str(h.get('仕入先略称', '') or '')
+        merged['仕入先CD'] = str(h.get('仕入先CD', '') or '')
+        merged['納期'] = str(h.get('納期', '') or '')
+        merged['回答納期'] = str(h.get('回答納期', '') or '')
+
+    return merged
+
+
+def _merged_dataframe(merged_rows):
+    """マージ済みの行リストをDataFrame化（発注番号順に並べ、コード列を正規化）"""
+    # DataFrameに変換
+    df = pd.DataFrame(merged_rows)
+
+    # None値を空文字に
+    df = df.fillna('')
+
+    # 発注番号あり/なしでソート（ゼロパディングされた発注番号の順）
+    if '発注番号' in df.columns:
+        df_with = df[df['発注番号'] != '']
+        df_without = df[df['発注番号'] == '']
+        if not df_with.empty:
+            df_with = df_with.sort_values('発注番号')
+        df = pd.concat([df_with, df_without], ignore_index=True)
+
+    # 発注番号・手配区分CD・仕入先CDを正規化文字列に一括変換
+    return DataUtils.normalize_code_columns(df)
+
+
+def _merge_tehai_hatchu(seiban, tehai_records, hatchu_list):
+    """
+    取得済みのV_D手配リスト・V_D発注レコードをマージしてDataFrame化
+
+    Returns:
+        pandas.DataFrame or None: 手配リストが0件ならNone
+    """
+    if not tehai_records:
+        return None
+
+    # マージ実行 → DataFrame行リスト構築
+    positions, match_types, match_stats = MergeUtils.match_records(tehai_records, hatchu_list)
+    print(f"[merge_from_db] {seiban}: 材質+仕様１={match_stats['primary']}件, "
+          f"仕様１(+区分)={match_stats['fallback']}件, 未マッチ={match_stats['unmatched']}件")
+
+    merged_rows = [
+        _merged_row(tehai_rec, hatchu_list[pos] if pos >= 0 else None, match_type)
+        for tehai_rec, pos, match_type in zip(tehai_records, positions, match_types)
+    ]
+    return _merged_dataframe(merged_rows)
+
+
+# SQLマージの「一致」列 → match_type
+PUSHDOWN_MATCH_TYPES = {1: MergeUtils.MATCH_PRIMARY, 2: MergeUtils.MATCH_FALLBACK}
+
+
+def _merge_pushdown_rows(seiban, merged_records):
+    """
+    DB側で照合済みの行（mode='sql'）をDataFrame化（_merge_tehai_hatchu() と同じ形式）
+
+    Returns:
+        pandas.DataFrame or None: 手配リストが0件ならNone
+    """
+    if not merged_records:
+        return None
+
+    merged_rows = []
+    counts = {1: 0, 2: 0}
+    for rec in merged_records:
+        rank = rec.get('一致')
+        rank = int(rank) if rank not in (None, '') else None
+        if rank in counts:
+            counts[rank] += 1
+        merged_rows.append(_merged_row(
+            rec, rec if rank is not None else None, PUSHDOWN_MATCH_TYPES.get(rank, MergeUtils.MATCH_NONE)
+        ))
+    print(f"[merge_from_db:sql] {seiban}: 材質+仕様１={counts[1]}件, "
+          f"仕様１(+区分)={counts[2]}件, 未マッチ={len(merged_records) - counts[1] - counts[2]}件")
+    return _merged_dataframe(merged_rows)
+
+
+def _append_mihatchu(df, seiban, mihatchu_records):
+    """
+    マージ済みDataFrameにV_D未発注の社内加工品(MHT+11)を追加
+
+    Returns:
+        pandas.DataFrame or None
+    """
+    if not mihatchu_records:
+        return df
+
+    # 未発注データをDataFrame行に変換
+    mihatchu_merged = []
+    for rec in mihatchu_records:
+        merged = {
+            '納期': str(rec.get('納期', '') or ''),
+            '回答納期': '',
+            '仕入先略称': str(rec.get('仕入先略称', '') or ''),
+            '仕入先CD': str(rec.get('仕入先CD', '') or ''),
+            '発注番号': '',  # 未発注なので空
+            '手配数': rec.get('発注数', 0) or 0,
+            '単位': str(rec.get('単位', '') or ''),
+            '品名': str(rec.get('品名', '') or ''),
+            '仕様１': str(rec.get('仕様１', '') or ''),
+            '仕様２': str(rec.get('仕様２', '') or ''),
+            '品目CD': '',
+            '手配区分CD': str(rec.get('手配区分CD', '') or ''),
+            '手配区分': str(rec.get('手配区分', '') or ''),
+            'メーカー': str(rec.get('メーカー', '') or ''),
+            '備考': str(rec.get('備考', '') or ''),
+            '員数': 0,
+            '必要数': 0,
+            '製番': seiban,
+            '材質': str(rec.get('材質', '') or ''),
+            '部品No': '',
+            'ページNo': str(rec.get('ページNo', '') or ''),
+            '行No': str(rec.get('行No', '') or ''),
+            '階層': rec.get('階層', 0) or 0,
+        }
+        mihatchu_merged.append(merged)
+
+    df_mihatchu = DataUtils.normalize_code_columns(pd.DataFrame(mihatchu_merged).fillna(''))
+
+    # 既にマージ済みdfに含まれている仕様１は除外（重複防止）
+    if df is not None and not df.empty:
+        existing_specs = set(df['仕様１'].astype(str).str.strip())
+        df_mihatchu = df_mihatchu[~df_mihatchu['仕様１'].astype(str).str.strip().isin(existing_specs)]
+
+    if df_mihatchu.empty:
+        return df
+
+    if df is not None and not df.empty:
+        df = pd.concat([df, df_mihatchu], ignore_index=True)
+    else:
+        df = df_mihatchu
 
-def merge_test_by_seiban(seiban):
-    """
-    製番でV_D手配リストとV_D発注をマージテスト
-    現在のExcelマージ処理と同等のロジックをDB直接クエリで再現
+    return df
 
-    Args:
-        seiban: 製番 (例: 'MHT0620')
 
-    Returns:
-        dict: マージ結果と統計情報
+def merge_sources(seiban, source, include_mihatchu=True):
     """
-    seiban = seiban.strip()
-    conn = None
-    try:
-        conn, cursor = get_connection()
-
-        # 1. V_D手配リスト（BOM）を取得
-        cursor.execute("""
-            SELECT 製番, 担当者, ページNo, 行No, 部品No, 階層, 品目CD,
-                   品名, 仕様１, 仕様２, 手配区分CD, 手配区分, メーカー,
-                   材質, 員数, 必要数, 手配数, 単位, 備考, 日付
-            FROM dbo.[V_D手配リスト]
-            WHERE 製番 = ?
-        """, seiban)
-        tehai_cols = [col[0] for col in cursor.description]
-        tehai_rows = cursor.fetchall()
+    fetch_merge_sources() で取得済みの1製番分のデータをマージ（DB接続なし）
 
-        # 2. V_D発注（発注データ）を取得
-        cursor.execute("""
-            SELECT 発注番号, 製番, 品名, 仕様１, 仕様２, 手配区分CD, 手配区分,
-                   材質, 仕入先CD, 仕入先名, 仕入先略称, 発注数, 単位,
-                   発注単価, 発注金額, 発注日, 納期, 回答納期, 備考
-            FROM dbo.[V_D発注]
-            WHERE 製番 = ?
-        """, seiban)
-        hatchu_cols = [col[0] for col in cursor.description]
-        hatchu_rows = cursor.fetchall()
+    一括取込ではDB取得を1回にまとめ、製番ごとにこの関数でマージする
 
-        # 3. V_D発注残（納入状況）を取得
-        cursor.execute("""
-            SELECT 発注番号, 製番, 品名, 仕様１, 発注数, 納入済数, 納入済金額
-            FROM dbo.[V_D発注残]
-            WHERE 製番 = ?
-        """, seiban)
-        remaining_cols = [col[0] for col in cursor.description]
-        remaining_rows = cursor.fetchall()
-
-        # 発注データを辞書化（マージ用）
-        hatchu_list = []
-        for row in hatchu_rows:
-            rec = {}
-            for j, col in enumerate(hatchu_cols):
-                rec[col] = format_value(row[j])
-            hatchu_list.append(rec)
-
-        # 発注残データを辞書化（発注番号→納入済数）
-        remaining_map = {}
-        for row in remaining_rows:
-            rec = {}
-            for j, col in enumerate(remaining_cols):
-                rec[col] = format_value(row[j])
-            order_num = rec.get('発注番号', '')
-            remaining_map[order_num] = rec
-
-        # 4. マージ実行（現行ロジックと同等）
-        merged_results = []
-        match_count = 0
-        unmatch_count = 0
-
-        for row in tehai_rows:
-            tehai_rec = {}
-            for j, col in enumerate(tehai_cols):
-                tehai_rec[col] = format_value(row[j])
-
-            # マージ結果の初期値
-            merged = dict(tehai_rec)
-            merged['発注番号'] = ''
-            merged['仕入先略称'] = ''
-            merged['仕入先CD'] = ''
-            merged['納期'] = ''
-            merged['納入済数'] = ''
-            merged['match_type'] = ''
-
-            material = str(tehai_rec.get('材質', '') or '').strip()
-            spec1 = str(tehai_rec.get('仕様１', '') or '').strip()
-            order_type = str(tehai_rec.get('手配区分', '') or '').strip()
-
-            matched = False
-
-            # Primary match: 材質 + 仕様１ + 製番
-            if material and spec1:
-                for h in hatchu_list:
-                    h_material = str(h.get('材質', '') or '').strip()
-                    h_spec1 = str(h.get('仕様１', '') or '').strip()
-                    h_seiban = str(h.get('製番', '') or '').strip()
-                    if h_material == material and h_spec1 == spec1 and h_seiban == seiban:
-                        merged['発注番号'] = h.get('発注番号', '')
-                        merged['仕入先略称'] = h.get('仕入先略称', '')
-                        merged['仕入先CD'] = h.get('仕入先CD', '')
-                        merged['納期'] = h.get('納期', '')
-                        merged['match_type'] = '材質+仕様１'
-                        matched = True
-                        break
-
-            # Fallback match: 製番 + 仕様１ (+手配区分)
-            if not matched and spec1:
-                for h in hatchu_list:
-                    h_spec1 = str(h.get('仕様１', '') or '').strip()
-                    h_seiban = str(h.get('製番', '') or '').strip()
-                    h_type = str(h.get('手配区分', '') or '').strip()
-                    if h_seiban == seiban and h_spec1 == spec1:
-                        if order_type and h_type and order_type != h_type:
-                            continue
-                        merged['発注番号'] = h.get('発注番号', '')
-                        merged['仕入先略称'] = h.get('仕入先略称', '')
-                        merged['仕入先CD'] = h.get('仕入先CD', '')
-                        merged['納期'] = h.get('納期', '')
-                        merged['match_type'] = '仕様１(+区分)'
-                        matched = True
-                        break
-
-            # 納入済数を追加
-            order_num = merged.get('発注番号', '')
-            if order_num and order_num in remaining_map:
-                rem = remaining_map[order_num]
-                merged['納入済数'] = rem.get('納入済数', '')
-
-            if matched:
-                match_count += 1
-            else:
-                unmatch_count += 1
-
-            merged_results.append(merged)
-
-        # 5. ユニット（材質）別にグループ化
-        units = {}
-        for m in merged_results:
-            unit = str(m.get('材質', '') or '').strip()
-            if unit not in units:
-                units[unit] = []
-            units[unit].append(m)
-
-        # 結果カラム
-        result_columns = [
-            '品名', '仕様１', '仕様２', '手配区分', '材質',
-            '手配数', '単位', '発注番号', '仕入先略称', '納期',
-            '納入済数', 'match_type', '階層', '部品No', '員数', '必要数'
-        ]
-
-        # ユニット別にフラット化
-        result_rows = []
-        for m in merged_results:
-            result_rows.append([m.get(c, '') for c in result_columns])
+    Args:
+        seiban: 製番
+        source: fetch_merge_sources() の戻り値の1製番分
+        include_mihatchu: V_D未発注の社内加工品を統合するか
 
-        return {
-            'success': True,
-            'seiban': seiban,
-            'columns': result_columns,
-            'rows': result_rows,
-            'stats': {
-                'tehai_count': len(tehai_rows),
-                'hatchu_count': len(hatchu_rows),
-                'match_count': match_count,
-                'unmatch_count': unmatch_count,
-                'match_rate': round(match_count / len(tehai_rows) * 100, 1) if tehai_rows else 0,
-                'unit_count': len(units),
-                'units': list(units.keys())
-            }
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-    finally:
-        if conn:
-            conn.close()
+    Returns:
+        pandas.DataFrame or None: save_to_database()に渡せる形式のDataFrame
+    """
+    if 'merged' in source:
+        df = _merge_pushdown_rows(seiban, source['merged'])
+    else:
+        df = _merge_tehai_hatchu(seiban, source.get('tehai', []), source.get('hatchu', []))
+    if include_mihatchu:
+        df = _append_mihatchu(df, seiban, source.get('mihatchu', []))
+    return df
 
 
-def merge_from_db(seiban, order_date_from=None, order_date_to=None):
+def merge_from_db(seiban, order_date_from=None, order_date_to=None, mode=None):
     """
     製番でV_D手配リストとV_D発注をマージし、save_to_database()互換のDataFrameを返す
     Excel経由の process_excel_file_from_dataframes() を完全に置き換える
@@ -346,158 +1771,15 @@ def merge_from_db(seiban, order_date_from=None, order_date_to=None):
         seiban: 製番 (例: 'MHT0620')
         order_date_from: 発注日フィルタ開始日 (例: '2026-01-01')
         order_date_to: 発注日フィルタ終了日 (例: '2026-12-31')
+        mode: マージ方式 'python' / 'sql'（Noneで MERGE_MODE）
 
     Returns:
         pandas.DataFrame: save_to_database()に渡せる形式のDataFrame
     """
     seiban = seiban.strip()
-    conn = None
-    try:
-        conn, cursor = get_connection()
-
-        # 1. V_D手配リスト（BOM）を取得
-        cursor.execute("""
-            SELECT 製番, 担当者, ページNo, 行No, 部品No, 階層, 品目CD,
-                   品名, 仕様１, 仕様２, 手配区分CD, 手配区分, メーカー,
-                   材質, 員数, 必要数, 手配数, 単位, 備考, 日付
-            FROM dbo.[V_D手配リスト]
-            WHERE 製番 = ?
-        """, seiban)
-        tehai_cols = [col[0] for col in cursor.description]
-        tehai_rows = cursor.fetchall()
-
-        if not tehai_rows:
-            return None
-
-        # 2. V_D発注（発注データ）を取得 - 回答納期を含む
-        hatchu_sql = """
-            SELECT 発注番号, 製番, 品名, 仕様１, 仕様２, 手配区分CD, 手配区分,
-                   材質, 仕入先CD, 仕入先名, 仕入先略称, 発注数, 単位,
-                   発注単価, 発注金額, 発注日, 納期, 回答納期, 備考
-            FROM dbo.[V_D発注]
-            WHERE 製番 = ?
-        """
-        hatchu_params = [seiban]
-
-        # 発注日フィルタ
-        if order_date_from:
-            hatchu_sql += " AND 発注日 >= ?"
-            hatchu_params.append(order_date_from)
-        if order_date_to:
-            hatchu_sql += " AND 発注日 <= ?"
-            hatchu_params.append(order_date_to)
-
-        cursor.execute(hatchu_sql, hatchu_params)
-        hatchu_cols = [col[0] for col in cursor.description]
-        hatchu_rows = cursor.fetchall()
-
-        # 発注データを辞書リスト化
-        hatchu_list = []
-        for row in hatchu_rows:
-            rec = {}
-            for j, col in enumerate(hatchu_cols):
-                rec[col] = format_value(row[j])
-            hatchu_list.append(rec)
-
-        # 3. マージ実行 → DataFrame行リスト構築
-        merged_rows = []
-
-        for row in tehai_rows:
-            tehai_rec = {}
-            for j, col in enumerate(tehai_cols):
-                tehai_rec[col] = format_value(row[j])
-
-            # 基本カラム（手配リストから）
-            merged = {
-                '納期': '',
-                '回答納期': '',
-                '仕入先略称': '',
-                '仕入先CD': '',
-                '発注番号': '',
-                '手配数': tehai_rec.get('手配数', 0) or 0,
-                '単位': tehai_rec.get('単位', '') or '',
-                '品名': tehai_rec.get('品名', '') or '',
-                '仕様１': tehai_rec.get('仕様１', '') or '',
-                '仕様２': tehai_rec.get('仕様２', '') or '',
-                '品目CD': tehai_rec.get('品目CD', '') or '',
-                '手配区分CD': tehai_rec.get('手配区分CD', '') or '',
-                '手配区分': tehai_rec.get('手配区分', '') or '',
-                'メーカー': tehai_rec.get('メーカー', '') or '',
-                '備考': tehai_rec.get('備考', '') or '',
-                '員数': tehai_rec.get('員数', 0) or 0,
-                '必要数': tehai_rec.get('必要数', 0) or 0,
-                '製番': tehai_rec.get('製番', '') or '',
-                '材質': tehai_rec.get('材質', '') or '',
-                '部品No': tehai_rec.get('部品No', '') or '',
-                'ページNo': tehai_rec.get('ページNo', '') or '',
-                '行No': tehai_rec.get('行No', '') or '',
-                '階層': tehai_rec.get('階層', 0) or 0,
-            }
-
-            material = str(merged['材質']).strip()
-            spec1 = str(merged['仕様１']).strip()
-            order_type = str(merged['手配区分']).strip()
-
-            matched = False
-
-            # Primary match: 材質 + 仕様１ + 製番
-            if material and spec1:
-                for h in hatchu_list:
-                    h_material = str(h.get('材質', '') or '').strip()
-                    h_spec1 = str(h.get('仕様１', '') or '').strip()
-                    h_seiban = str(h.get('製番', '') or '').strip()
-                    if h_material == material and h_spec1 == spec1 and h_seiban == seiban:
-                        merged['発注番号'] = str(h.get('発注番号', '') or '')
-                        merged['仕入先略称'] = str(h.get('仕入先略称', '') or '')
-                        merged['仕入先CD'] = str(h.get('仕入先CD', '') or '')
-                        merged['納期'] = str(h.get('納期', '') or '')
-                        merged['回答納期'] = str(h.get('回答納期', '') or '')
-                        matched = True
-                        break
-
-            # Fallback match: 製番 + 仕様１ (+手配区分)
-            if not matched and spec1:
-                for h in hatchu_list:
-                    h_spec1 = str(h.get('仕様１', '') or '').strip()
-                    h_seiban = str(h.get('製番', '') or '').strip()
-                    h_type = str(h.get('手配区分', '') or '').strip()
-                    if h_seiban == seiban and h_spec1 == spec1:
-                        if order_type and h_type and order_type != h_type:
-                            continue
-                        merged['発注番号'] = str(h.get('発注番号', '') or '')
-                        merged['仕入先略称'] = str(h.get('仕入先略称', '') or '')
-                        merged['仕入先CD'] = str(h.get('仕入先CD', '') or '')
-                        merged['納期'] = str(h.get('納期', '') or '')
-                        merged['回答納期'] = str(h.get('回答納期', '') or '')
-                        matched = True
-                        break
-
-            merged_rows.append(merged)
-
-        # DataFrameに変換
-        df = pd.DataFrame(merged_rows)
-
-        # None値を空文字に
-        df = df.fillna('')
-
-        # 手配区分CDを文字列に正規化
-        df['手配区分CD'] = df['手配区分CD'].apply(
-            lambda x: str(int(float(x))) if x and x != '' else str(x)
-        )
-
-        # 発注番号あり/なしでソート
-        if '発注番号' in df.columns:
-            df_with = df[df['発注番号'] != '']
-            df_without = df[df['発注番号'] == '']
-            if not df_with.empty:
-                df_with = df_with.sort_values('発注番号')
-            df = pd.concat([df_with, df_without], ignore_index=True)
-
-        return df
-
-    finally:
-        if conn:
-            conn.close()
+    sources = fetch_merge_sources([seiban], order_date_from, order_date_to, include_mihatchu=False,
+                                  mode=mode)
+    return merge_sources(seiban, sources.get(seiban, {}), include_mihatchu=False)
 
 
 def search_mihatchu(seiban, supplier_cd=None, order_type_cd=None):
@@ -520,127 +1802,83 @@ def search_mihatchu(seiban, supplier_cd=None, order_type_cd=None):
     return query_view('V_D未発注', ' AND '.join(where_parts), params, 500)
 
 
-def merge_from_db_with_mihatchu(seiban, order_date_from=None, order_date_to=None):
+def merge_from_db_with_mihatchu(seiban, order_date_from=None, order_date_to=None, mode=None):
     """
     merge_from_db + V_D未発注の社内加工品(MHT+11)を統合
     """
-    # 通常マージ
-    df = merge_from_db(seiban, order_date_from, order_date_to)
+    seiban = seiban.strip()
+    sources = fetch_merge_sources([seiban], order_date_from, order_date_to, include_mihatchu=True,
+                                  mode=mode)
+    return merge_sources(seiban, sources.get(seiban, {}), include_mihatchu=True)
+
+
+# 製番別件数の集計元（キー: (ビュー名, 追加条件)）
+SEIBAN_COUNT_SOURCES = {
+    'tehai_count': ('V_D手配リスト', None),
+    'hatchu_count': ('V_D発注', None),
+    'mihatchu_count': ('V_D未発注', "仕入先CD = 'MHT' AND 手配区分CD = '11'"),
+    'mihatchu_all_count': ('V_D未発注', None),
+    'hacchuzan_count': ('V_D発注残', None),
+}
 
-    # V_D未発注から社内加工品を取得
-    conn = None
-    try:
-        conn, cursor = get_connection()
-        cursor.execute("""
-            SELECT 製番, 品名, 仕様１, 仕様２, 手配区分CD, 手配区分, メーカー,
-                   材質, 仕入先CD, 仕入先略称, 発注数, 単位, 納期, 備考,
-                   ページNo, 行No, 階層
-            FROM dbo.[V_D未発注]
-            WHERE 製番 = ? AND 仕入先CD = 'MHT' AND 手配区分CD = '11'
-        """, seiban.strip())
-        mihatchu_cols = [col[0] for col in cursor.description]
-        mihatchu_rows = cursor.fetchall()
-
-        if not mihatchu_rows:
-            return df
-
-        # 未発注データをDataFrame行に変換
-        mihatchu_merged = []
-        for row in mihatchu_rows:
-            rec = {}
-            for j, col in enumerate(mihatchu_cols):
-                rec[col] = format_value(row[j])
-
-            merged = {
-                '納期': str(rec.get('納期', '') or ''),
-                '回答納期': '',
-                '仕入先略称': str(rec.get('仕入先略称', '') or ''),
-                '仕入先CD': str(rec.get('仕入先CD', '') or ''),
-                '発注番号': '',  # 未発注なので空
-                '手配数': rec.get('発注数', 0) or 0,
-                '単位': str(rec.get('単位', '') or ''),
-                '品名': str(rec.get('品名', '') or ''),
-                '仕様１': str(rec.get('仕様１', '') or ''),
-                '仕様２': str(rec.get('仕様２', '') or ''),
-                '品目CD': '',
-                '手配区分CD': str(rec.get('手配区分CD', '') or ''),
-                '手配区分': str(rec.get('手配区分', '') or ''),
-                'メーカー': str(rec.get('メーカー', '') or ''),
-                '備考': str(rec.get('備考', '') or ''),
-                '員数': 0,
-                '必要数': 0,
-                '製番': seiban.strip(),
-                '材質': str(rec.get('材質', '') or ''),
-                '部品No': '',
-                'ページNo': str(rec.get('ページNo', '') or ''),
-                '行No': str(rec.get('行No', '') or ''),
-                '階層': rec.get('階層', 0) or 0,
-            }
-            mihatchu_merged.append(merged)
-
-        if not mihatchu_merged:
-            return df
-
-        df_mihatchu = pd.DataFrame(mihatchu_merged).fillna('')
-
-        # 既にマージ済みdfに含まれている仕様１は除外（重複防止）
-        if df is not None and not df.empty:
-            existing_specs = set(df['仕様１'].astype(str).str.strip())
-            df_mihatchu = df_mihatchu[~df_mihatchu['仕様１'].astype(str).str.strip().isin(existing_specs)]
-
-        if df_mihatchu.empty:
-            return df
-
-        if df is not None and not df.empty:
-            df = pd.concat([df, df_mihatchu], ignore_index=True)
-        else:
-            df = df_mihatchu
 
-        return df
+def _count_views_by_seiban(cursor, seibans, keys):
+    """
+    複数ビューの製番別件数を UNION ALL の1文でまとめて集計
 
-    finally:
-        if conn:
-            conn.close()
+    IN句のパラメータはビュー数ぶん繰り返すため、SQL Serverのパラメータ上限（2100）を
+    超えないようチャンクを分ける。
 
+    Args:
+        cursor: カーソル
+        seibans: 製番リスト（前後空白除去済み）
+        keys: SEIBAN_COUNT_SOURCES のキーのリスト
 
-def check_db_updates(seibans):
+    Returns:
+        dict: {製番: {キー: 件数}}（該当なしは0）
+    """
+    counts = {s: {key: 0 for key in keys} for s in seibans}
+    chunk_size = max(1, IN_CHUNK_SIZE // len(keys))
+    for chunk in _chunked(seibans, chunk_size):
+        condition = _seiban_condition(chunk)
+        selects = []
+        params = []
+        for key in keys:
+            view, extra = SEIBAN_COUNT_SOURCES[key]
+            where = f"{condition} AND {extra}" if extra else condition
+            selects.append(
+                f"SELECT '{key}' AS 集計, 製番, COUNT(*) AS 件数 "
+                f"FROM dbo.[{view}] WHERE {where} GROUP BY 製番"
+            )
+            params.extend(chunk)
+        cursor.execute(' UNION ALL '.join(selects), params)
+        for key, seiban, cnt in cursor.fetchall():
+            seiban = (seiban or '').strip()
+            if seiban in counts:
+                counts[seiban][key] = cnt
+    return counts
+
+
+def check_seiban_counts(seibans):
     """
-    指定製番リストについてDBの最新件数と更新状況をチェック
+    指定製番リストについてDBの最新件数をチェック（全製番・全ビューを1往復で集計）
 
     Args:
         seibans: 製番リスト
 
     Returns:
-        dict: { seiban: { tehai_count, hatchu_count, mihatchu_count, has_new } }
+        dict: { seiban: { tehai_count, hatchu_count, mihatchu_count } }
     """
+    seibans = list(dict.fromkeys(s.strip() for s in seibans if s and s.strip()))
+    if not seibans:
+        return {'success': True, 'results': {}}
+
     conn = None
     try:
         conn, cursor = get_connection()
-        results = {}
-
-        for seiban in seibans:
-            s = seiban.strip()
-            # 手配リスト件数
-            cursor.execute("SELECT COUNT(*) FROM dbo.[V_D手配リスト] WHERE 製番 = ?", s)
-            tehai_count = cursor.fetchone()[0]
-
-            # 発注データ件数
-            cursor.execute("SELECT COUNT(*) FROM dbo.[V_D発注] WHERE 製番 = ?", s)
-            hatchu_count = cursor.fetchone()[0]
-
-            # 未発注件数（社内加工品）
-            cursor.execute("""
-                SELECT COUNT(*) FROM dbo.[V_D未発注]
-                WHERE 製番 = ? AND 仕入先CD = 'MHT' AND 手配区分CD = '11'
-            """, s)
-            mihatchu_count = cursor.fetchone()[0]
-
-            results[s] = {
-                'tehai_count': tehai_count,
-                'hatchu_count': hatchu_count,
-                'mihatchu_count': mihatchu_count,
-            }
-
+        results = _count_views_by_seiban(
+            cursor, seibans, ['tehai_count', 'hatchu_count', 'mihatchu_count']
+        )
         return {'success': True, 'results': results}
     except Exception as e:
         return {'success': False, 'error': str(e)}
@@ -649,6 +1887,38 @@ def check_db_updates(seibans):
             conn.close()
 
 
+def iter_zaiko_buhin(seibans=None):
+    """
+    在庫部品（手配区分CD='15'）をストリーミング取得（製番・品名順）
+
+    Args:
+        seibans: 製番リスト（指定時はその製番のみ、None時は全製番）
+
+    Yields:
+        dict: ストリーミングイベント（終端に 'success'・'seiban_count' を含む）
+    """
+    sql = """
+        SELECT 製番, 手配数, 品名, 仕様１, 仕様２, 手配区分, 備考, 材質, 日付
+        FROM dbo.[V_D手配リスト]
+        WHERE 手配区分CD = '15'
+    """
+    params = []
+    if seibans and len(seibans) > 0:
+        placeholders = ','.join(['?' for _ in seibans])
+        sql += f" AND 製番 IN ({placeholders})"
+        params = list(seibans)
+    sql += " ORDER BY 製番, 品名"
+
+    seen = set()
+    with closing(_iter_query(sql, params)) as events:
+        for event in events:
+            if event['type'] == 'rows':
+                seen.update(row[0] or '' for row in event['rows'])
+            elif event['type'] == 'end':
+                event = dict(event, success=True, seiban_count=len(seen))
+            yield event
+
+
 def search_zaiko_buhin(seibans=None):
     """
     在庫部品（手配区分CD='15'）を検索
@@ -660,52 +1930,16 @@ def search_zaiko_buhin(seibans=None):
     Returns:
         dict: { columns, rows, count, by_seiban }
     """
-    conn = None
     try:
-        conn, cursor = get_connection()
-
-        if seibans and len(seibans) > 0:
-            placeholders = ','.join(['?' for _ in seibans])
-            cursor.execute(f"""
-                SELECT 製番, 手配数, 品名, 仕様１, 仕様２, 手配区分, 備考, 材質, 日付
-                FROM dbo.[V_D手配リスト]
-                WHERE 手配区分CD = '15' AND 製番 IN ({placeholders})
-                ORDER BY 製番, 品名
-            """, seibans)
-        else:
-            cursor.execute("""
-                SELECT 製番, 手配数, 品名, 仕様１, 仕様２, 手配区分, 備考, 材質, 日付
-                FROM dbo.[V_D手配リスト]
-                WHERE 手配区分CD = '15'
-                ORDER BY 製番, 品名
-            """)
-
-        columns = [col[0] for col in cursor.description]
-        raw_rows = cursor.fetchall()
-
-        rows = []
-        by_seiban = {}
-        for row in raw_rows:
-            formatted = [format_value(v) for v in row]
-            rows.append(formatted)
-            seiban = formatted[0] or ''
-            if seiban not in by_seiban:
-                by_seiban[seiban] = []
-            by_seiban[seiban].append(formatted)
-
-        return {
-            'success': True,
-            'columns': columns,
-            'rows': rows,
-            'count': len(rows),
-            'by_seiban': by_seiban,
-            'seiban_count': len(by_seiban)
-        }
+        result = collect_stream(iter_zaiko_buhin(seibans))
     except Exception as e:
         return {'success': False, 'error': str(e)}
-    finally:
-        if conn:
-            conn.close()
+
+    by_seiban = {}
+    for row in result['rows']:
+        by_seiban.setdefault(row[0] or '', []).append(row)
+    result['by_seiban'] = by_seiban
+    return result
 
 
 def search_0zaiko_tehai():
@@ -728,11 +1962,7 @@ def search_0zaiko_tehai():
         """)
 
         columns = [col[0] for col in cursor.description]
-        raw_rows = cursor.fetchall()
-
-        rows = []
-        for row in raw_rows:
-            rows.append([format_value(v) for v in row])
+        rows = format_rows(cursor.description, cursor.fetchall())
 
         return {
             'success': True,
@@ -748,11 +1978,13 @@ def search_0zaiko_tehai():
 
 
 def test_connection():
-    """接続テスト"""
+    """接続テスト（ミラー設定に関係なく Across DB に接続）"""
     conn = None
     try:
-        conn, cursor = get_connection()
+        conn, cursor = get_live_connection()
         cursor.execute("SELECT 1")
+        if _backend == 'standin':
+            return {'success': True, 'message': f'スタンドイン接続OK ({STANDIN_PATH})'}
         return {'success': True, 'message': 'Across DB接続OK'}
     except Exception as e:
         return {'success': False, 'message': str(e)}
@@ -765,86 +1997,274 @@ def test_connection():
 # DB更新検知機能
 # ========================================
 
-# 前回のスナップショット保存用
-_db_snapshot = {
-    'tehai': {'count': 0, 'seibans': set()},
-    'hacchu': {'count': 0, 'latest_numbers': set()},
-    'shiire': {'count': 0, 'latest_keys': set()},  # 仕入（検収）追加
-    'last_check': None
-}
+# 更新検知のウォーターマーク保存先（再起動してもベースラインを維持する）
+WATERMARK_FILE = Path('cache') / 'across_watermarks.json'
+
+# 前回チェック時点のウォーターマーク（None: 未読込）
+_watermarks = None
+_watermark_lock = threading.Lock()
+
+
+def _dump_mark(value):
+    """ウォーターマーク値をJSON保存用に変換（日付型は型情報付きISO文字列）"""
+    if isinstance(value, datetime):
+        return {'datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'date': value.isoformat()}
+    return value
+
+
+def _load_mark(value):
+    """_dump_mark() の逆変換（クエリパラメータとして使える型に戻す）"""
+    if isinstance(value, dict):
+        if 'datetime' in value:
+            return datetime.fromisoformat(value['datetime'])
+        if 'date' in value:
+            return date.fromisoformat(value['date'])
+    return value
+
+
+def _load_watermarks():
+    """保存済みウォーターマークを読み込む（なければNone）"""
+    global _watermarks
+    if _watermarks is None and WATERMARK_FILE.exists():
+        try:
+            with open(WATERMARK_FILE, 'r', encoding='utf-8') as f:
+                _watermarks = json.load(f)
+        except Exception as e:
+            print(f"[across_db] ウォーターマーク読込エラー（ベースラインを再作成）: {e}")
+    return _watermarks
+
+
+def _save_watermarks(watermarks):
+    """ウォーターマークを保存（一時ファイル経由で置き換え）"""
+    global _watermarks
+    _watermarks = watermarks
+    try:
+        WATERMARK_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = WATERMARK_FILE.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(watermarks, f, ensure_ascii=False)
+        os.replace(tmp_path, WATERMARK_FILE)
+    except Exception as e:
+        print(f"[across_db] ウォーターマーク保存エラー: {e}")
 
 
-def get_db_status():
+def _count_by_seiban(cursor, seibans):
+    """指定製番の手配リスト件数（IN句チャンク単位で集計）"""
+    counts = {s: 0 for s in seibans}
+    for chunk in _chunked(seibans):
+        placeholders = ','.join(['?' for _ in chunk])
+        cursor.execute(f"""
+            SELECT 製番, COUNT(*) FROM dbo.[V_D手配リスト]
+            WHERE 製番 IN ({placeholders})
+            GROUP BY 製番
+        """, chunk)
+        for seiban, cnt in cursor.fetchall():
+            counts[(seiban or '').strip()] = cnt
+    return counts
+
+
+def _receipt_keys_on(cursor, delivery_date):
+    """指定納入日の仕入キー（発注番号|納入日）ごとの件数"""
+    if delivery_date is None:
+        return {}
+    cursor.execute("SELECT 発注番号, 納入日 FROM dbo.[V_D仕入] WHERE 納入日 = ?", delivery_date)
+    keys = {}
+    for order_num, date_val in cursor.fetchall():
+        key = f"{str(order_num).strip() if order_num else ''}|{date_val}"
+        keys[key] = keys.get(key, 0) + 1
+    return keys
+
+
+def _build_baseline(cursor):
     """
-    DBの現在の状態を取得（更新検知用）
+    ウォーターマークの初回作成（全件集計はここだけ）
 
     Returns:
-        dict: {
-            'tehai': {'count': int, 'seibans': set, 'new_seibans': list},
-            'hacchu': {'count': int, 'new_count': int},
-            'timestamp': datetime
-        }
+        dict: ウォーターマーク
     """
-    conn = None
-    try:
-        conn, cursor = get_connection()
+    cursor.execute("SELECT 製番, COUNT(*) FROM dbo.[V_D手配リスト] GROUP BY 製番")
+    seiban_counts = {(row[0] or '').strip(): row[1] for row in cursor.fetchall()}
+
+    cursor.execute("SELECT MAX(日付) FROM dbo.[V_D手配リスト]")
+    tehai_max_date = cursor.fetchone()[0]
+
+    cursor.execute("SELECT COUNT(*), MAX(発注番号) FROM dbo.[V_D発注]")
+    hacchu_count, hacchu_max = cursor.fetchone()
+
+    cursor.execute("SELECT COUNT(*), MAX(納入日) FROM dbo.[V_D仕入]")
+    shiire_count, shiire_max_date = cursor.fetchone()
+
+    return {
+        'tehai': {
+            'seiban_counts': seiban_counts,
+            'max_date': _dump_mark(tehai_max_date)
+        },
+        'hacchu': {
+            'count': hacchu_count,
+            'max_number': str(hacchu_max).strip() if hacchu_max else None
+        },
+        'shiire': {
+            'count': shiire_count,
+            'max_date': _dump_mark(shiire_max_date),
+            'boundary_keys': _receipt_keys_on(cursor, shiire_max_date)
+        },
+        'last_check': datetime.now().isoformat()
+    }
 
-        # 手配リストの製番一覧と件数を取得
+
+def _scan_increment(cursor, prev):
+    """
+    前回ウォーターマーク以降の差分だけを取得（インデックス範囲クエリのみ）
+
+    - 発注: 発注番号 > 前回最大発注番号
+    - 仕入: 納入日 >= 前回最新納入日（同日分は キーごとの件数で新規分を判定）
+    - 手配: 日付 >= 前回最新日付 の製番と、新規発注の製番だけ件数を再集計
+
+    Returns:
+        tuple: (新しいウォーターマーク, 変更内容dict)
+    """
+    # 発注
+    hacchu_max = prev['hacchu'].get('max_number')
+    if hacchu_max:
+        cursor.execute("SELECT 発注番号, 製番 FROM dbo.[V_D発注] WHERE 発注番号 > ? ORDER BY 発注番号",
+                       hacchu_max)
+    else:
+        cursor.execute("SELECT 発注番号, 製番 FROM dbo.[V_D発注] ORDER BY 発注番号")
+    hacchu_rows = cursor.fetchall()
+    new_orders = [str(row[0]).strip() for row in hacchu_rows if row[0]]
+    order_seibans = {(row[1] or '').strip() for row in hacchu_rows if row[1]}
+
+    # 仕入（検収）
+    shiire_max_date = _load_mark(prev['shiire'].get('max_date'))
+    if shiire_max_date is not None:
+        cursor.execute("SELECT 発注番号, 納入日 FROM dbo.[V_D仕入] WHERE 納入日 >= ?", shiire_max_date)
+    else:
+        cursor.execute("SELECT 発注番号, 納入日 FROM dbo.[V_D仕入] WHERE 納入日 IS NOT NULL")
+    current_keys = {}
+    latest_date = shiire_max_date
+    for order_num, date_val in cursor.fetchall():
+        key = f"{str(order_num).strip() if order_num else ''}|{date_val}"
+        current_keys[key] = current_keys.get(key, 0) + 1
+        if date_val is not None and (latest_date is None or date_val > latest_date):
+            latest_date = date_val
+
+    prev_boundary = prev['shiire'].get('boundary_keys', {})
+    new_kenshu_keys = []
+    new_receipt_rows = 0
+    for key, cnt in current_keys.items():
+        added = cnt - prev_boundary.get(key, 0)
+        if added > 0:
+            new_kenshu_keys.append(key)
+            new_receipt_rows += added
+
+    latest_date_str = str(latest_date)
+    boundary_keys = {k: c for k, c in current_keys.items() if k.endswith(f"|{latest_date_str}")}
+
+    # 手配リスト（変更のあった製番だけ件数を再集計）
+    tehai_max_date = _load_mark(prev['tehai'].get('max_date'))
+    touched = set(order_seibans)
+    new_tehai_max = tehai_max_date
+    if tehai_max_date is not None:
         cursor.execute("""
-            SELECT 製番, COUNT(*) as cnt
-            FROM dbo.[V_D手配リスト]
+            SELECT 製番, MAX(日付) FROM dbo.[V_D手配リスト]
+            WHERE 日付 >= ?
             GROUP BY 製番
-        """)
-        tehai_rows = cursor.fetchall()
-        tehai_seibans = {row[0].strip() if row[0] else '' for row in tehai_rows}
-        tehai_count = sum(row[1] for row in tehai_rows)
+        """, tehai_max_date)
+        for seiban, max_date in cursor.fetchall():
+            touched.add((seiban or '').strip())
+            if max_date is not None and (new_tehai_max is None or max_date > new_tehai_max):
+                new_tehai_max = max_date
+    touched.discard('')
+
+    prev_counts = prev['tehai'].get('seiban_counts', {})
+    seiban_counts = dict(prev_counts)
+    refreshed = _count_by_seiban(cursor, sorted(touched)) if touched else {}
+    new_seibans = []
+    tehai_count_diff = 0
+    for seiban, cnt in refreshed.items():
+        if cnt == 0:
+            if seiban in seiban_counts:
+                tehai_count_diff -= seiban_counts.pop(seiban)
+            continue
+        if seiban not in prev_counts:
+            new_seibans.append(seiban)
+        tehai_count_diff += cnt - prev_counts.get(seiban, 0)
+        seiban_counts[seiban] = cnt
+
+    watermarks = {
+        'tehai': {
+            'seiban_counts': seiban_counts,
+            'max_date': _dump_mark(new_tehai_max)
+        },
+        'hacchu': {
+            'count': prev['hacchu'].get('count', 0) + len(hacchu_rows),
+            'max_number': new_orders[-1] if new_orders else hacchu_max
+        },
+        'shiire': {
+            'count': prev['shiire'].get('count', 0) + new_receipt_rows,
+            'max_date': _dump_mark(latest_date),
+            'boundary_keys': boundary_keys
+        },
+        'last_check': datetime.now().isoformat()
+    }
+    changes = {
+        'new_seibans': new_seibans,
+        'tehai_count_diff': tehai_count_diff,
+        'new_orders': new_orders,
+        'hacchu_count_diff': len(hacchu_rows),
+        'new_kenshu_keys': new_kenshu_keys,
+        'shiire_count_diff': new_receipt_rows
+    }
+    return watermarks, changes
 
-        # 発注リストの件数を取得
-        cursor.execute("SELECT COUNT(*) FROM dbo.[V_D発注]")
-        hacchu_count = cursor.fetchone()[0]
 
-        # 最新の発注番号（直近100件）を取得
-        cursor.execute("""
-            SELECT TOP 100 発注番号
-            FROM dbo.[V_D発注]
-            ORDER BY 発注番号 DESC
-        """)
-        hacchu_rows = cursor.fetchall()
-        latest_hacchu = {str(row[0]).strip() if row[0] else '' for row in hacchu_rows}
+def _snapshot_summary(watermarks):
+    """ウォーターマークから件数サマリーを作成"""
+    seiban_counts = watermarks['tehai']['seiban_counts']
+    return {
+        'tehai_count': sum(seiban_counts.values()),
+        'tehai_seiban_count': len(seiban_counts),
+        'hacchu_count': watermarks['hacchu']['count'],
+        'shiire_count': watermarks['shiire']['count'],
+        'timestamp': watermarks['last_check']
+    }
 
-        # 仕入（検収）の件数を取得
-        cursor.execute("SELECT COUNT(*) FROM dbo.[V_D仕入]")
-        shiire_count = cursor.fetchone()[0]
 
-        # 最新の仕入データ（直近100件）- 発注番号+納入日でユニークキー
-        cursor.execute("""
-            SELECT TOP 100 発注番号, 納入日, 納入数
-            FROM dbo.[V_D仕入]
-            ORDER BY 納入日 DESC, 発注番号 DESC
-        """)
-        shiire_rows = cursor.fetchall()
-        # 発注番号+納入日をキーとして保存
-        latest_shiire = set()
-        for row in shiire_rows:
-            order_num = str(row[0]).strip() if row[0] else ''
-            date_val = str(row[1]) if row[1] else ''
-            latest_shiire.add(f"{order_num}|{date_val}")
+def get_db_status():
+    """
+    DBの現在の状態を取得（保存済みウォーターマーク＋前回以降の差分、全件集計なし）
+
+    差分はウォーターマークに反映しない（更新通知は check_db_updates() が行う）
+
+    Returns:
+        dict: {
+            'tehai': {'count': int, 'seiban_count': int},
+            'hacchu': {'count': int},
+            'shiire': {'count': int},
+            'timestamp': datetime
+        }
+    """
+    conn = None
+    try:
+        conn, cursor = get_connection()
+        with _watermark_lock:
+            prev = _load_watermarks()
+        if prev is None:
+            current = _build_baseline(cursor)
+        else:
+            current, _ = _scan_increment(cursor, prev)
+        summary = _snapshot_summary(current)
 
         return {
             'success': True,
             'tehai': {
-                'count': tehai_count,
-                'seibans': tehai_seibans,
-                'seiban_count': len(tehai_seibans)
-            },
-            'hacchu': {
-                'count': hacchu_count,
-                'latest_numbers': latest_hacchu
-            },
-            'shiire': {
-                'count': shiire_count,
-                'latest_keys': latest_shiire
+                'count': summary['tehai_count'],
+                'seiban_count': summary['tehai_seiban_count']
             },
+            'hacchu': {'count': summary['hacchu_count']},
+            'shiire': {'count': summary['shiire_count']},
             'timestamp': datetime.now()
         }
     except Exception as e:
@@ -856,10 +2276,13 @@ def get_db_status():
 
 def check_db_updates(stored_snapshot=None):
     """
-    DBの更新をチェック
+    DBの更新をチェック（ウォーターマーク方式）
+
+    前回チェック時のウォーターマーク（最大発注番号・最新納入日・製番別件数）以降の差分だけを
+    インデックス範囲クエリで取得する。ウォーターマークは cache/ に保存し、再起動後も引き継ぐ。
 
     Args:
-        stored_snapshot: 前回のスナップショット（Noneの場合は内部キャッシュを使用）
+        stored_snapshot: 比較元のウォーターマーク（Noneの場合は保存済みのものを使用）
 
     Returns:
         dict: {
@@ -870,66 +2293,46 @@ def check_db_updates(stored_snapshot=None):
             'message': str
         }
     """
-    global _db_snapshot
+    conn = None
+    try:
+        conn, cursor = get_connection()
+        with _watermark_lock:
+            prev = stored_snapshot or _load_watermarks()
+
+            # 初回チェックの場合
+            if prev is None:
+                current = _build_baseline(cursor)
+                _save_watermarks(current)
+                return {
+                    'success': True,
+                    'has_updates': False,
+                    'is_first_check': True,
+                    'tehai_changes': {'new_seibans': [], 'count_diff': 0},
+                    'hacchu_changes': {'new_orders': [], 'count_diff': 0},
+                    'shiire_changes': {'new_kenshu': [], 'new_kenshu_details': [], 'count_diff': 0},
+                    'message': '初回チェック完了（ベースライン設定）',
+                    'current_snapshot': _snapshot_summary(current)
+                }
 
-    # 現在の状態を取得
-    current = get_db_status()
-    if not current.get('success'):
+            current, changes = _scan_increment(cursor, prev)
+            _save_watermarks(current)
+    except Exception as e:
         return {
             'success': False,
             'has_updates': False,
-            'error': current.get('error', '接続エラー')
-        }
-
-    # 比較対象のスナップショット
-    if stored_snapshot:
-        prev = stored_snapshot
-    else:
-        prev = _db_snapshot
-
-    # 初回チェックの場合
-    if prev['last_check'] is None:
-        _db_snapshot = {
-            'tehai': {
-                'count': current['tehai']['count'],
-                'seibans': current['tehai']['seibans']
-            },
-            'hacchu': {
-                'count': current['hacchu']['count'],
-                'latest_numbers': current['hacchu']['latest_numbers']
-            },
-            'shiire': {
-                'count': current['shiire']['count'],
-                'latest_keys': current['shiire']['latest_keys']
-            },
-            'last_check': current['timestamp']
-        }
-        return {
-            'success': True,
-            'has_updates': False,
-            'is_first_check': True,
-            'tehai_changes': {'new_seibans': [], 'count_diff': 0},
-            'hacchu_changes': {'new_orders': [], 'count_diff': 0},
-            'shiire_changes': {'new_kenshu': [], 'new_kenshu_details': [], 'count_diff': 0},
-            'message': '初回チェック完了（ベースライン設定）',
-            'current_snapshot': {
-                'tehai_count': current['tehai']['count'],
-                'tehai_seiban_count': current['tehai']['seiban_count'],
-                'hacchu_count': current['hacchu']['count'],
-                'shiire_count': current['shiire']['count'],
-                'timestamp': current['timestamp'].isoformat()
-            }
+            'error': str(e) or '接続エラー'
         }
+    finally:
+        if conn:
+            conn.close()
 
     # 変更を検出
     has_updates = False
     messages = []
 
     # 手配リストの変更検出
-    prev_seibans = prev['tehai'].get('seibans', set())
-    curr_seibans = current['tehai']['seibans']
-    new_seibans = list(curr_seibans - prev_seibans)
-    tehai_count_diff = current['tehai']['count'] - prev['tehai'].get('count', 0)
+    new_seibans = changes['new_seibans']
+    tehai_count_diff = changes['tehai_count_diff']
 
     # 新規製番の詳細を取得
     new_tehai_details = []
@@ -949,10 +2352,8 @@ def check_db_updates(stored_snapshot=None):
         messages.append(f"手配リスト: {tehai_count_diff}件")
 
     # 発注リストの変更検出
-    prev_hacchu = prev['hacchu'].get('latest_numbers', set())
-    curr_hacchu = current['hacchu']['latest_numbers']
-    new_orders = list(curr_hacchu - prev_hacchu)
-    hacchu_count_diff = current['hacchu']['count'] - prev['hacchu'].get('count', 0)
+    new_orders = changes['new_orders']
+    hacchu_count_diff = changes['hacchu_count_diff']
 
     # 新規発注の詳細を取得
     new_order_details = []
@@ -962,22 +2363,32 @@ def check_db_updates(stored_snapshot=None):
     if hacchu_count_diff > 0:
         has_updates = True
         messages.append(f"発注リスト: +{hacchu_count_diff}件")
-    elif hacchu_count_diff < 0:
-        messages.append(f"発注リスト: {hacchu_count_diff}件")
 
     # 仕入（検収）の変更検出
-    prev_shiire = prev.get('shiire', {}).get('latest_keys', set())
-    curr_shiire = current['shiire']['latest_keys']
-    new_kenshu_keys = list(curr_shiire - prev_shiire)
-    shiire_count_diff = current['shiire']['count'] - prev.get('shiire', {}).get('count', 0)
+    shiire_count_diff = changes['shiire_count_diff']
 
     # 新規検収の発注番号を抽出
     new_kenshu_orders = []
-    for key in new_kenshu_keys:
+    for key in changes['new_kenshu_keys']:
         order_num = key.split('|')[0] if '|' in key else key
         if order_num and order_num not in new_kenshu_orders:
             new_kenshu_orders.append(order_num)
 
+    # 新規検収が入った発注番号の納入情報キャッシュを破棄
+    if new_kenshu_orders:
+        DeliveryUtils.invalidate(new_kenshu_orders)
+
+    # 変更のあったビューのクエリ結果キャッシュを破棄（未発注は手配・発注の両方に連動）
+    changed_views = set()
+    if new_seibans or tehai_count_diff:
+        changed_views.update(['V_D手配リスト', 'V_D未発注', 'V_D受注'])
+    if new_orders or hacchu_count_diff:
+        changed_views.update(['V_D発注', 'V_D発注残', 'V_D未発注'])
+    if new_kenshu_orders or shiire_count_diff:
+        changed_views.update(['V_D仕入', 'V_D発注残'])
+    if changed_views:
+        invalidate_result_cache(changed_views)
+
     # 新規検収の詳細を取得
     new_kenshu_details = []
     if new_kenshu_orders and len(new_kenshu_orders) <= 50:
@@ -986,25 +2397,6 @@ def check_db_updates(stored_snapshot=None):
     if shiire_count_diff > 0:
         has_updates = True
         messages.append(f"検収: +{shiire_count_diff}件")
-    elif shiire_count_diff < 0:
-        messages.append(f"検収: {shiire_count_diff}件")
-
-    # スナップショット更新
-    _db_snapshot = {
-        'tehai': {
-            'count': current['tehai']['count'],
-            'seibans': current['tehai']['seibans']
-        },
-        'hacchu': {
-            'count': current['hacchu']['count'],
-            'latest_numbers': current['hacchu']['latest_numbers']
-        },
-        'shiire': {
-            'count': current['shiire']['count'],
-            'latest_keys': current['shiire']['latest_keys']
-        },
-        'last_check': current['timestamp']
-    }
 
     return {
         'success': True,
@@ -1026,13 +2418,7 @@ def check_db_updates(stored_snapshot=None):
             'count_diff': shiire_count_diff
         },
         'message': ' / '.join(messages) if messages else '変更なし',
-        'current_snapshot': {
-            'tehai_count': current['tehai']['count'],
-            'tehai_seiban_count': current['tehai']['seiban_count'],
-            'hacchu_count': current['hacchu']['count'],
-            'shiire_count': current['shiire']['count'],
-            'timestamp': current['timestamp'].isoformat()
-        }
+        'current_snapshot': _snapshot_summary(current)
     }
 
 
@@ -1059,29 +2445,14 @@ def get_new_order_details(order_numbers):
         padded_numbers = [str(n).zfill(8) for n in order_numbers]
 
         sql = f"""
-            SELECT 発注番号, 製番, 品名, 仕様１, 発注数, 単位, 仕入先略称, 納期
+            SELECT 発注番号, 製番, 品名, 仕様１, 発注数, 単位, 仕入先略称 AS 仕入先, 納期
             FROM dbo.[V_D発注]
             WHERE 発注番号 IN ({placeholders})
             ORDER BY 発注番号 DESC
         """
 
         cursor.execute(sql, padded_numbers)
-        rows = cursor.fetchall()
-
-        details = []
-        for row in rows:
-            details.append({
-                '発注番号': format_value(row[0]),
-                '製番': format_value(row[1]),
-                '品名': format_value(row[2]),
-                '仕様１': format_value(row[3]),
-                '発注数': format_value(row[4]),
-                '単位': format_value(row[5]),
-                '仕入先': format_value(row[6]),
-                '納期': format_value(row[7])
-            })
-
-        return details
+        return _fetch_records(cursor)
     except Exception as e:
         print(f"発注詳細取得エラー: {e}")
         return []
@@ -1118,23 +2489,13 @@ def get_new_tehai_details(seibans):
         """
 
         cursor.execute(sql, list(seibans))
-        rows = cursor.fetchall()
 
         # 製番ごとにグループ化して代表行を返す
         seiban_details = {}
-        for row in rows:
-            seiban = format_value(row[0])
+        for record in _fetch_records(cursor):
+            seiban = record['製番']
             if seiban not in seiban_details:
-                seiban_details[seiban] = {
-                    '製番': seiban,
-                    '品名': format_value(row[1]),
-                    '仕様１': format_value(row[2]),
-                    '手配数': format_value(row[3]),
-                    '単位': format_value(row[4]),
-                    '手配区分': format_value(row[5]),
-                    'メーカー': format_value(row[6]),
-                    '件数': 1
-                }
+                seiban_details[seiban] = dict(record, 件数=1)
             else:
                 seiban_details[seiban]['件数'] += 1
 
@@ -1170,29 +2531,14 @@ def get_new_kenshu_details(order_numbers):
         padded_numbers = [str(n).zfill(8) for n in order_numbers]
 
         sql = f"""
-            SELECT 発注番号, 製番, 品名, 仕様１, 納入日, 納入数, 単位, 仕入先略称
+            SELECT 発注番号, 製番, 品名, 仕様１, 納入日, 納入数, 単位, 仕入先略称 AS 仕入先
             FROM dbo.[V_D仕入]
             WHERE 発注番号 IN ({placeholders})
             ORDER BY 納入日 DESC, 発注番号 DESC
         """
 
         cursor.execute(sql, padded_numbers)
-        rows = cursor.fetchall()
-
-        details = []
-        for row in rows:
-            details.append({
-                '発注番号': format_value(row[0]),
-                '製番': format_value(row[1]),
-                '品名': format_value(row[2]),
-                '仕様１': format_value(row[3]),
-                '納入日': format_value(row[4]),
-                '納入数': format_value(row[5]),
-                '単位': format_value(row[6]),
-                '仕入先': format_value(row[7])
-            })
-
-        return details[:20]  # 最大20件
+        return _fetch_records(cursor)[:20]  # 最大20件
     except Exception as e:
         print(f"検収詳細取得エラー: {e}")
         return []
@@ -1236,7 +2582,7 @@ def get_delivery_schedule_from_db(start_date=None, days=7, seibans=None):
         sql = """
             SELECT
                 発注番号, 製番, 品名, 仕様１, 発注数, 単位,
-                仕入先略称, 仕入先CD, 納期, 手配区分
+                仕入先略称 AS 仕入先, 仕入先CD, 納期, 手配区分
             FROM dbo.[V_D発注残]
             WHERE 納期 >= ? AND 納期 <= ?
         """
@@ -1251,14 +2597,16 @@ def get_delivery_schedule_from_db(start_date=None, days=7, seibans=None):
         sql += " ORDER BY 納期, 製番, 品名"
 
         cursor.execute(sql, params)
+        description = cursor.description
         rows = cursor.fetchall()
+        names = [col[0] for col in description]
+        columns = format_columns(description, rows)  # 納期は表示用 (YY/MM/DD) になる
 
         items = []
         days_dict = {}
 
-        for row in rows:
+        for row, values in zip(rows, zip(*columns)):
             raw_date = row[8]  # 納期（仕入先CD追加によりインデックスシフト）
-            delivery_date_display = format_value(raw_date)  # 表示用 (YY/MM/DD)
 
             # 日付キー用 (YYYY-MM-DD形式)
             date_key = None
@@ -1268,18 +2616,7 @@ def get_delivery_schedule_from_db(start_date=None, days=7, seibans=None):
                 else:
                     date_key = str(raw_date)
 
-            item = {
-                '発注番号': format_value(row[0]),
-                '製番': format_value(row[1]),
-                '品名': format_value(row[2]),
-                '仕様１': format_value(row[3]),
-                '発注数': format_value(row[4]),
-                '単位': format_value(row[5]),
-                '仕入先': format_value(row[6]),
-                '仕入先CD': format_value(row[7]),
-                '納期': delivery_date_display,
-                '手配区分': format_value(row[9])
-            }
+            item = dict(zip(names, values))
             items.append(item)
 
             # 日別グループ化 (YYYY-MM-DD形式のキー)
@@ -1305,50 +2642,32 @@ def get_delivery_schedule_from_db(start_date=None, days=7, seibans=None):
 
 def get_seiban_updates(seiban):
     """
-    特定製番の手配・発注の更新状況を取得
+    特定製番の手配・発注の更新状況を取得（4ビューの件数を1クエリで集計）
 
     Args:
         seiban: 製番
 
     Returns:
-        dict: {'tehai_count': int, 'hacchu_count': int, 'mihatchu_count': int}
+        dict: {'tehai_count': int, 'hacchu_count': int, 'mihatchu_count': int, 'hacchuzan_count': int}
     """
     conn = None
     try:
         conn, cursor = get_connection()
 
-        result = {'seiban': seiban}
-
-        # 手配リスト件数
-        cursor.execute(
-            "SELECT COUNT(*) FROM dbo.[V_D手配リスト] WHERE 製番 = ?",
-            [seiban]
-        )
-        result['tehai_count'] = cursor.fetchone()[0]
-
-        # 発注件数
-        cursor.execute(
-            "SELECT COUNT(*) FROM dbo.[V_D発注] WHERE 製番 = ?",
-            [seiban]
-        )
-        result['hacchu_count'] = cursor.fetchone()[0]
-
-        # 未発注件数
-        cursor.execute(
-            "SELECT COUNT(*) FROM dbo.[V_D未発注] WHERE 製番 = ?",
-            [seiban]
-        )
-        result['mihatchu_count'] = cursor.fetchone()[0]
-
-        # 発注残件数
-        cursor.execute(
-            "SELECT COUNT(*) FROM dbo.[V_D発注残] WHERE 製番 = ?",
-            [seiban]
-        )
-        result['hacchuzan_count'] = cursor.fetchone()[0]
+        seiban = seiban.strip()
+        counts = _count_views_by_seiban(
+            cursor, [seiban],
+            ['tehai_count', 'hatchu_count', 'mihatchu_all_count', 'hacchuzan_count']
+        )[seiban]
 
-        result['success'] = True
-        return result
+        return {
+            'seiban': seiban,
+            'tehai_count': counts['tehai_count'],
+            'hacchu_count': counts['hatchu_count'],
+            'mihatchu_count': counts['mihatchu_all_count'],
+            'hacchuzan_count': counts['hacchuzan_count'],
+            'success': True
+        }
     except Exception as e:
         return {'success': False, 'error': str(e)}
     finally:
@@ -1356,6 +2675,58 @@ def get_seiban_updates(seiban):
             conn.close()
 
 
+def iter_seiban_list_from_db(min_seiban=None):
+    """
+    V_D受注から製番一覧をストリーミング取得（製番の降順）
+
+    Args:
+        min_seiban: 最小製番（この番号以降を取得、例: 'MHT0600'）
+
+    Yields:
+        dict: ストリーミングイベント（行は {'seiban', 'product_name', 'customer_name', 'memo2'}）
+    """
+    # V_D受注から製番・品名・得意先略称・メモ２を取得
+    # 製番ごとに1件のみ（重複除去）
+    sql = """
+        SELECT DISTINCT
+            製番,
+            品名,
+            得意先略称,
+            メモ２
+        FROM dbo.[V_D受注]
+        WHERE 製番 IS NOT NULL AND 製番 <> ''
+    """
+    params = []
+
+    # 最小製番フィルタ
+    if min_seiban:
+        sql += " AND 製番 >= ?"
+        params.append(min_seiban.strip())
+
+    sql += " ORDER BY 製番 DESC"
+
+    count = 0
+    with closing(_iter_query(sql, params)) as events:
+        for event in events:
+            if event['type'] == 'rows':
+                items = [
+                    {
+                        'seiban': row[0],
+                        'product_name': row[1] or '',
+                        'customer_name': row[2] or '',
+                        'memo2': row[3] or ''
+                    }
+                    for row in event['rows'] if row[0]
+                ]
+                count += len(items)
+                if items:
+                    yield {'type': 'rows', 'rows': items}
+            elif event['type'] == 'end':
+                yield {'type': 'end', 'count': count, 'success': True}
+            else:
+                yield event
+
+
 def get_seiban_list_from_db(min_seiban=None):
     """
     V_D受注から製番一覧を取得（製番選択ドロップダウン用）
@@ -1370,52 +2741,12 @@ def get_seiban_list_from_db(min_seiban=None):
             'count': int
         }
     """
-    conn = None
     try:
-        conn, cursor = get_connection()
-
-        # V_D受注から製番・品名・得意先略称・メモ２を取得
-        # 製番ごとに1件のみ（重複除去）
-        sql = """
-            SELECT DISTINCT
-                製番,
-                品名,
-                得意先略称,
-                メモ２
-            FROM dbo.[V_D受注]
-            WHERE 製番 IS NOT NULL AND 製番 <> ''
-        """
-        params = []
-
-        # 最小製番フィルタ
-        if min_seiban:
-            sql += " AND 製番 >= ?"
-            params.append(min_seiban.strip())
-
-        sql += " ORDER BY 製番 DESC"
-
-        cursor.execute(sql, params)
-        rows = cursor.fetchall()
-
-        items = []
-        for row in rows:
-            seiban = format_value(row[0])
-            if not seiban:
-                continue
-            items.append({
-                'seiban': seiban,
-                'product_name': format_value(row[1]) or '',
-                'customer_name': format_value(row[2]) or '',
-                'memo2': format_value(row[3]) or ''
-            })
-
+        result = collect_stream(iter_seiban_list_from_db(min_seiban))
         return {
             'success': True,
-            'items': items,
-            'count': len(items)
+            'items': result['rows'],
+            'count': result['count']
         }
     except Exception as e:
         return {'success': False, 'error': str(e), 'items': []}
-    finally:
-        if conn:
-            conn.close()
@@ -0,0 +1,657 @@
+"""
+Across DB ローカルミラーモジュール
+V_D系ビュー6本をローカルSQLite（cache/across_mirror.db）に複製し、差分同期する
+
+- 同期はビューごとのキーで差分だけを取得する
+    V_D仕入   : 納入日（ミラーの最新納入日以降を取り直す）
+    V_D発注   : 発注番号（ミラーの最大発注番号より後を追加）
+    その他    : 製番（製番別件数が変わった製番だけ取り直す。V_D発注残は新規検収のあった製番も対象）
+  件数が合わない場合・列構成が変わった場合・前回の全件同期から MIRROR_FULL_SYNC_SEC 経過した場合は全件同期
+- 読み出しは across_db と同じSQL（dbo.[ビュー名]、SELECT TOP n、? パラメータ）をそのまま実行できる
+  接続ラッパーを返す（across_db.get_connection() がオフライン・フォールバック時に使用）
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from datetime import datetime, date
+from pathlib import Path
+
+
+# ミラー対象ビューと差分同期のキー
+MIRROR_VIEWS = {
+    'V_D仕入': 'delivery_date',
+    'V_D発注': 'order_number',
+    'V_D発注残': 'seiban',
+    'V_D手配リスト': 'seiban',
+    'V_D未発注': 'seiban',
+    'V_D受注': 'seiban',
+}
+
+# 同期設定（configure() で変更可能）
+MIRROR_PATH = Path('cache') / 'across_mirror.db'
+MIRROR_SYNC_INTERVAL_SEC = 600       # 差分同期の間隔（秒）
+MIRROR_FULL_SYNC_SEC = 24 * 60 * 60  # 全件同期の間隔（秒、行の書き換えを取り込むため）
+FETCH_BATCH_SIZE = 2000              # 同期時の fetchmany 件数
+SEIBAN_CHUNK_SIZE = 500              # 製番IN句のチャンク
+
+META_TABLE = '_mirror_sync'
+
+_sync_lock = threading.Lock()
+_sync_thread = None
+
+
+# ========================================
+# SQLite 型変換
+# ========================================
+
+def _convert_timestamp(raw):
+    return datetime.fromisoformat(raw.decode())
+
+
+def _convert_date(raw):
+    return date.fromisoformat(raw.decode())
+
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(' '))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('DECIMAL', lambda raw: Decimal(raw.decode()))
+
+
+def _decl_type(value_type):
+    """Python型 → ミラーテーブルの宣言型（読み出し時に同じ型へ戻す）"""
+    if value_type is None:
+        return 'TEXT'
+    if issubclass(value_type, bool):
+        return 'INTEGER'
+    if issubclass(value_type, datetime):
+        return 'TIMESTAMP'
+    if issubclass(value_type, date):
+        return 'DATE'
+    if issubclass(value_type, Decimal):
+        return 'DECIMAL'
+    if issubclass(value_type, int):
+        return 'INTEGER'
+    if issubclass(value_type, float):
+        return 'REAL'
+    return 'TEXT'
+
+
+# ========================================
+# SQL Server 向けSQLの読み替え
+# ========================================
+
+_TOP_PATTERN = re.compile(r'^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s+(\d+)\s+', re.IGNORECASE)
+
+
+def translate_sql(sql):
+    """
+    across_db のSQL（SQL Server方言）をSQLiteで実行できる形に変換
+
+    - dbo.[ビュー名] → [ビュー名]
+    - SELECT TOP n ... → SELECT ... LIMIT n
+    """
+    sql = sql.replace('dbo.[', '[')
+    match = _TOP_PATTERN.match(sql)
+    if match:
+        sql = match.group(1) + sql[match.end():].rstrip().rstrip(';') + f" LIMIT {match.group(2)}"
+    return sql
+
+
+def _restore_value(value):
+    """
+    集計結果（MAX(納入日) など宣言型を持たない列）で文字列に戻った日時を datetime に戻す
+
+    ミラーへの書き込みは datetime.isoformat(' ') なので、その形式の文字列だけを対象にする
+    """
+    if (isinstance(value, str) and len(value) == 19 and value[4] == '-'
+            and value[10] == ' ' and value[13] == ':'):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _restore_row(row):
+    return tuple(_restore_value(v) for v in row)
+
+
+class SqliteCursor:
+    """pyodbcカーソル互換のラッパー（execute(sql, 値) の単一値パラメータにも対応）"""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        self._raw.execute(translate_sql(sql), list(params))
+        return self
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    def fetchone(self):
+        row = self._raw.fetchone()
+        return _restore_row(row) if row is not None else None
+
+    def fetchmany(self, size=FETCH_BATCH_SIZE):
+        return [_restore_row(row) for row in self._raw.fetchmany(size)]
+
+    def fetchall(self):
+        return [_restore_row(row) for row in self._raw.fetchall()]
+
+    def close(self):
+        self._raw.close()
+
+    def __iter__(self):
+        return (_restore_row(row) for row in self._raw)
+
+
+class SqliteConnection:
+    """pyodbc接続互換のラッパー（ミラー・スタンドインの読み出し用）"""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self):
+        return SqliteCursor(self._raw.cursor())
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def commit(self):
+        self._raw.commit()
+
+    def close(self):
+        self._raw.close()
+
+    def invalidate(self):
+        self.close()
+
+
+def open_sqlite(path, readonly=True):
+    """
+    SQLiteファイルを across_db 互換の接続として開く
+
+    Returns:
+        tuple: (接続, カーソル)
+    """
+    path = Path(path)
+    if readonly:
+        raw = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True,
+                              detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    else:
+        raw = sqlite3.connect(str(path), detect_types=sqlite3.PARSE_DECLTYPES,
+                              check_same_thread=False)
+    conn = SqliteConnection(raw)
+    return conn, conn.cursor()
+
+
+# ========================================
+# 読み出し
+# ========================================
+
+def configure(path=None, sync_interval=None, full_sync_interval=None):
+    """ミラーの保存先・同期間隔（秒）を変更"""
+    global MIRROR_PATH, MIRROR_SYNC_INTERVAL_SEC, MIRROR_FULL_SYNC_SEC
+    if path is not None:
+        MIRROR_PATH = Path(path)
+    if sync_interval is not None:
+        MIRROR_SYNC_INTERVAL_SEC = sync_interval
+    if full_sync_interval is not None:
+        MIRROR_FULL_SYNC_SEC = full_sync_interval
+
+
+def is_available():
+    """ミラーが一度でも同期済みか（全ビューのテーブルが揃っているか）"""
+    if not MIRROR_PATH.exists():
+        return False
+    try:
+        conn, cursor = open_sqlite(MIRROR_PATH)
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {META_TABLE} WHERE last_full_sync IS NOT NULL")
+            return cursor.fetchone()[0] >= len(MIRROR_VIEWS)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def connect():
+    """
+    ミラーへの読み取り専用接続（across_db.get_connection() と同じ (接続, カーソル) を返す）
+
+    Raises:
+        RuntimeError: ミラーが未作成の場合
+    """
+    if not MIRROR_PATH.exists():
+        raise RuntimeError(f"ローカルミラーがありません（{MIRROR_PATH}）。先に同期を実行してください")
+    return open_sqlite(MIRROR_PATH)
+
+
+def get_status():
+    """
+    ミラーの鮮度（ビューごとの最終同期時刻・経過秒数・件数・直近エラー）
+
+    Returns:
+        dict: {
+            'available': bool,
+            'views': {ビュー名: {'last_sync', 'last_full_sync', 'age_sec', 'rows', 'duration_ms', 'error'}},
+            'oldest_sync': str or None,
+            'age_sec': float or None,   # 最も古いビューの経過秒数
+            'stale': bool               # 同期間隔の2倍以上更新されていない
+        }
+    """
+    status = {
+        'path': str(MIRROR_PATH),
+        'available': False,
+        'views': {},
+        'oldest_sync': None,
+        'age_sec': None,
+        'stale': True,
+        'sync_interval_sec': MIRROR_SYNC_INTERVAL_SEC,
+        'syncing': _sync_lock.locked(),
+    }
+    if not MIRROR_PATH.exists():
+        return status
+
+    conn = None
+    try:
+        conn, cursor = open_sqlite(MIRROR_PATH)
+        cursor.execute(f"""
+            SELECT view, last_sync, last_full_sync, rows, duration_ms, error FROM {META_TABLE}
+        """)
+        now = time.time()
+        oldest = None
+        for view, last_sync, last_full_sync, rows, duration_ms, error in cursor.fetchall():
+            # 読み出しラッパーが日時に戻すので、表示用の文字列に揃える
+            last_sync = str(last_sync) if last_sync else None
+            last_full_sync = str(last_full_sync) if last_full_sync else None
+            age = now - datetime.fromisoformat(last_sync).timestamp() if last_sync else None
+            status['views'][view] = {
+                'last_sync': last_sync,
+                'last_full_sync': last_full_sync,
+                'age_sec': round(age, 1) if age is not None else None,
+                'rows': rows,
+                'duration_ms': duration_ms,
+                'error': error,
+            }
+            if last_sync and (oldest is None or last_sync < oldest):
+                oldest = last_sync
+    except sqlite3.Error as e:
+        status['error'] = str(e)
+        return status
+    finally:
+        if conn:
+            conn.close()
+
+    synced = [v for v in status['views'].values() if v['last_full_sync']]
+    status['available'] = len(synced) >= len(MIRROR_VIEWS)
+    if oldest:
+        status['oldest_sync'] = oldest
+        status['age_sec'] = round(time.time() - datetime.fromisoformat(oldest).timestamp(), 1)
+        status['stale'] = status['age_sec'] > MIRROR_SYNC_INTERVAL_SEC * 2
+    return status
+
+
+# ========================================
+# 同期
+# ========================================
+
+def _open_writer():
+    MIRROR_PATH.parent.mkdir(parents=True, exist_ok=True)
+    raw = sqlite3.connect(str(MIRROR_PATH), detect_types=sqlite3.PARSE_DECLTYPES,
+                          isolation_level=None, check_same_thread=False)
+    raw.execute("PRAGMA journal_mode=WAL")  # 同期中も読み出しをブロックしない
+    raw.execute(f"""
+        CREATE TABLE IF NOT EXISTS {META_TABLE} (
+            view TEXT PRIMARY KEY,
+            columns TEXT,
+            last_sync TEXT,
+            last_full_sync TEXT,
+            rows INTEGER,
+            duration_ms REAL,
+            error TEXT
+        )
+    """)
+    return raw
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _mirror_columns(mconn, view):
+    """ミラーテーブルの列名リスト（テーブルが無ければNone）"""
+    row = mconn.execute(f"SELECT columns FROM {META_TABLE} WHERE view = ?", [view]).fetchone()
+    return row[0].split('\t') if row and row[0] else None
+
+
+def _create_table(mconn, view, description, sample_rows):
+    """ソースの列構成でミラーテーブルを作り直す（宣言型は型コード、なければ値から判定）"""
+    columns = []
+    for idx, col in enumerate(description):
+        value_type = col[1] if isinstance(col[1], type) else None
+        if value_type is None:
+            value = next((r[idx] for r in sample_rows if r[idx] is not None), None)
+            value_type = type(value) if value is not None else None
+        columns.append(f"{_quote(col[0])} {_decl_type(value_type)}")
+
+    mconn.execute(f"DROP TABLE IF EXISTS {_quote(view)}")
+    mconn.execute(f"CREATE TABLE {_quote(view)} ({', '.join(columns)})")
+    if '製番' in [col[0] for col in description]:
+        mconn.execute(f"CREATE INDEX {_quote('ix_' + view + '_製番')} ON {_quote(view)} (製番)")
+    key = {'order_number': '発注番号', 'delivery_date': '納入日'}.get(MIRROR_VIEWS[view])
+    if key:
+        mconn.execute(f"CREATE INDEX {_quote('ix_' + view + '_' + key)} ON {_quote(view)} ({key})")
+
+
+def _insert_rows(mconn, view, columns, rows):
+    if not rows:
+        return 0
+    placeholders = ','.join(['?' for _ in columns])
+    mconn.executemany(
+        f"INSERT INTO {_quote(view)} ({', '.join(_quote(c) for c in columns)}) VALUES ({placeholders})",
+        [tuple(r) for r in rows]
+    )
+    return len(rows)
+
+
+def _copy_result(src_cursor, mconn, view, columns):
+    """直前に実行したソースクエリの結果を fetchmany で流し込む"""
+    copied = 0
+    while True:
+        rows = src_cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return copied
+        copied += _insert_rows(mconn, view, columns, rows)
+
+
+def _source_columns(src_cursor, view):
+    src_cursor.execute(f"SELECT TOP 0 * FROM dbo.[{view}]")
+    src_cursor.fetchall()
+    return [col[0] for col in src_cursor.description]
+
+
+def _full_sync(src_cursor, mconn, view):
+    """ビュー全体を取り直す（1トランザクション、読み出し側は完了まで旧データを参照）"""
+    src_cursor.execute(f"SELECT * FROM dbo.[{view}]")
+    description = src_cursor.description
+    columns = [col[0] for col in description]
+    first = src_cursor.fetchmany(FETCH_BATCH_SIZE)
+
+    mconn.execute("BEGIN")
+    try:
+        _create_table(mconn, view, description, first)
+        copied = _insert_rows(mconn, view, columns, first)
+        copied += _copy_result(src_cursor, mconn, view, columns)
+        mconn.execute(f"""
+            INSERT INTO {META_TABLE} (view, columns, last_full_sync) VALUES (?, ?, ?)
+            ON CONFLICT(view) DO UPDATE SET columns = excluded.columns,
+                                            last_full_sync = excluded.last_full_sync
+        """, [view, '\t'.join(columns), datetime.now().isoformat(' ', 'seconds')])
+        mconn.execute("COMMIT")
+    except Exception:
+        mconn.execute("ROLLBACK")
+        raise
+    return {'mode': 'full', 'copied': copied}
+
+
+def _counts_match(src_cursor, mconn, view):
+    src_cursor.execute(f"SELECT COUNT(*) FROM dbo.[{view}]")
+    source_count = src_cursor.fetchone()[0]
+    mirror_count = mconn.execute(f"SELECT COUNT(*) FROM {_quote(view)}").fetchone()[0]
+    return source_count == mirror_count
+
+
+def _sync_by_order_number(src_cursor, mconn, view, columns):
+    """最大発注番号より後の行を追加"""
+    max_number = mconn.execute(f"SELECT MAX(発注番号) FROM {_quote(view)}").fetchone()[0]
+    if max_number is None:
+        return _full_sync(src_cursor, mconn, view)
+
+    src_cursor.execute(f"SELECT * FROM dbo.[{view}] WHERE 発注番号 > ?", [max_number])
+    mconn.execute("BEGIN")
+    try:
+        copied = _copy_result(src_cursor, mconn, view, columns)
+        mconn.execute("COMMIT")
+    except Exception:
+        mconn.execute("ROLLBACK")
+        raise
+    return {'mode': 'incremental', 'copied': copied}
+
+
+def _sync_by_delivery_date(src_cursor, mconn, view, columns):
+    """
+    最新納入日以降を取り直す（同日の追加分を取りこぼさないよう境界日は削除して入れ直す）
+
+    Returns:
+        dict: 同期結果（'seibans' に取り直した行の製番を含む）
+    """
+    latest = mconn.execute(f"""
+        SELECT 納入日 FROM {_quote(view)} WHERE 納入日 IS NOT NULL ORDER BY 納入日 DESC LIMIT 1
+    """).fetchone()
+    if latest is None:
+        return dict(_full_sync(src_cursor, mconn, view), seibans=set())
+
+    src_cursor.execute(f"SELECT * FROM dbo.[{view}] WHERE 納入日 >= ?", [latest[0]])
+    seiban_idx = columns.index('製番') if '製番' in columns else None
+    seibans = set()
+    mconn.execute("BEGIN")
+    try:
+        mconn.execute(f"DELETE FROM {_quote(view)} WHERE 納入日 >= ?", [latest[0]])
+        copied = 0
+        while True:
+            rows = src_cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            if seiban_idx is not None:
+                seibans.update(r[seiban_idx] for r in rows)
+            copied += _insert_rows(mconn, view, columns, rows)
+        mconn.execute("COMMIT")
+    except Exception:
+        mconn.execute("ROLLBACK")
+        raise
+    return {'mode': 'incremental', 'copied': copied, 'seibans': seibans}
+
+
+def _sync_by_seiban(src_cursor, mconn, view, columns, extra_seibans=()):
+    """製番別件数が変わった製番（＋指定製番）の行だけを取り直す"""
+    src_cursor.execute(f"SELECT 製番, COUNT(*) FROM dbo.[{view}] GROUP BY 製番")
+    source_counts = dict((s, c) for s, c in src_cursor.fetchall())
+    mirror_counts = dict(mconn.execute(
+        f"SELECT 製番, COUNT(*) FROM {_quote(view)} GROUP BY 製番"
+    ).fetchall())
+
+    known = set(source_counts) | set(mirror_counts)
+    changed = {s for s in known if source_counts.get(s, 0) != mirror_counts.get(s, 0)}
+    changed |= {s for s in extra_seibans if s in known}
+
+    copied = 0
+    mconn.execute("BEGIN")
+    try:
+        if None in changed:
+            mconn.execute(f"DELETE FROM {_quote(view)} WHERE 製番 IS NULL")
+            src_cursor.execute(f"SELECT * FROM dbo.[{view}] WHERE 製番 IS NULL")
+            copied += _copy_result(src_cursor, mconn, view, columns)
+
+        targets = sorted(s for s in changed if s is not None)
+        for i in range(0, len(targets), SEIBAN_CHUNK_SIZE):
+            chunk = targets[i:i + SEIBAN_CHUNK_SIZE]
+            placeholders = ','.join(['?' for _ in chunk])
+            mconn.execute(f"DELETE FROM {_quote(view)} WHERE 製番 IN ({placeholders})", chunk)
+            src_cursor.execute(f"SELECT * FROM dbo.[{view}] WHERE 製番 IN ({placeholders})", chunk)
+            copied += _copy_result(src_cursor, mconn, view, columns)
+        mconn.execute("COMMIT")
+    except Exception:
+        mconn.execute("ROLLBACK")
+        raise
+    return {'mode': 'incremental', 'copied': copied, 'seibans': len(changed)}
+
+
+def _needs_full_sync(mconn, view, columns):
+    row = mconn.execute(f"SELECT last_full_sync FROM {META_TABLE} WHERE view = ?", [view]).fetchone()
+    if not row or not row[0]:
+        return True
+    if _mirror_columns(mconn, view) != columns:
+        return True
+    age = time.time() - datetime.fromisoformat(row[0]).timestamp()
+    return age > MIRROR_FULL_SYNC_SEC
+
+
+def _record(mconn, view, rows=None, duration_ms=None, error=None):
+    if error is None:
+        mconn.execute(f"""
+            UPDATE {META_TABLE} SET last_sync = ?, rows = ?, duration_ms = ?, error = NULL WHERE view = ?
+        """, [datetime.now().isoformat(' ', 'seconds'), rows, duration_ms, view])
+    else:
+        mconn.execute(f"""
+            INSERT INTO {META_TABLE} (view, error) VALUES (?, ?)
+            ON CONFLICT(view) DO UPDATE SET error = excluded.error
+        """, [view, error])
+
+
+def _sync_view(src_cursor, mconn, view, full, receipt_seibans):
+    columns = _source_columns(src_cursor, view)
+    if full or _needs_full_sync(mconn, view, columns):
+        return _full_sync(src_cursor, mconn, view)
+
+    strategy = MIRROR_VIEWS[view]
+    if strategy == 'delivery_date':
+        result = _sync_by_delivery_date(src_cursor, mconn, view, columns)
+        receipt_seibans.update(result.pop('seibans', ()))
+    elif strategy == 'order_number':
+        result = _sync_by_order_number(src_cursor, mconn, view, columns)
+    else:
+        extra = receipt_seibans if view == 'V_D発注残' else ()
+        result = _sync_by_seiban(src_cursor, mconn, view, columns, extra)
+
+    # 削除・書き換えで件数がずれた場合は全件で取り直す
+    if not _counts_match(src_cursor, mconn, view):
+        return _full_sync(src_cursor, mconn, view)
+    return result
+
+
+def sync(source_connect=None, full=False, views=None):
+    """
+    ミラーを差分同期（同時に1回のみ実行）
+
+    Args:
+        source_connect: 同期元の (接続, カーソル) を返す関数（既定は Across DB の接続プール）
+        full: Trueなら全ビューを全件同期
+        views: 同期するビュー名のリスト（Noneで全ビュー）
+
+    Returns:
+        dict: {'success': bool, 'views': {ビュー名: {'mode', 'copied', 'duration_ms'} or {'error'}}}
+    """
+    if not _sync_lock.acquire(blocking=False):
+        return {'success': False, 'error': '同期中です'}
+
+    if source_connect is None:
+        import across_db
+        source_connect = across_db.get_live_connection
+
+    src_conn = None
+    mconn = None
+    results = {}
+    try:
+        src_conn, src_cursor = source_connect()
+        mconn = _open_writer()
+        receipt_seibans = set()
+
+        for view in MIRROR_VIEWS:
+            if views and view not in views:
+                continue
+            start = time.perf_counter()
+            try:
+                result = _sync_view(src_cursor, mconn, view, full, receipt_seibans)
+                result['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                rows = mconn.execute(f"SELECT COUNT(*) FROM {_quote(view)}").fetchone()[0]
+                _record(mconn, view, rows, result['duration_ms'])
+                results[view] = result
+            except Exception as e:
+                print(f"[AcrossMirror] {view} 同期エラー: {e}")
+                _record(mconn, view, error=str(e))
+                results[view] = {'error': str(e)}
+
+        success = all('error' not in r for r in results.values())
+        copied = sum(r.get('copied', 0) for r in results.values())
+        print(f"[AcrossMirror] 同期完了: {copied}行取り込み" + ('' if success else '（一部エラー）'))
+        return {'success': success, 'views': results}
+    except Exception as e:
+        print(f"[AcrossMirror] 同期失敗: {e}")
+        return {'success': False, 'error': str(e), 'views': results}
+    finally:
+        if mconn is not None:
+            mconn.close()
+        if src_conn is not None:
+            src_conn.close()
+        _sync_lock.release()
+
+
+def _sync_loop():
+    while True:
+        sync()
+        time.sleep(MIRROR_SYNC_INTERVAL_SEC)
+
+
+def start_sync_thread():
+    """定期同期スレッドを起動（起動済みなら何もしない）"""
+    global _sync_thread
+    if _sync_thread is not None and _sync_thread.is_alive():
+        return
+    _sync_thread = threading.Thread(target=_sync_loop, name='across-mirror-sync', daemon=True)
+    _sync_thread.start()
+    print(f"Acrossミラー同期開始（間隔 {MIRROR_SYNC_INTERVAL_SEC}秒）")
+
+
+# テスト用コード（SQL Serverなしでスタンドインのビューセットを使って同期を確認）
+if __name__ == '__main__':
+    import tempfile
+    import across_standin
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = Path(tmp) / 'standin.db'
+        across_standin.create_standin_database(source_path)
+        configure(path=Path(tmp) / 'mirror.db')
+        source = lambda: open_sqlite(source_path)
+
+        def assert_same():
+            src, src_cursor = source()
+            dst, dst_cursor = connect()
+            try:
+                for view in MIRROR_VIEWS:
+                    query = f"SELECT * FROM dbo.[{view}] ORDER BY 1, 2, 3"
+                    expected = src_cursor.execute(query).fetchall()
+                    actual = dst_cursor.execute(query).fetchall()
+                    assert sorted(map(repr, expected)) == sorted(map(repr, actual)), view
+            finally:
+                src.close()
+                dst.close()
+
+        print("=== 初回（全件）同期 ===")
+        print(sync(source))
+        assert_same()
+
+        print("\n=== 差分同期（発注追加・検収追加・手配変更） ===")
+        across_standin.apply_sample_changes(source_path)
+        result = sync(source)
+        print(result)
+        assert all(r['mode'] == 'incremental' for r in result['views'].values())
+        assert_same()
+
+        print("\n=== ミラーから across_db 形式のSQLで読み出し ===")
+        conn, cursor = connect()
+        cursor.execute("SELECT TOP 2 * FROM dbo.[V_D発注] WHERE 製番 = ? ORDER BY 発注番号", 'MHT0620')
+        for row in cursor.fetchall():
+            print(row)
+        conn.close()
+        print(get_status())
@@ -0,0 +1,439 @@
+"""
+Across DB スタンドイン ビューセット
+SQL Server なしでミラー同期・across_db の読み出しを確認するための、V_D系ビュー6本と同じ列構成のSQLiteデータベース
+
+列は across_db が参照する列のみ（実ビューの列順・型に合わせている）
+
+- create_standin_database(): 2製番の最小サンプル（動作確認用）
+- generate_synthetic_database(): シード指定で再現できる大量データ（数千製番・数十万発注、ベンチマーク用）
+- across_db.configure_backend('standin', パス) で across_db の全関数がスタンドインを読む
+
+    python across_standin.py                         # サンプル作成
+    python across_standin.py synthetic [製番数] [シード]  # 大量データ作成＋across_db のベンチマーク
+"""
+
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import across_mirror  # noqa: F401  SQLiteの日付・Decimal変換を登録する
+
+
+# ビューごとの列定義（列名, 宣言型）
+STANDIN_VIEWS = {
+    'V_D受注': [
+        ('製番', 'TEXT'), ('品名', 'TEXT'), ('得意先略称', 'TEXT'), ('メモ２', 'TEXT'),
+    ],
+    'V_D手配リスト': [
+        ('製番', 'TEXT'), ('担当者', 'TEXT'), ('ページNo', 'INTEGER'), ('行No', 'INTEGER'),
+        ('部品No', 'TEXT'), ('階層', 'INTEGER'), ('品目CD', 'TEXT'), ('品名', 'TEXT'),
+        ('仕様１', 'TEXT'), ('仕様２', 'TEXT'), ('手配区分CD', 'TEXT'), ('手配区分', 'TEXT'),
+        ('メーカー', 'TEXT'), ('材質', 'TEXT'), ('員数', 'DECIMAL'), ('必要数', 'DECIMAL'),
+        ('手配数', 'DECIMAL'), ('単位', 'TEXT'), ('備考', 'TEXT'), ('日付', 'TIMESTAMP'),
+    ],
+    'V_D発注': [
+        ('発注番号', 'TEXT'), ('製番', 'TEXT'), ('品名', 'TEXT'), ('仕様１', 'TEXT'),
+        ('仕様２', 'TEXT'), ('手配区分CD', 'TEXT'), ('手配区分', 'TEXT'), ('材質', 'TEXT'),
+        ('仕入先CD', 'TEXT'), ('仕入先名', 'TEXT'), ('仕入先略称', 'TEXT'), ('発注数', 'DECIMAL'),
+        ('単位', 'TEXT'), ('発注単価', 'DECIMAL'), ('発注金額', 'DECIMAL'), ('発注日', 'TIMESTAMP'),
+        ('納期', 'TIMESTAMP'), ('回答納期', 'TIMESTAMP'), ('備考', 'TEXT'),
+    ],
+    'V_D発注残': [
+        ('発注番号', 'TEXT'), ('製番', 'TEXT'), ('品名', 'TEXT'), ('仕様１', 'TEXT'),
+        ('発注数', 'DECIMAL'), ('単位', 'TEXT'), ('仕入先略称', 'TEXT'), ('仕入先CD', 'TEXT'),
+        ('納期', 'TIMESTAMP'), ('手配区分', 'TEXT'), ('納入済数', 'DECIMAL'), ('納入済金額', 'DECIMAL'),
+    ],
+    'V_D仕入': [
+        ('発注番号', 'TEXT'), ('製番', 'TEXT'), ('品名', 'TEXT'), ('仕様１', 'TEXT'),
+        ('納入日', 'TIMESTAMP'), ('納入数', 'DECIMAL'), ('単位', 'TEXT'), ('仕入先略称', 'TEXT'),
+    ],
+    'V_D未発注': [
+        ('製番', 'TEXT'), ('品名', 'TEXT'), ('仕様１', 'TEXT'), ('仕様２', 'TEXT'),
+        ('手配区分CD', 'TEXT'), ('手配区分', 'TEXT'), ('メーカー', 'TEXT'), ('材質', 'TEXT'),
+        ('仕入先CD', 'TEXT'), ('仕入先略称', 'TEXT'), ('発注数', 'DECIMAL'), ('単位', 'TEXT'),
+        ('納期', 'TIMESTAMP'), ('備考', 'TEXT'), ('ページNo', 'INTEGER'), ('行No', 'INTEGER'),
+        ('階層', 'INTEGER'),
+    ],
+}
+
+
+def _d(text):
+    return datetime.strptime(text, '%Y-%m-%d')
+
+
+# サンプル行（2製番・ユニット1つずつの最小構成、列は STANDIN_VIEWS の順）
+STANDIN_ROWS = {
+    'V_D受注': [
+        ('MHT0620', '自動搬送装置', 'A社', ''),
+        ('MHT0621', '検査装置', 'B社', '試作'),
+    ],
+    'V_D手配リスト': [
+        ('MHT0620', '山田', 1, 1, '1', 1, 'U001', 'フレームユニット', 'UNIT-A', '', '11', '加工品',
+         '', 'UNIT-A', Decimal('1'), Decimal('1'), Decimal('1'), '式', '', _d('2026-09-01')),
+        ('MHT0620', '山田', 1, 2, '2', 2, 'P001', 'ベースプレート', 'NKA-001', '', '13', '追加工',
+         '', 'UNIT-A', Decimal('1'), Decimal('2'), Decimal('2'), '個', '', _d('2026-09-01')),
+        ('MHT0620', '山田', 1, 3, '3', 2, 'P002', 'ボルト', 'M8x20', '', '15', '在庫部品',
+         'ミスミ', 'UNIT-A', Decimal('4'), Decimal('8'), Decimal('8'), '本', '', _d('2026-09-02')),
+        ('MHT0621', '佐藤', 1, 1, '1', 1, 'U002', '検査ユニット', 'UNIT-B', '', '11', '加工品',
+         '', 'UNIT-B', Decimal('1'), Decimal('1'), Decimal('1'), '式', '', _d('2026-09-05')),
+    ],
+    'V_D発注': [
+        ('00089001', 'MHT0620', 'フレームユニット', 'UNIT-A', '', '11', '加工品', 'UNIT-A',
+         'MHT', '自社工場', 'MHT', Decimal('1'), '式', Decimal('0'), Decimal('0'),
+         _d('2026-09-03'), _d('2026-10-01'), None, ''),
+        ('00089002', 'MHT0620', 'ベースプレート', 'NKA-001', '', '13', '追加工', 'UNIT-A',
+         'S01', '精密工業', '精密', Decimal('2'), '個', Decimal('1500'), Decimal('3000'),
+         _d('2026-09-03'), _d('2026-09-25'), _d('2026-09-24'), ''),
+        ('00089003', 'MHT0621', '検査ユニット', 'UNIT-B', '', '11', '加工品', 'UNIT-B',
+         'MHT', '自社工場', 'MHT', Decimal('1'), '式', Decimal('0'), Decimal('0'),
+         _d('2026-09-06'), _d('2026-10-10'), None, ''),
+    ],
+    'V_D発注残': [
+        ('00089001', 'MHT0620', 'フレームユニット', 'UNIT-A', Decimal('1'), '式', 'MHT', 'MHT',
+         _d('2026-10-01'), '加工品', Decimal('0'), Decimal('0')),
+        ('00089002', 'MHT0620', 'ベースプレート', 'NKA-001', Decimal('2'), '個', '精密', 'S01',
+         _d('2026-09-25'), '追加工', Decimal('1'), Decimal('1500')),
+        ('00089003', 'MHT0621', '検査ユニット', 'UNIT-B', Decimal('1'), '式', 'MHT', 'MHT',
+         _d('2026-10-10'), '加工品', Decimal('0'), Decimal('0')),
+    ],
+    'V_D仕入': [
+        ('00089002', 'MHT0620', 'ベースプレート', 'NKA-001', _d('2026-09-24'), Decimal('1'), '個', '精密'),
+    ],
+    'V_D未発注': [
+        ('MHT0621', '治具プレート', 'JIG-01', '', '11', '加工品', '', 'SS400', 'MHT', 'MHT',
+         Decimal('1'), '個', _d('2026-10-15'), '', 1, 2, 2),
+    ],
+}
+
+
+# 検索条件に使われる列の索引（実DB側のビューの元テーブルにある索引に相当）
+STANDIN_INDEXES = {
+    'V_D受注': ['製番'],
+    'V_D手配リスト': ['製番', '日付'],
+    'V_D発注': ['発注番号', '製番'],
+    'V_D発注残': ['発注番号', '製番', '納期'],
+    'V_D仕入': ['発注番号', '製番', '納入日'],
+    'V_D未発注': ['製番'],
+}
+
+
+def _open_new(path):
+    """既存ファイルを消して新しいSQLiteファイルを開き、6ビュー分のテーブルを作成"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    conn = sqlite3.connect(str(path))
+    for view, columns in STANDIN_VIEWS.items():
+        column_sql = ', '.join(f'"{name}" {decl}' for name, decl in columns)
+        conn.execute(f'CREATE TABLE "{view}" ({column_sql})')
+    return conn
+
+
+def _insert(conn, view, rows):
+    if rows:
+        placeholders = ','.join(['?' for _ in STANDIN_VIEWS[view]])
+        conn.executemany(f'INSERT INTO "{view}" VALUES ({placeholders})', rows)
+
+
+def _create_indexes(conn):
+    for view, columns in STANDIN_INDEXES.items():
+        for n, column in enumerate(columns):
+            conn.execute(f'CREATE INDEX "ix_{view}_{n}" ON "{view}" ("{column}")')
+    conn.execute('ANALYZE')
+
+
+def create_standin_database(path, rows=None):
+    """
+    スタンドインのビューセットをSQLiteファイルに作成（既存ファイルは作り直す）
+
+    Args:
+        path: 作成するファイルパス
+        rows: {ビュー名: 行タプルのリスト}（Noneで STANDIN_ROWS）
+
+    Returns:
+        Path: 作成したファイルパス
+    """
+    rows = STANDIN_ROWS if rows is None else rows
+    conn = _open_new(path)
+    try:
+        for view in STANDIN_VIEWS:
+            _insert(conn, view, rows.get(view, []))
+        _create_indexes(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return Path(path)
+
+
+# ========================================
+# 大量データの生成（ベンチマーク用）
+# ========================================
+
+_PRODUCTS = ['自動搬送装置', '検査装置', '組立装置', '溶接治具', '搬送コンベア', '包装機', '洗浄装置', '試験装置']
+_CUSTOMERS = ['A社', 'B社', 'C社', 'D社', 'E社', 'F社']
+_SUPPLIERS = [('S01', '精密工業', '精密'), ('S02', '山田製作所', '山田'), ('S03', '東洋鋼材', '東洋'),
+              ('S04', '北村機工', '北村'), ('S05', '中央板金', '中央')]
+_INTERNAL = ('MHT', '自社工場', 'MHT')
+_MATERIALS = ['SS400', 'S45C', 'A5052', 'SUS304', 'MCナイロン']
+_STOCK_PARTS = [('ボルト', 'M8x20', 'ミスミ', '本'), ('ナット', 'M8', 'ミスミ', '個'),
+                ('平行ピン', 'D6x20', 'ミスミ', '本'), ('ベアリング', '6204ZZ', 'NTN', '個')]
+_STAFF = ['山田', '佐藤', '鈴木', '高橋']
+
+# 部品の手配区分（CD, 名称, 構成比）
+_PART_TYPES = [('13', '加工用ブランク', 0.5), ('11', '追加工', 0.25), ('15', '在庫部品', 0.25)]
+
+
+def _synthetic_seiban(rng, seiban, order_date, today, next_order_number, parts_per_seiban):
+    """
+    1製番分の行を6ビュー分生成
+
+    Returns:
+        tuple: ({ビュー名: 行リスト}, 次の発注番号)
+    """
+    rows = {view: [] for view in STANDIN_VIEWS}
+    rows['V_D受注'].append((seiban, rng.choice(_PRODUCTS), rng.choice(_CUSTOMERS),
+                            '試作' if rng.random() < 0.1 else ''))
+
+    unit_count = rng.randint(1, 4)
+    per_unit = max(1, parts_per_seiban // unit_count)
+    staff = rng.choice(_STAFF)
+    page = 1
+    for u in range(unit_count):
+        unit = f'UNIT-{chr(65 + u)}'
+        tehai_date = order_date - timedelta(days=rng.randint(1, 10))
+        line = 1
+        unit_rows = [('U%03d' % (u + 1), f'ユニット{chr(65 + u)}', unit, '', '11', '追加工', '', 1, 1, '式')]
+        for p in range(per_unit):
+            code, type_name = rng.choices([t[:2] for t in _PART_TYPES],
+                                          weights=[t[2] for t in _PART_TYPES])[0]
+            count = rng.choice([1, 1, 1, 2, 2, 4, 8])
+            if code == '15':
+                name, spec1, maker, unit_measure = rng.choice(_STOCK_PARTS)
+                unit_rows.append(('P%05d' % p, name, spec1, '', code, type_name, maker, count, 1, unit_measure))
+            else:
+                spec1 = f'NKA-{rng.randint(0, 99999):05d}-00-00'
+                name = rng.choice(['ベースプレート', 'ブラケット', 'カバー', 'シャフト', 'ブロック', 'ガイド'])
+                unit_rows.append(('P%05d' % p, name, spec1, rng.choice(_MATERIALS), code, type_name,
+                                  '', count, 1, '個'))
+
+        for level, (item_cd, name, spec1, spec2, code, type_name, maker, count, member, unit_measure) in \
+                enumerate(unit_rows):
+            hierarchy = 1 if level == 0 else 2
+            quantity = Decimal(count)
+            rows['V_D手配リスト'].append((
+                seiban, staff, page, line, str(line), hierarchy, item_cd, name, spec1, spec2, code, type_name,
+                maker, unit, Decimal(member), quantity, quantity, unit_measure, '', tehai_date
+            ))
+            line += 1
+            if line > 40:
+                page, line = page + 1, 1
+
+            # 在庫部品は発注しない。社内加工品の一部は未発注のまま
+            if code == '15':
+                continue
+            due = order_date + timedelta(days=rng.randint(14, 60))
+            internal = code == '11'
+            supplier = _INTERNAL if internal else rng.choice(_SUPPLIERS)
+            if internal and rng.random() < 0.3:
+                rows['V_D未発注'].append((
+                    seiban, name, spec1, spec2, code, type_name, maker, unit, supplier[0], supplier[2],
+                    quantity, unit_measure, due, '', page, line, hierarchy
+                ))
+                continue
+
+            order_number = f'{next_order_number:08d}'
+            next_order_number += 1
+            price = Decimal(0) if internal else Decimal(rng.randrange(500, 50000, 100))
+            # 1割は材質なしで発注（製番+仕様１の Fallback マッチになる）
+            material = '' if rng.random() < 0.1 else unit
+            reply = due - timedelta(days=rng.randint(0, 5)) if rng.random() < 0.4 else None
+            rows['V_D発注'].append((
+                order_number, seiban, name, spec1, spec2, code, type_name, material,
+                supplier[0], supplier[1], supplier[2], quantity, unit_measure, price, price * quantity,
+                order_date, due, reply, ''
+            ))
+
+            # 納期を過ぎたものは大半が納入済み（一部分納）、先のものは未納
+            delivered = Decimal(0)
+            if due <= today and rng.random() < 0.9:
+                splits = [quantity] if quantity < 2 or rng.random() < 0.8 else \
+                    [quantity // 2, quantity - quantity // 2]
+                received = due - timedelta(days=rng.randint(0, 7))
+                for split in splits:
+                    rows['V_D仕入'].append((order_number, seiban, name, spec1, received, split,
+                                            unit_measure, supplier[2]))
+                    delivered += split
+                    received += timedelta(days=rng.randint(1, 5))
+                    if received > today:
+                        break
+            if delivered < quantity:
+                rows['V_D発注残'].append((
+                    order_number, seiban, name, spec1, quantity, unit_measure, supplier[2], supplier[0],
+                    due, type_name, delivered, price * delivered
+                ))
+        page += 1
+
+    return rows, next_order_number
+
+
+def generate_synthetic_database(path, seibans=5000, parts_per_seiban=75, seed=0, today=None,
+                                span_days=720, first_seiban=1, first_order_number=100000):
+    """
+    再現可能な大量データのスタンドインを作成（既存ファイルは作り直す）
+
+    製番は MHT0001 から連番で、製番が新しいほど発注日が新しい（最新製番の発注日が today）。
+    部品は加工用ブランク・追加工・在庫部品を 2:1:1 で含み、発注・分納・発注残・未発注の
+    比率は実データの傾向に合わせている
+
+    Args:
+        path: 作成するファイルパス
+        seibans: 製番数
+        parts_per_seiban: 製番あたりの部品数（目安、ユニット行は別）
+        seed: 乱数シード（同じシード・件数なら同じデータ）
+        today: 基準日（Noneで今日）。納期がこれ以前の発注は大半が納入済みになる
+        span_days: 最古製番から最新製番までの発注日の幅（日）
+
+    Returns:
+        dict: {ビュー名: 行数}
+    """
+    rng = random.Random(seed)
+    today = today or datetime.combine(date.today(), datetime.min.time())
+    counts = {view: 0 for view in STANDIN_VIEWS}
+    next_order_number = first_order_number
+
+    conn = _open_new(path)
+    try:
+        for n in range(seibans):
+            seiban = f'MHT{first_seiban + n:04d}'
+            order_date = today - timedelta(days=span_days * (seibans - 1 - n) // max(seibans - 1, 1))
+            rows, next_order_number = _synthetic_seiban(rng, seiban, order_date, today,
+                                                        next_order_number, parts_per_seiban)
+            for view, view_rows in rows.items():
+                _insert(conn, view, view_rows)
+                counts[view] += len(view_rows)
+        _create_indexes(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return counts
+
+
+def apply_sample_changes(path):
+    """
+    差分同期の確認用に、Across側の典型的な更新をスタンドインに反映
+
+    - 新規発注（発注番号の追加）
+    - 分納の検収（V_D仕入の追加と V_D発注残 の納入済数の書き換え）
+    - 手配リストへの行追加・新規製番の受注
+    """
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute('INSERT INTO "V_D発注" VALUES (' + ','.join(['?'] * 19) + ')', (
+            '00089004', 'MHT0621', '治具プレート', 'JIG-01', '', '11', '加工品', 'SS400',
+            'MHT', '自社工場', 'MHT', Decimal('1'), '個', Decimal('0'), Decimal('0'),
+            _d('2026-09-20'), _d('2026-10-15'), None, ''
+        ))
+        conn.execute('INSERT INTO "V_D仕入" VALUES (?,?,?,?,?,?,?,?)', (
+            '00089002', 'MHT0620', 'ベースプレート', 'NKA-001', _d('2026-09-28'), Decimal('1'), '個', '精密'
+        ))
+        conn.execute('UPDATE "V_D発注残" SET 納入済数 = ?, 納入済金額 = ? WHERE 発注番号 = ?',
+                     (str(Decimal('2')), str(Decimal('3000')), '00089002'))
+        conn.execute('INSERT INTO "V_D手配リスト" VALUES (' + ','.join(['?'] * 20) + ')', (
+            'MHT0621', '佐藤', 1, 2, '2', 2, 'P010', 'カバー', 'NKA-010', '', '13', '追加工',
+            '', 'UNIT-B', Decimal('1'), Decimal('1'), Decimal('1'), '個', '', _d('2026-09-21')
+        ))
+        conn.execute('INSERT INTO "V_D受注" VALUES (?,?,?,?)', ('MHT0622', '組立装置', 'C社', ''))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def connect(path):
+    """スタンドインへの across_db 互換の読み取り専用接続 (接続, カーソル)"""
+    return across_mirror.open_sqlite(path)
+
+
+def run_benchmark(path, repeat=3):
+    """
+    スタンドインに接続先を切り替えて across_db の主な関数を計測
+
+    Returns:
+        list: [(処理名, 最短秒数, 件数の目安), ...]
+    """
+    import across_db
+
+    across_db.configure_backend('standin', path)
+    conn, cursor = connect(path)
+    cursor.execute("SELECT 製番 FROM dbo.[V_D受注] ORDER BY 製番 DESC")
+    seibans = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT MAX(発注番号) FROM dbo.[V_D発注]")
+    last_order = cursor.fetchone()[0]
+    conn.close()
+    latest, recent = seibans[0], seibans[:200]
+
+    across_db.check_db_updates()  # 更新検知のベースライン作成（計測対象外）
+
+    cases = [
+        ('query_view 製番', lambda: across_db.query_view('V_D発注', '製番 = ?', [latest], 500)['count']),
+        ('order-detail 発注番号', lambda: len(across_db.search_order(last_order)['rows'])),
+        ('merge_test_by_seiban', lambda: across_db.merge_test_by_seiban(latest)['stats']['tehai_count']),
+        ('merge_from_db', lambda: len(across_db.merge_from_db(latest, mode='python'))),
+        ('merge_from_db SQL照合', lambda: len(across_db.merge_from_db(latest, mode='sql'))),
+        ('fetch_merge_sources 20製番', lambda: sum(len(source['tehai']) for source in
+            across_db.fetch_merge_sources(seibans[:20], mode='python').values())),
+        ('fetch_merge_sources 20製番 SQL照合', lambda: sum(len(source['merged']) for source in
+            across_db.fetch_merge_sources(seibans[:20], mode='sql').values())),
+        ('search_zaiko_buhin 全製番', lambda: across_db.search_zaiko_buhin()['count']),
+        ('get_delivery_schedule 7日', lambda: across_db.get_delivery_schedule_from_db(days=7)['total']),
+        ('check_seiban_counts 200製番', lambda: len(across_db.check_seiban_counts(recent)['results'])),
+        ('check_db_updates 差分', lambda: across_db.check_db_updates().get('has_updates')),
+        ('get_seiban_list_from_db', lambda: across_db.get_seiban_list_from_db()['count']),
+    ]
+
+    results = []
+    for name, func in cases:
+        best, value = None, None
+        try:
+            for _ in range(repeat):
+                across_db.invalidate_result_cache()
+                start = time.perf_counter()
+                value = func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        except Exception as e:
+            value = f'エラー: {e}'
+        results.append((name, best, value))
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'synthetic':
+        seiban_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+        seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        target = Path('cache') / 'across_standin_synthetic.db'
+        start = time.perf_counter()
+        counts = generate_synthetic_database(target, seibans=seiban_count, seed=seed)
+        print(f"作成: {target}（{time.perf_counter() - start:.1f}秒、シード {seed}）")
+        for view, count in counts.items():
+            print(f"  {view}: {count}行")
+
+        print("across_db ベンチマーク（3回中の最短）")
+        for name, elapsed, value in run_benchmark(target):
+            timing = f"{elapsed * 1000:9.1f} ms" if elapsed is not None else '        - ms'
+            print(f"  {name:<28} {timing}  {value}")
+        sys.exit(0)
+
+    target = Path('cache') / 'across_standin.db'
+    create_standin_database(target)
+    conn, cursor = connect(target)
+    for view in STANDIN_VIEWS:
+        cursor.execute(f"SELECT COUNT(*) FROM dbo.[{view}]")
+        print(f"{view}: {cursor.fetchone()[0]}行")
+    conn.close()
+    print(f"作成: {target}")
@@ -2,7 +2,7 @@
 Flask Web Application for 手配発注マージシステム
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, session
+from flask import Flask, render_template, request, jsonify, send_file, session, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta, timezone
 import pandas as pd
@@ -22,10 +22,10 @@ import qrcode
 import io
 from io import BytesIO
 import base64
+import bisect
 import threading
 import time
 import shutil
-import pyodbc
 from pathlib import Path
 import pytz
 from datetime import datetime, timedelta, timezone
@@ -38,7 +38,9 @@ from openpyxl.worksheet.page import PageMargins
 from openpyxl.chart import BarChart, Reference
 import glob
 from PIL import Image
-from utils import Constants, DataUtils, MekkiUtils, ExcelStyler, generate_qr_code, create_gantt_chart_sheet, EmailSender, DeliveryUtils
+from utils import Constants, DataUtils, MekkiUtils, ExcelStyler, generate_qr_code, create_gantt_chart_sheet, EmailSender, DeliveryUtils, MergeUtils, ExcelReader
+from services.cache_service import get_sheet_names_cached, load_sheet_cached, load_column_cached
+from services import update_notifier, seiban_master
 
 
 app = Flask(__name__)
@@ -237,6 +239,37 @@ class ReceivedHistory(db.Model):
             is_received=True
         ).first()
 
+    # IN句1回あたりの発注番号数（SQLiteのバインド変数上限999未満）
+    LOOKUP_CHUNK_SIZE = 500
+
+    @classmethod
+    def load_received_map(cls, order_numbers):
+        """
+        発注番号群の受入履歴をまとめて取得（取込時の受入状態復元用）
+
+        Args:
+            order_numbers: 発注番号のリスト
+
+        Returns:
+            dict: {(発注番号, 品名, 仕様1, 数量): (received_at, received_quantity)}
+                  （同一キーは先に登録された履歴を優先）
+        """
+        order_numbers = sorted({n for n in order_numbers if n})
+        received_map = {}
+        for i in range(0, len(order_numbers), cls.LOOKUP_CHUNK_SIZE):
+            chunk = order_numbers[i:i + cls.LOOKUP_CHUNK_SIZE]
+            rows = db.session.query(
+                cls.order_number, cls.item_name, cls.spec1, cls.quantity,
+                cls.received_at, cls.received_quantity
+            ).filter(
+                cls.order_number.in_(chunk),
+                cls.is_received == True
+            ).order_by(cls.id).all()
+            for order_number, item_name, spec1, quantity, received_at, received_quantity in rows:
+                received_map.setdefault((order_number, item_name, spec1, quantity),
+                                        (received_at, received_quantity))
+        return received_map
+
 
 class EditLog(db.Model):
     """編集ログテーブル"""
@@ -625,56 +658,6 @@ def get_cad_file_info(spec1):
         'has_pdf': len(pdf_files) > 0
     }
 
-def load_seiban_info():
-    """製番情報を取得（V_D受注DBから取得、フォールバックでExcel）"""
-    try:
-        # まずDBから取得を試みる
-        result = across_db.get_seiban_list_from_db()
-        if result.get('success') and result.get('items'):
-            # DB結果を辞書形式に変換
-            seiban_info = {}
-            for item in result['items']:
-                seiban = item.get('seiban', '')
-                if seiban:
-                    seiban_info[seiban] = {
-                        'product_name': item.get('product_name', ''),
-                        'customer_abbr': item.get('customer_name', ''),  # customer_name → customer_abbr
-                        'memo2': item.get('memo2', '')
-                    }
-            print(f"製番情報をDBから取得: {len(seiban_info)}件")
-            return seiban_info
-    except Exception as e:
-        print(f"DB取得エラー、Excelにフォールバック: {str(e)}")
-
-    # DBが使えない場合はExcelから読み込み（フォールバック）
-    try:
-        seiban_file = app.config.get('SEIBAN_LIST_PATH', r'\\server3\share-data\Document\Acrossデータ\製番一覧表.xlsx')
-        seiban_path = Path(seiban_file)
-
-        if not seiban_path.exists():
-            print(f"製番一覧表が見つかりません: {seiban_path}")
-            return {}
-
-        # Excelファイルを読み込み
-        df = pd.read_excel(str(seiban_path), sheet_name='製番')
-
-        # 製番と情報の辞書を作成
-        seiban_info = {}
-        for _, row in df.iterrows():
-            if pd.notna(row.get('製番')):
-                seiban_info[str(row['製番'])] = {
-                    'product_name': str(row.get('品名', '')) if pd.notna(row.get('品名')) else '',
-                    'customer_abbr': str(row.get('得意先略称', '')) if pd.notna(row.get('得意先略称')) else '',
-                    'memo2': str(row.get('メモ２', '')) if pd.notna(row.get('メモ２')) else ''
-                }
-
-        print(f"製番情報をExcelから取得: {len(seiban_info)}件")
-        return seiban_info
-    except Exception as e:
-        print(f"製番一覧表読み込みエラー: {str(e)}")
-        return {}
-
-
 def extract_seiban_from_filename(filename):
     """Extract seiban (MHTxxxx) from filename"""
     pattern = r'(MHT\d{4})'
@@ -684,23 +667,14 @@ def extract_seiban_from_filename(filename):
 def process_excel_file(file_path, sheet1_name, sheet2_name, seiban_prefix, order_date_from=None, order_date_to=None):
     """Process Excel file and merge data"""
     try:
-        df1 = pd.read_excel(file_path, sheet_name=sheet1_name, header=0)
-        df2 = pd.read_excel(file_path, sheet_name=sheet2_name, header=0)
+        # 必要な列だけを読み込み（解析結果は cache/ に保存し、同じファイルの再処理では再解析しない）
+        df1 = load_sheet_cached(file_path, sheet1_name, ExcelReader.TEHAI_COLUMNS, seiban_prefix)
+        df2 = load_sheet_cached(file_path, sheet2_name, ExcelReader.HATCHU_COLUMNS, seiban_prefix)
         
         # デバッグ情報
         print(f"=== デバッグ情報 ===")
         print(f"検索製番: {seiban_prefix}")
-        print(f"シート1名: {sheet1_name}, 件数: {len(df1)}件")
-        print(f"シート2名: {sheet2_name}, 件数: {len(df2)}件")
-        
-        # 製番の前処理（空白除去）
-        df1['製番'] = df1['製番'].astype(str).str.strip()
-        df2['製番'] = df2['製番'].astype(str).str.strip()
-        
-        # 製番でフィルタリング
-        df1 = df1[df1['製番'].str.startswith(seiban_prefix, na=False)]
-        df2 = df2[df2['製番'].str.startswith(seiban_prefix, na=False)]
-        
+        print(f"シート1名: {sheet1_name}, シート2名: {sheet2_name}")
         print(f"製番フィルタ({seiban_prefix})後: シート1={len(df1)}件, シート2={len(df2)}件")
         print(f"===================")
         
@@ -712,192 +686,258 @@ def process_excel_file(file_path, sheet1_name, sheet2_name, seiban_prefix, order
         traceback.print_exc()
         raise Exception(f"Error processing Excel: {str(e)}")
 
+def prepare_order_dataframe(df2, order_date_from=None, order_date_to=None):
+    """
+    発注データの前処理（発注日フィルタ・コード列の正規化・納期の日付変換）
+
+    一括取込では全製番分をまとめて1回だけ行う
+    """
+    df2 = df2.fillna('')
+
+    if (order_date_from or order_date_to) and '発注日' in df2.columns:
+        print(f"発注日フィルタ適用:")
+        df2['発注日'] = pd.to_datetime(df2['発注日'], errors='coerce')
+        before_count = len(df2)
+
+        if order_date_from:
+            filter_date_from = pd.to_datetime(order_date_from)
+            df2 = df2[df2['発注日'] >= filter_date_from]
+            print(f"  開始日: {order_date_from}以降")
+
+        if order_date_to:
+            filter_date_to = pd.to_datetime(order_date_to)
+            df2 = df2[df2['発注日'] <= filter_date_to]
+            print(f"  終了日: {order_date_to}まで")
+
+        after_count = len(df2)
+        print(f"発注日フィルタ: {before_count}件 → {after_count}件 ({before_count - after_count}件除外)")
+
+    # 発注番号・手配区分CD・仕入先CDを正規化文字列に一括変換（以降のセル単位の変換は不要）
+    df2 = DataUtils.normalize_code_columns(df2)
+
+    if '納期' in df2.columns:
+        df2.loc[df2['納期'] != '', '納期'] = pd.to_datetime(
+            df2.loc[df2['納期'] != '', '納期'],
+            errors='coerce'
+        )
+    return df2
+
+
+def merge_tehai_dataframe(df1, df2, order_index=None):
+    """
+    手配リストに前処理済みの発注データをマージ
+
+    Args:
+        df1: 手配リスト（DataFrame）
+        df2: prepare_order_dataframe() 済みの発注データ
+        order_index: MergeUtils.index_dataframe(df2) 済みの索引（一括取込で全製番に使い回す）
+    """
+    df1 = DataUtils.normalize_code_columns(df1.fillna(''))
+
+    # 仕入先CD用の列を初期化
+    if '仕入先CD' not in df1.columns:
+        df1['仕入先CD'] = ''
+
+    # Merge data（発注データのキー索引を一度だけ構築して結合）
+    positions, match_types, match_stats = MergeUtils.match_dataframes(df1, df2, index=order_index)
+    df1 = MergeUtils.apply_order_columns(df1, df2, positions, match_types)
+    print(f"マージ結果: 材質+仕様１={match_stats['primary']}件, 仕様１(+区分)={match_stats['fallback']}件, "
+          f"未マッチ={match_stats['unmatched']}件")
+
+    # Reorder columns（仕入先CDを含める - DB保存用）
+    cols = ['納期', '仕入先略称', '仕入先CD', '発注番号', '手配数', '単位', '品名', '仕様１', '仕様２',
+            '品目CD', '手配区分CD', '手配区分', 'メーカー', '備考', '員数', '必要数', '製番', '材質', 'match_type']
+    cols = [c for c in cols if c in df1.columns]
+    df1 = df1[cols]
+
+    if '発注番号' in df1.columns:
+        df1_with_order = df1[df1['発注番号'] != '']
+        df1_without_order = df1[df1['発注番号'] == '']
+
+        if not df1_with_order.empty:
+            df1_with_order = df1_with_order.sort_values('発注番号')
+
+        df1 = pd.concat([df1_with_order, df1_without_order], ignore_index=True)
+
+    return df1
+
+
 def process_excel_file_from_dataframes(df1, df2, seiban_prefix, order_date_from=None, order_date_to=None):
     """Process dataframes and merge data"""
     try:
-        df1 = df1.fillna('')
-        df2 = df2.fillna('')
-        
-        if (order_date_from or order_date_to) and '発注日' in df2.columns:
-            print(f"発注日フィルタ適用:")
-            df2['発注日'] = pd.to_datetime(df2['発注日'], errors='coerce')
-            before_count = len(df2)
-            
-            if order_date_from:
-                filter_date_from = pd.to_datetime(order_date_from)
-                df2 = df2[df2['発注日'] >= filter_date_from]
-                print(f"  開始日: {order_date_from}以降")
-            
-            if order_date_to:
-                filter_date_to = pd.to_datetime(order_date_to)
-                df2 = df2[df2['発注日'] <= filter_date_to]
-                print(f"  終了日: {order_date_to}まで")
-            
-            after_count = len(df2)
-            print(f"発注日フィルタ: {before_count}件 → {after_count}件 ({before_count - after_count}件除外)")
-        
-        if '発注番号' in df1.columns:
-            df1['発注番号'] = df1['発注番号'].apply(lambda x: str(int(float(x))) if isinstance(x, (int, float)) and x != '' else str(x))
-        if '発注番号' in df2.columns:
-            df2['発注番号'] = df2['発注番号'].apply(lambda x: str(int(float(x))) if isinstance(x, (int, float)) and x != '' else str(x))
-        
-        if '手配区分CD' in df1.columns:
-            df1['手配区分CD'] = df1['手配区分CD'].apply(lambda x: str(int(float(x))) if isinstance(x, (int, float)) and x != '' else str(x))
-        if '手配区分CD' in df2.columns:
-            df2['手配区分CD'] = df2['手配区分CD'].apply(lambda x: str(int(float(x))) if isinstance(x, (int, float)) and x != '' else str(x))
-        
-        # 仕入先CDも文字列に変換
-        if '仕入先CD' in df2.columns:
-            df2['仕入先CD'] = df2['仕入先CD'].apply(lambda x: str(int(float(x))) if isinstance(x, (int, float)) and x != '' else str(x))
-        
-        if '納期' in df2.columns:
-            df2.loc[df2['納期'] != '', '納期'] = pd.to_datetime(
-                df2.loc[df2['納期'] != '', '納期'], 
-                errors='coerce'
-            )
-        
-        # 仕入先CD用の列を初期化
-        if '仕入先CD' not in df1.columns:
-            df1['仕入先CD'] = ''
-        
-        # Merge data
-        for i, row in df1.iterrows():
-            matched = False
-            
-            if all(col in row for col in ['材質', '仕様１', '製番']):
-                if row['材質'] and row['仕様１'] and row['製番']:
-                    cond = ((df2['材質'] == row['材質']) &
-                           (df2['仕様１'] == row['仕様１']) &
-                           (df2['製番'] == row['製番']))
-                    match = df2[cond]
-                    if not match.empty:
-                        matched = True
-                        if '発注番号' in match.columns:
-                            df1.at[i, '発注番号'] = str(match['発注番号'].iloc[0])
-                        if '仕入先略称' in match.columns:
-                            df1.at[i, '仕入先略称'] = match['仕入先略称'].iloc[0]
-                        if '仕入先CD' in match.columns:
-                            df1.at[i, '仕入先CD'] = str(match['仕入先CD'].iloc[0])
-                        if '納期' in match.columns:
-                            try:
-                                if pd.notna(match['納期'].iloc[0]) and match['納期'].iloc[0] != '':
-                                    df1.at[i, '納期'] = match['納期'].dt.strftime('%y/%m/%d').iloc[0]
-                            except:
-                                df1.at[i, '納期'] = str(match['納期'].iloc[0])
-            
-            if not matched and all(col in row for col in ['製番', '仕様１', '手配区分']):
-                if row['製番'] and row['仕様１']:
-                    cond = ((df2['製番'] == row['製番']) &
-                           (df2['仕様１'] == row['仕様１']))
-                    if row['手配区分'] and '手配区分' in df2.columns:
-                        cond = cond & (df2['手配区分'] == row['手配区分'])
-                    
-                    match = df2[cond]
-                    if not match.empty:
-                        if '発注番号' in match.columns:
-                            df1.at[i, '発注番号'] = str(match['発注番号'].iloc[0])
-                        if '仕入先略称' in match.columns:
-                            df1.at[i, '仕入先略称'] = match['仕入先略称'].iloc[0]
-                        if '仕入先CD' in match.columns:
-                            df1.at[i, '仕入先CD'] = str(match['仕入先CD'].iloc[0])
-                        if '納期' in match.columns:
-                            try:
-                                if pd.notna(match['納期'].iloc[0]) and match['納期'].iloc[0] != '':
-                                    df1.at[i, '納期'] = match['納期'].dt.strftime('%y/%m/%d').iloc[0]
-                            except:
-                                df1.at[i, '納期'] = str(match['納期'].iloc[0])
-        
-        # Reorder columns（仕入先CDを含める - DB保存用）
-        cols = ['納期', '仕入先略称', '仕入先CD', '発注番号', '手配数', '単位', '品名', '仕様１', '仕様２',
-                '品目CD', '手配区分CD', '手配区分', 'メーカー', '備考', '員数', '必要数', '製番', '材質']
-        cols = [c for c in cols if c in df1.columns]
-        df1 = df1[cols]
-        
-        if '発注番号' in df1.columns:
-            df1_with_order = df1[df1['発注番号'] != '']
-            df1_without_order = df1[df1['発注番号'] == '']
-            
-            if not df1_with_order.empty:
-                df1_with_order = df1_with_order.sort_values('発注番号')
-            
-            df1 = pd.concat([df1_with_order, df1_without_order], ignore_index=True)
-        
-        return df1
+        df2 = prepare_order_dataframe(df2, order_date_from, order_date_to)
+        return merge_tehai_dataframe(df1, df2)
     except Exception as e:
         raise Exception(f"Error processing dataframes: {str(e)}")
-    
-def create_order_detail_with_parts(row, order, all_received_items, safe_str, safe_int):
-    """OrderDetail作成"""
-    import pandas as pd
-    
+
+def build_order_detail_mapping(row, order_id, received_map, safe_str, safe_int):
+    """
+    OrderDetail作成用の列値dictを生成（sync_order_details() で一括反映）
+
+    Args:
+        row: マージ済みDataFrameの行
+        order_id: 親Order ID
+        received_map: 受入済みキー {(発注番号, 品名, 仕様1, 数量): (received_at, received_quantity)}
+
+    Returns:
+        dict: OrderDetailの列名 → 値
+    """
     order_type = safe_str(row.get('手配区分', ''))
     has_internal = '社内加工' in order_type or '追加工' in order_type
     
-    # 仕入先CDを取得
-    supplier_cd = row.get('仕入先CD', '')
-    if isinstance(supplier_cd, (int, float)) and not pd.isna(supplier_cd):
-        supplier_cd = str(int(supplier_cd))
-    else:
-        supplier_cd = safe_str(supplier_cd)
-    
-    detail = OrderDetail(
-        order_id=order.id,
-        delivery_date=safe_str(row.get('納期', '')),
-        supplier=safe_str(row.get('仕入先略称', '')),
-        supplier_cd=supplier_cd,  # 追加
-        order_number=DataUtils.normalize_order_number(row.get('発注番号', '')),
-        quantity=safe_int(row.get('手配数', 0)),
-        unit_measure=safe_str(row.get('単位', '')),
-        item_name=safe_str(row.get('品名', '')),
-        spec1=safe_str(row.get('仕様１', '')),
-        spec2=safe_str(row.get('仕様２', '')),
-        item_code=safe_str(row.get('品目CD', '')),
-        order_type_code=DataUtils.normalize_order_number(row.get('手配区分CD', '')),
-        order_type=order_type,
-        maker=safe_str(row.get('メーカー', '')),
-        remarks=safe_str(row.get('備考', '')),
-        member_count=safe_int(row.get('員数', 0)),
-        required_count=safe_int(row.get('必要数', 0)),
-        seiban=safe_str(row.get('製番', '')),
-        material=safe_str(row.get('材質', '')).replace('-', ''),
-        has_internal_processing=has_internal,
-        part_number=safe_str(row.get('部品No', '')),
-        page_number=safe_str(row.get('ページNo', '')),
-        row_number=safe_str(row.get('行No', '')),
-        hierarchy=safe_int(row.get('階層', 0)),
-        reply_delivery_date=safe_str(row.get('回答納期', ''))
-    )
+    # 発注番号・手配区分CD・仕入先CDは DataUtils.normalize_code_columns() で正規化済み
+    detail = {
+        'order_id': order_id,
+        'delivery_date': safe_str(row.get('納期', '')),
+        'supplier': safe_str(row.get('仕入先略称', '')),
+        'supplier_cd': safe_str(row.get('仕入先CD', '')),
+        'order_number': safe_str(row.get('発注番号', '')),
+        'quantity': safe_int(row.get('手配数', 0)),
+        'unit_measure': safe_str(row.get('単位', '')),
+        'item_name': safe_str(row.get('品名', '')),
+        'spec1': safe_str(row.get('仕様１', '')),
+        'spec2': safe_str(row.get('仕様２', '')),
+        'item_code': safe_str(row.get('品目CD', '')),
+        'order_type_code': safe_str(row.get('手配区分CD', '')),
+        'order_type': order_type,
+        'maker': safe_str(row.get('メーカー', '')),
+        'remarks': safe_str(row.get('備考', '')),
+        'member_count': safe_int(row.get('員数', 0)),
+        'required_count': safe_int(row.get('必要数', 0)),
+        'seiban': safe_str(row.get('製番', '')),
+        'material': safe_str(row.get('材質', '')).replace('-', ''),
+        'has_internal_processing': has_internal,
+        'part_number': safe_str(row.get('部品No', '')),
+        'page_number': safe_str(row.get('ページNo', '')),
+        'row_number': safe_str(row.get('行No', '')),
+        'hierarchy': safe_int(row.get('階層', 0)),
+        'reply_delivery_date': safe_str(row.get('回答納期', '')),
+        'is_received': False,
+        'received_at': None,
+        'received_quantity': None,
+        'parent_id': None,
+    }
     
-    _restore_received_status(detail, all_received_items)
+    _restore_received_status(detail, received_map)
     return detail
 
-def _restore_received_status(detail, all_received_items):
-    """受入状態復元（既存データ優先、なければReceivedHistoryから復元）"""
-    restored = False
+def _restore_received_status(detail, received_map):
+    """受入状態復元（既存データ・ReceivedHistoryを事前に読み込んだ received_map を参照、行ごとのクエリなし）"""
+    if not detail['order_number']:
+        return
+
+    key = (detail['order_number'], detail['item_name'], detail['spec1'], detail['quantity'])
+    if key in received_map:
+        detail['is_received'] = True
+        detail['received_at'], detail['received_quantity'] = received_map[key]
 
-    # 1. まず既存データ（同じ製番内）から復元を試みる
-    if detail.order_number and detail.order_number in all_received_items:
-        for received in all_received_items[detail.order_number]:
-            if (received['item_name'] == detail.item_name and
-                received['spec1'] == detail.spec1 and
-                received['quantity'] == detail.quantity):
-                detail.is_received = True
-                detail.received_at = received['received_at']
-                restored = True
-                break
+# 明細の自然キー（再取込時に既存明細と突き合わせる列）
+DETAIL_NATURAL_KEY = ('order_id', 'order_number', 'spec1', 'part_number', 'page_number', 'row_number')
 
-    # 2. 既存データで復元できなかった場合、ReceivedHistoryから復元
-    if not restored and detail.order_number:
-        history = ReceivedHistory.get_received_info(
-            order_number=detail.order_number,
-            item_name=detail.item_name,
-            spec1=detail.spec1,
-            quantity=detail.quantity
-        )
-        if history:
-            detail.is_received = True
-            detail.received_at = history.received_at
-            print(f"✅ 受入履歴から復元: 発注番号={detail.order_number}, 品名={detail.item_name}")
+# 受入操作で更新される列（既存明細が受入済みなら取込値で上書きしない）
+DETAIL_RECEIVE_FIELDS = ('is_received', 'received_at', 'received_quantity')
+
+# 数量指定の受入で備考の先頭に付ける過不足メモ（receive_detail_with_quantity）
+RECEIVE_NOTE_PATTERN = re.compile(r'【(?:不足|超過)：\d+個】')
+
+
+def _keep_receive_note(current_remarks, imported_remarks):
+    """受入済み明細の備考にある過不足メモを、取込した備考の先頭に残す"""
+    note = RECEIVE_NOTE_PATTERN.search(current_remarks or '')
+    if not note or note.group(0) in (imported_remarks or ''):
+        return imported_remarks
+    return f"{note.group(0)} {imported_remarks}" if imported_remarks else note.group(0)
+
+
+def sync_order_details(details, existing_details):
+    """
+    取込明細と既存明細を自然キーで突き合わせ、差分だけをINSERT/UPDATE/DELETEする
+
+    - 自然キー: (order_id, 発注番号, 仕様１, 部品No, ページNo, 行No)。同一キーが複数ある場合は出現順に対応付け
+    - 一致した既存明細はIDを維持し、値が変わった列のみ更新（受入済みなら受入状態・備考の過不足メモは保持）
+    - 新規明細はIDをDBに採番させて一括INSERT（親が新規の場合は親の階層を先にINSERTしてIDを確定）
+    - 取込データから消えた既存明細は削除
+
+    子のdictは '_parent' に親のdictを持たせておくと、確定した親IDが parent_id に設定される。
+
+    Args:
+        details: build_order_detail_mapping() のdictリスト
+        existing_details: 対象ユニットの既存OrderDetailリスト
+
+    Returns:
+        dict: {'inserted', 'updated', 'deleted', 'unchanged'} の件数
+    """
+    existing_by_key = {}
+    for existing in existing_details:
+        key = tuple(getattr(existing, col) or '' for col in DETAIL_NATURAL_KEY)
+        existing_by_key.setdefault(key, []).append(existing)
+
+    # 1. 既存明細との対応付け
+    matched = []
+    inserts = []
+    for detail in details:
+        key = tuple(detail[col] or '' for col in DETAIL_NATURAL_KEY)
+        candidates = existing_by_key.get(key)
+        if candidates:
+            existing = candidates.pop(0)
+            detail['id'] = existing.id
+            matched.append((detail, existing))
+        else:
+            inserts.append(detail)
+    deleted_ids = [e.id for candidates in existing_by_key.values() for e in candidates]
+
+    # 2. 新規明細のINSERT（IDはDBが採番。同時に取込んでも重複しない）
+    #    親のIDが確定した明細から順に一括INSERTし、return_defaults で採番されたIDを受け取る
+    db.session.flush()
+    pending = inserts
+    while pending:
+        ready = [d for d in pending if d.get('_parent') is None or d['_parent'].get('id') is not None]
+        if not ready:
+            raise ValueError('明細の親子関係を解決できません')
+        for detail in ready:
+            parent = detail.pop('_parent', None)
+            if parent is not None:
+                detail['parent_id'] = parent['id']
+        db.session.bulk_insert_mappings(OrderDetail, ready, return_defaults=True)
+        inserted = {id(d) for d in ready}
+        pending = [d for d in pending if id(d) not in inserted]
+
+    # 3. 既存明細の親IDの解決
+    for detail, _ in matched:
+        parent = detail.pop('_parent', None)
+        if parent is not None:
+            detail['parent_id'] = parent['id']
+
+    # 4. 変更列のみ抽出
+    updates = []
+    for detail, existing in matched:
+        changes = {}
+        for col, value in detail.items():
+            if col == 'id' or (existing.is_received and col in DETAIL_RECEIVE_FIELDS):
+                continue
+            if col == 'remarks' and existing.is_received:
+                value = _keep_receive_note(existing.remarks, value)
+            if getattr(existing, col) != value:
+                changes[col] = value
+        if changes:
+            changes['id'] = existing.id
+            updates.append(changes)
+
+    if updates:
+        db.session.bulk_update_mappings(OrderDetail, updates)
+    for i in range(0, len(deleted_ids), ReceivedHistory.LOOKUP_CHUNK_SIZE):
+        chunk = deleted_ids[i:i + ReceivedHistory.LOOKUP_CHUNK_SIZE]
+        OrderDetail.query.filter(OrderDetail.id.in_(chunk)).delete(synchronize_session=False)
+
+    # 一括操作はセッション内のオブジェクトに反映されないため再読込させる
+    db.session.expire_all()
+
+    return {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': len(deleted_ids),
+        'unchanged': len(matched) - len(updates)
+    }
             
 def update_order_status(order):
     """注文ステータス更新"""
@@ -1103,59 +1143,103 @@ def update_unit_excel_only(order_id):
         traceback.print_exc()
         return False, str(e)
     
+def pair_processed_with_blanks(processed, blanks, safe_int):
+    """
+    追加工(11)とブランク(13)の親子ペアを決定
+
+    ルール: 追加工の行No < ブランクの行No <= 追加工の行No+300, 階層差=+1
+    追加工を行No順に処理し、条件を満たす未使用ブランクのうち行No順で最初のものを採用する。
+    ブランクを階層ごとに行No順で並べ、二分探索＋使用済みスキップ（経路圧縮）で探す。
+
+    Args:
+        processed: 追加工の行リスト（行No順にソート済み）
+        blanks: ブランクの行リスト（行No順にソート済み）
+
+    Returns:
+        tuple: ([(追加工行, ブランク行 or None)], 未使用ブランク行リスト)
+    """
+    # 階層 → (行Noリスト, blanks内の位置リスト)
+    by_hierarchy = {}
+    for i, blank_row in enumerate(blanks):
+        row_nos, indices = by_hierarchy.setdefault(safe_int(blank_row.get('階層', 0)), ([], []))
+        row_nos.append(safe_int(blank_row.get('行No', 0)))
+        indices.append(i)
+
+    # 階層ごとの「次の未使用位置」（next_free[k] == k なら未使用、末尾は番兵）
+    next_free = {h: list(range(len(row_nos) + 1)) for h, (row_nos, _) in by_hierarchy.items()}
+
+    def find_free(links, k):
+        root = k
+        while links[root] != root:
+            root = links[root]
+        while links[k] != root:
+            links[k], k = root, links[k]
+        return root
+
+    pairs = []
+    used = set()
+    for proc_row in processed:
+        proc_row_no = safe_int(proc_row.get('行No', 0))
+        target = by_hierarchy.get(safe_int(proc_row.get('階層', 0)) + 1)
+        matching_blank = None
+
+        if target is not None:
+            row_nos, indices = target
+            links = next_free[safe_int(proc_row.get('階層', 0)) + 1]
+            k = find_free(links, bisect.bisect_right(row_nos, proc_row_no))
+            if k < len(row_nos) and row_nos[k] <= proc_row_no + 300:
+                links[k] = k + 1
+                used.add(indices[k])
+                matching_blank = blanks[indices[k]]
+
+        pairs.append((proc_row, matching_blank))
+
+    unused_blanks = [row for i, row in enumerate(blanks) if i not in used]
+    return pairs, unused_blanks
+
 def save_to_database(df, seiban_prefix):
-    """Save processed data to database"""
+    """Save processed data to database (returns sync_order_details() counts)"""
     try:
-        seiban_info = load_seiban_info()
-        info = seiban_info.get(seiban_prefix, {})
+        info = seiban_master.get(seiban_prefix) or {}
         product_name = info.get('product_name', '')  # 品名を取得
         customer_abbr = info.get('customer_abbr', '')  # 客先名を取得
         
         df['材質'] = df['材質'].replace('', '-')
-        materials = df['材質'].unique()
         
         cols_to_keep = ['部品No', 'ページNo', '行No', '階層']
         for col in cols_to_keep:
             if col not in df.columns:
                 df[col] = ''
         
-        all_received_items = {}
+        # 受入状態の復元用キー（既存データ優先、なければReceivedHistory）
+        received_map = {}
         existing_orders = Order.query.filter_by(seiban=seiban_prefix).all()
         for existing_order in existing_orders:
             for detail in existing_order.details:
                 if detail.is_received and detail.order_number:
-                    key = str(detail.order_number)
-                    if key not in all_received_items:
-                        all_received_items[key] = []
-                    all_received_items[key].append({
-                        'item_name': detail.item_name,
-                        'spec1': detail.spec1,
-                        'quantity': detail.quantity,
-                        'is_received': True,
-                        'received_at': detail.received_at
-                    })
+                    key = (str(detail.order_number), detail.item_name, detail.spec1, detail.quantity)
+                    received_map.setdefault(key, (detail.received_at, detail.received_quantity))
         
-        def safe_str(value):
-            if pd.isna(value) or value is None:
-                return ''
-            if isinstance(value, float) and value == value:
-                try:
-                    return str(int(value))
-                except:
-                    return str(value)
-            return str(value)
+        # ReceivedHistoryは取込対象の発注番号分をIN句でまとめて取得
+        order_numbers = df['発注番号'].astype(str).str.strip().tolist() if '発注番号' in df.columns else []
+        for key, received in ReceivedHistory.load_received_map(order_numbers).items():
+            received_map.setdefault(key, received)
         
-        def safe_int(value, default=0):
-            if pd.isna(value) or value is None:
-                return default
-            try:
-                return int(float(value))
-            except (ValueError, TypeError):
-                return default
+        safe_str = DataUtils.safe_str
+        safe_int = DataUtils.safe_int
         
-        for material in materials:
-            material_df = df[df['材質'] == material]
-            
+        # 明細は列値dictとして溜め、最後に既存明細との差分だけをまとめて反映する
+        new_details = []
+        existing_details = []
+        
+        # 1パスで 材質 → (部品No, ページNo, 材質) → 行リスト に振り分け（出現順を保持）
+        material_groups = {}
+        for row in df.to_dict('records'):
+            material = row['材質']
+            group_key = (safe_str(row.get('部品No', '')), safe_str(row.get('ページNo', '')), safe_str(material))
+            material_groups.setdefault(material, {}).setdefault(group_key, []).append(row)
+        
+        for material, part_groups in material_groups.items():
             # 🔥 ユニット名を正規化（検索と作成で統一）
             unit_name = material if material and material != '-' else ''
             
@@ -1181,21 +1265,8 @@ def save_to_database(df, seiban_prefix):
                 # order.remarks / order.image_path / order.location / order.pallet_number / order.status は変更しない
                 print(f"🔄 既存ユニット更新: {seiban_prefix} - {unit_name or 'ユニット名無し'} (ID: {order.id}, 備考保持: {'有' if order.remarks else '無'})")
             
-            # 既存の詳細を削除して再作成
-            OrderDetail.query.filter_by(order_id=order.id).delete()
-            
-            part_groups = {}
-            
-            for _, row in material_df.iterrows():
-                part_no = safe_str(row.get('部品No', ''))
-                page_no = safe_str(row.get('ページNo', ''))
-                material_key = safe_str(row.get('材質', ''))
-                
-                group_key = (part_no, page_no, material_key)
-                
-                if group_key not in part_groups:
-                    part_groups[group_key] = []
-                part_groups[group_key].append(row)
+            # 既存明細は最後に差分反映（sync_order_details）で突き合わせる
+            existing_details.extend(order.details)
             
             for group_key, rows in part_groups.items():
                 part_no, page_no, material_key = group_key
@@ -1227,49 +1298,28 @@ def save_to_database(df, seiban_prefix):
                     print(f"\nグループ: 部品No={part_no}, ページNo={page_no}")
                     print(f"追加工（親）候補: {len(processed)}個, ブランク（子）候補: {len(blanks)}個")
                 
-                used_blanks = set()
-
                 # 🔥 追加工(11,階層1)が親 → ブランク(13,階層2)が子
                 # ルール: 追加工の行No < ブランクの行No <= 追加工の行No+300, 階層差=+1
-                for proc_row in processed:
+                pairs, unused_blanks = pair_processed_with_blanks(processed, blanks, safe_int)
+
+                for proc_row, blank_row in pairs:
                     proc_row_no = safe_int(proc_row.get('行No', 0))
                     proc_hierarchy = safe_int(proc_row.get('階層', 0))
-
-                    matching_blank = None
-
-                    for i, blank_row in enumerate(blanks):
-                        if i in used_blanks:
-                            continue
-
-                        blank_row_no = safe_int(blank_row.get('行No', 0))
-                        blank_hierarchy = safe_int(blank_row.get('階層', 0))
-
-                        # ブランクの行Noが追加工より大きく、300以内、階層が+1
-                        if (blank_row_no > proc_row_no and
-                            blank_row_no <= proc_row_no + 300 and
-                            blank_hierarchy == proc_hierarchy + 1):
-                            matching_blank = (i, blank_row)
-                            break
-
                     proc_name = safe_str(proc_row.get('品名', ''))
 
-                    if matching_blank is not None:
-                        blank_idx, blank_row = matching_blank
-                        used_blanks.add(blank_idx)
-
+                    if blank_row is not None:
                         # 追加工(11)が親
-                        parent_detail = create_order_detail_with_parts(
-                            proc_row, order, all_received_items, safe_str, safe_int
+                        parent_detail = build_order_detail_mapping(
+                            proc_row, order.id, received_map, safe_str, safe_int
                         )
-                        db.session.add(parent_detail)
-                        db.session.flush()
+                        new_details.append(parent_detail)
 
-                        # ブランク(13)が子
-                        child_detail = create_order_detail_with_parts(
-                            blank_row, order, all_received_items, safe_str, safe_int
+                        # ブランク(13)が子（親IDはINSERT時に解決）
+                        child_detail = build_order_detail_mapping(
+                            blank_row, order.id, received_map, safe_str, safe_int
                         )
-                        child_detail.parent_id = parent_detail.id
-                        db.session.add(child_detail)
+                        child_detail['_parent'] = parent_detail
+                        new_details.append(child_detail)
 
                         blank_name = safe_str(blank_row.get('品名', ''))
                         blank_row_no = safe_int(blank_row.get('行No', 0))
@@ -1279,22 +1329,21 @@ def save_to_database(df, seiban_prefix):
                               f"→ 子・ブランク({blank_name[:15]}, 行No={blank_row_no}, 階層={blank_hierarchy})")
                     else:
                         # 対応するブランクがない追加工は単独で保存
-                        proc_detail = create_order_detail_with_parts(
-                            proc_row, order, all_received_items, safe_str, safe_int
+                        proc_detail = build_order_detail_mapping(
+                            proc_row, order.id, received_map, safe_str, safe_int
                         )
-                        db.session.add(proc_detail)
+                        new_details.append(proc_detail)
                         print(f"追加工のみ: {proc_name[:15]} (行No={proc_row_no}) - 対応するブランクなし")
 
                 # 未マッチのブランクを単独保存
-                for i, blank_row in enumerate(blanks):
-                    if i not in used_blanks:
-                        blank_detail = create_order_detail_with_parts(
-                            blank_row, order, all_received_items, safe_str, safe_int
-                        )
-                        db.session.add(blank_detail)
-                        blank_name = safe_str(blank_row.get('品名', ''))
-                        blank_row_no = safe_int(blank_row.get('行No', 0))
-                        print(f"ブランクのみ: {blank_name[:15]} (行No={blank_row_no}) - 対応する追加工なし")
+                for blank_row in unused_blanks:
+                    blank_detail = build_order_detail_mapping(
+                        blank_row, order.id, received_map, safe_str, safe_int
+                    )
+                    new_details.append(blank_detail)
+                    blank_name = safe_str(blank_row.get('品名', ''))
+                    blank_row_no = safe_int(blank_row.get('行No', 0))
+                    print(f"ブランクのみ: {blank_name[:15]} (行No={blank_row_no}) - 対応する追加工なし")
                 
                 for row in others:
                     order_type_code = safe_str(row.get('手配区分CD', ''))
@@ -1305,10 +1354,14 @@ def save_to_database(df, seiban_prefix):
                         print(f"除外: {item_name} ({spec1}) - 在庫部品のM+数値")
                         continue
                     
-                    detail = create_order_detail_with_parts(
-                        row, order, all_received_items, safe_str, safe_int
+                    detail = build_order_detail_mapping(
+                        row, order.id, received_map, safe_str, safe_int
                     )
-                    db.session.add(detail)
+                    new_details.append(detail)
+        
+        sync_result = sync_order_details(new_details, existing_details)
+        print(f"✅ 明細差分反映: {seiban_prefix} - 追加{sync_result['inserted']}件, "
+              f"更新{sync_result['updated']}件, 削除{sync_result['deleted']}件, 変更なし{sync_result['unchanged']}件")
         
         for order in Order.query.filter_by(seiban=seiban_prefix).all():
             update_order_status(order)
@@ -1345,7 +1398,7 @@ def save_to_database(df, seiban_prefix):
             import traceback
             traceback.print_exc()
         
-        return True
+        return sync_result
         
     except Exception as e:
         db.session.rollback()
@@ -1528,8 +1581,8 @@ def create_order_sheet(ws, order, sheet_name=None):
     for col_letter, width in column_widths.items():
         ws.column_dimensions[col_letter].width = width
 
-    # 🔥 検収データを読み込み
-    delivery_dict = DeliveryUtils.load_delivery_data()
+    # 🔥 検収データを読み込み（ユニットの全発注番号を1回のクエリで取得）
+    delivery_dict = DeliveryUtils.load_delivery_data(order_numbers=[d.order_number for d in order.details])
 
     # 🔥 データ行を書き込む（7行目から開始）
     row_idx = 7
@@ -1648,8 +1701,8 @@ def _create_data_rows(ws, order):
     row_idx = 4
     parent_details = [d for d in order.details if d.parent_id is None]
 
-    # 検収データを読み込み
-    delivery_dict = DeliveryUtils.load_delivery_data()
+    # 検収データを読み込み（ユニットの全発注番号を1回のクエリで取得）
+    delivery_dict = DeliveryUtils.load_delivery_data(order_numbers=[d.order_number for d in order.details])
 
     for detail in parent_details:
         row_idx = _write_detail_row(ws, detail, row_idx, is_parent=True, delivery_dict=delivery_dict)
@@ -1882,16 +1935,22 @@ def refresh_excel_file():
         except:
             pass
         
-def detect_seibans_from_excel(file_path, sheet_name, min_seiban='MHT0600'):
-    """Excelから製番を自動検出"""
+def detect_seibans_from_excel(file_path, sheet_name, min_seiban='MHT0600', seiban_only=True):
+    """Excelから製番を自動検出（seiban_only=True で製番列のみ読み込み）"""
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name, header=0)
-        
-        if '製番' not in df.columns:
-            return []
-        
-        # 製番列から一意の値を取得
-        seibans = df['製番'].dropna().unique()
+        if seiban_only:
+            values = load_column_cached(file_path, sheet_name, '製番')
+            if values is None:
+                return []
+            seibans = set(values)
+        else:
+            df = pd.read_excel(file_path, sheet_name=sheet_name, header=0)
+            
+            if '製番' not in df.columns:
+                return []
+            
+            # 製番列から一意の値を取得
+            seibans = df['製番'].dropna().unique()
         
         # MHTで始まり、指定番号以降のものをフィルター
         filtered_seibans = []
@@ -1915,9 +1974,16 @@ def detect_seibans_from_excel(file_path, sheet_name, min_seiban='MHT0600'):
 # グローバル変数に追加
 previous_seiban_counts = {}
 
-def get_seiban_counts(file_path, sheet_name='手配リスト_ALL'):
-    """製番ごとの件数を取得"""
+def get_seiban_counts(file_path, sheet_name='手配リスト_ALL', seiban_only=True):
+    """製番ごとの件数を取得（seiban_only=True で製番列のみ読み込み）"""
     try:
+        if seiban_only:
+            values = load_column_cached(file_path, sheet_name, '製番')
+            if values is None:
+                return {}
+            counts = pd.Series(values, dtype=object).value_counts().to_dict()
+            return {str(k): int(v) for k, v in counts.items()}
+        
         df = pd.read_excel(file_path, sheet_name=sheet_name, header=0)
         if '製番' not in df.columns:
             return {}
@@ -1979,6 +2045,24 @@ def check_network_file_with_diff():
         'error': 'この機能は廃止されました。DBから直接取得してください。'
     })
 
+def _seiban_list_events(min_seiban):
+    """製番一覧のストリーミングイベント（UI互換のため customer_name を customer_abbr に変換）"""
+    for event in across_db.iter_seiban_list_from_db(min_seiban):
+        if event['type'] == 'rows':
+            event = {'type': 'rows', 'rows': [
+                {
+                    'seiban': item['seiban'],
+                    'product_name': item['product_name'],
+                    'customer_abbr': item['customer_name'],
+                    'memo2': item.get('memo2', '')
+                }
+                for item in event['rows']
+            ]}
+        elif event['type'] == 'end':
+            event = dict(event, source='V_D受注')
+        yield event
+
+
 @app.route('/api/seiban-list', methods=['GET'])
 def get_seiban_list():
     """製番一覧を取得（V_D受注から直接取得）"""
@@ -1987,6 +2071,10 @@ def get_seiban_list():
         source = request.args.get('source', 'db')  # デフォルトはDB
 
         if source == 'db':
+            fmt = _stream_format()
+            if fmt:
+                return _stream_response(_seiban_list_events(min_seiban), fmt, rows_key='items')
+
             # V_D受注から直接取得
             result = across_db.get_seiban_list_from_db(min_seiban)
             if result['success']:
@@ -2008,27 +2096,56 @@ def get_seiban_list():
             else:
                 return jsonify({'success': False, 'error': result.get('error', 'DB取得エラー'), 'items': []})
         else:
-            # 従来のExcel読み込み（フォールバック）
-            seiban_info = load_seiban_info()
-            if not seiban_info:
+            # 製番マスタ（V_D受注、接続できない場合は製番一覧表）から取得
+            matched = seiban_master.find_by_prefix('')  # 製番の降順（新しいものが上）
+            if not matched:
                 return jsonify({'success': False, 'error': '製番一覧表を読み込めません', 'items': []})
 
             items = []
-            for seiban, info in seiban_info.items():
+            for seiban, info in matched:
                 items.append({
                     'seiban': seiban,
                     'product_name': info.get('product_name', ''),
                     'customer_abbr': info.get('customer_abbr', '')
                 })
 
-            # 製番の降順でソート（新しいものが上）
-            items.sort(key=lambda x: x['seiban'], reverse=True)
-
-            return jsonify({'success': True, 'items': items, 'count': len(items), 'source': 'Excel'})
+            return jsonify({'success': True, 'items': items, 'count': len(items),
+                            'source': seiban_master.get_stats()['source']})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e), 'items': []})
 
 
+@app.route('/api/seiban-master/search')
+def seiban_master_search():
+    """製番マスタの検索（prefix: 製番の前方一致 / q: 製番・品名・得意先略称の部分一致）"""
+    prefix = request.args.get('prefix', '').strip()
+    query = request.args.get('q', '').strip()
+    limit = min(int(request.args.get('limit', 50)), 500)
+
+    if prefix:
+        matched = seiban_master.find_by_prefix(prefix, limit)
+    elif query:
+        matched = seiban_master.search(query, fields=('seiban', 'product_name', 'customer_abbr'), limit=limit)
+    else:
+        return jsonify({'success': False, 'error': 'prefix または q を指定してください', 'items': []}), 400
+
+    items = [dict(info, seiban=seiban) for seiban, info in matched]
+    return jsonify({'success': True, 'items': items, 'count': len(items)})
+
+
+@app.route('/api/seiban-master/stats')
+def seiban_master_stats():
+    """製番マスタの読み込み状況"""
+    return jsonify(seiban_master.get_stats())
+
+
+@app.route('/api/seiban-master/refresh', methods=['POST'])
+def seiban_master_refresh():
+    """製番マスタを今すぐ読み直す"""
+    success = seiban_master.refresh()
+    return jsonify(dict(seiban_master.get_stats(), success=success))
+
+
 @app.route('/api/detect-seibans', methods=['POST'])
 def detect_seibans():
     """製番を自動検出"""
@@ -2078,11 +2195,12 @@ def process_file_endpoint():
                 'error': f'製番 {seiban} のデータが見つかりません'
             })
         
-        save_to_database(df_merged, seiban)
+        sync_result = save_to_database(df_merged, seiban)
         
         return jsonify({
             'success': True,
-            'message': f'{seiban} の処理が完了しました（{len(df_merged)}件）'
+            'message': f'{seiban} の処理が完了しました（{len(df_merged)}件）',
+            'changes': sync_result
         })
         
     except Exception as e:
@@ -2090,6 +2208,156 @@ def process_file_endpoint():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)})
 
+
+def _run_batch_merges(seibans, merge_func):
+    """
+    製番ごとのマージ処理を順に実行（一括取込用）
+
+    逐次実行は設計上の選択で、ワーカープールは使わない:
+    - マージはGILを握るpandas/Python処理のため、スレッドで並列化しても速くならない
+      （150製番・手配1.1万行で 1スレッド 1.45秒 / 4スレッド 1.64秒）
+    - プロセスプールでは手配・発注のDataFrameと共有索引をワーカーごとにpickleで受け渡す必要がある
+    - DB保存（_save_batch_results）はリクエストの db.session 1本で行うため並列化できない
+    高速化は取得元の読み込みを1回にまとめ、発注データの前処理・キー索引を全製番で共有することで行う。
+
+    Args:
+        seibans: 製番リスト
+        merge_func: 製番を受け取りマージ済みDataFrame（またはNone）を返す関数
+
+    Returns:
+        dict: {製番: {'df': DataFrame or None, 'error': str or None, 'merge_ms': int}}
+    """
+    merged = {}
+    for seiban in seibans:
+        start = time.perf_counter()
+        try:
+            df, error = merge_func(seiban), None
+        except Exception as e:
+            df, error = None, str(e)
+        merged[seiban] = {'df': df, 'error': error,
+                          'merge_ms': int((time.perf_counter() - start) * 1000)}
+    return merged
+
+
+def _save_batch_results(seibans, merged, not_found_message):
+    """
+    一括取込のマージ結果を製番順にDB保存し、製番ごとの結果リストを返す
+
+    Args:
+        seibans: 製番リスト（保存順）
+        merged: _run_batch_merges() の戻り値
+        not_found_message: データなし時のエラーメッセージ書式（{seiban} を置換）
+    """
+    results = []
+    for seiban in seibans:
+        item = merged[seiban]
+        result = {'seiban': seiban, 'success': False, 'count': 0,
+                  'merge_ms': item['merge_ms'], 'save_ms': 0}
+        df_merged = item['df']
+
+        if item['error']:
+            result['error'] = item['error']
+        elif df_merged is None or len(df_merged) == 0:
+            result['error'] = not_found_message.format(seiban=seiban)
+        else:
+            start = time.perf_counter()
+            try:
+                result['changes'] = save_to_database(df_merged, seiban)
+                result['success'] = True
+                result['count'] = len(df_merged)
+            except Exception as e:
+                db.session.rollback()
+                result['error'] = str(e)
+            result['save_ms'] = int((time.perf_counter() - start) * 1000)
+
+        results.append(result)
+    return results
+
+
+def _batch_response(results, timings):
+    """一括取込のレスポンスを生成"""
+    success_count = sum(1 for r in results if r['success'])
+    return jsonify({
+        'success': success_count > 0,
+        'message': f'{success_count}/{len(results)}件の製番を処理しました',
+        'success_count': success_count,
+        'error_count': len(results) - success_count,
+        'results': results,
+        'timings': timings
+    })
+
+
+def _batch_seibans(data):
+    """リクエストの製番リストを前後空白除去・重複除去して返す"""
+    return list(dict.fromkeys(
+        str(s).strip() for s in (data.get('seibans') or []) if s and str(s).strip()
+    ))
+
+
+@app.route('/api/process-batch', methods=['POST'])
+def process_batch_endpoint():
+    """
+    複数製番のExcel一括取込
+
+    ワークブックは各シート1回だけ読み込み、発注データの索引を全製番で共有して製番ごとにマージする。
+    マージ・DB保存は設計上どちらも製番順の逐次実行（ワーカープールは使わない。理由は _run_batch_merges() を参照）
+    """
+    try:
+        total_start = time.perf_counter()
+        data = request.json
+        filepath = data['filepath']
+        sheet1 = data['sheet1']
+        sheet2 = data['sheet2']
+        seibans = _batch_seibans(data)
+        order_date_from = data.get('order_date_from')
+        order_date_to = data.get('order_date_to')
+
+        if not seibans:
+            return jsonify({'success': False, 'error': '製番を指定してください'}), 400
+
+        # 1. シートを1回だけ読み込み（製番フィルタなし）
+        start = time.perf_counter()
+        df1_all = load_sheet_cached(filepath, sheet1, ExcelReader.TEHAI_COLUMNS)
+        df2_all = load_sheet_cached(filepath, sheet2, ExcelReader.HATCHU_COLUMNS)
+        load_ms = int((time.perf_counter() - start) * 1000)
+
+        # 2. 発注データの前処理とキー索引の構築は全製番分で1回だけ行い、各製番のマージで共有する
+        #    （索引のキーに製番を含むため、製番ごとに発注データを切り出した場合と同じ結果になる）
+        df2_all = prepare_order_dataframe(df2_all, order_date_from, order_date_to)
+        order_index = MergeUtils.index_dataframe(df2_all)
+
+        # 手配リストの製番ごとの行位置を索引化（/api/process と同じく前方一致）
+        groups1 = df1_all.groupby('製番', sort=False).indices if '製番' in df1_all.columns else {}
+
+        def merge(seiban):
+            positions = [pos for key, idx in groups1.items()
+                         if str(key).startswith(seiban) for pos in idx]
+            if not positions:
+                return None
+            return merge_tehai_dataframe(df1_all.iloc[sorted(positions)], df2_all, order_index)
+
+        # 3. 製番ごとにマージ
+        start = time.perf_counter()
+        merged = _run_batch_merges(seibans, merge)
+        merge_ms = int((time.perf_counter() - start) * 1000)
+
+        # 4. DB保存は順次
+        start = time.perf_counter()
+        results = _save_batch_results(seibans, merged, '製番 {seiban} のデータが見つかりません')
+        save_ms = int((time.perf_counter() - start) * 1000)
+
+        return _batch_response(results, {
+            'load_ms': load_ms,
+            'merge_ms': merge_ms,
+            'save_ms': save_ms,
+            'total_ms': int((time.perf_counter() - total_start) * 1000)
+        })
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)})
+
 # Routes
 @app.route('/api/refresh-excel', methods=['POST'])
 def refresh_excel_endpoint():
@@ -2327,6 +2595,149 @@ def load_from_odbc_endpoint():
 
 # ========== Across DB 直接クエリ API ==========
 import across_db
+import across_mirror
+
+across_db.configure_pool(
+    max_size=app.config.get('ACROSS_POOL_SIZE', 8),
+    idle_recycle=app.config.get('ACROSS_POOL_IDLE_RECYCLE', 300)
+)
+across_db.configure_backend(
+    backend=app.config.get('ACROSS_BACKEND', 'odbc'),
+    standin_path=app.config.get('ACROSS_STANDIN_PATH', os.path.join('cache', 'across_standin.db'))
+)
+DeliveryUtils.configure_cache(
+    max_size=app.config.get('RECEIPT_CACHE_MAX_SIZE', 20000),
+    ttl=app.config.get('RECEIPT_CACHE_TTL', 600),
+    query_timeout=app.config.get('RECEIPT_QUERY_TIMEOUT', 5)
+)
+across_db.configure_resilience(
+    query_timeout=app.config.get('ACROSS_QUERY_TIMEOUT', 30),
+    connect_timeout=app.config.get('ACROSS_CONNECT_TIMEOUT', 10),
+    failure_threshold=app.config.get('ACROSS_BREAKER_THRESHOLD', 5),
+    reset_timeout=app.config.get('ACROSS_BREAKER_RESET', 30)
+)
+across_db.configure_merge(app.config.get('ACROSS_MERGE_MODE', 'python'))
+across_db.configure_result_cache(
+    ttl=app.config.get('ACROSS_RESULT_CACHE_TTL'),
+    stale=app.config.get('ACROSS_RESULT_CACHE_STALE', 600),
+    max_size=app.config.get('ACROSS_RESULT_CACHE_MAX_SIZE', 500)
+)
+update_notifier.configure(
+    poll_interval=app.config.get('DB_POLL_INTERVAL', 300),
+    buffer_size=app.config.get('DB_EVENT_BUFFER_SIZE', 200)
+)
+across_db.configure_mirror(
+    mode=app.config.get('ACROSS_MIRROR_MODE', 'off'),
+    path=app.config.get('ACROSS_MIRROR_PATH', os.path.join('cache', 'across_mirror.db')),
+    sync_interval=app.config.get('ACROSS_MIRROR_SYNC_INTERVAL', 600),
+    full_sync_interval=app.config.get('ACROSS_MIRROR_FULL_SYNC_INTERVAL', 86400)
+)
+if app.config.get('ACROSS_MIRROR_MODE', 'off') != 'off':
+    across_mirror.start_sync_thread()
+seiban_master.configure(
+    refresh_interval=app.config.get('SEIBAN_MASTER_REFRESH_INTERVAL', 1800),
+    miss_refresh_interval=app.config.get('SEIBAN_MASTER_MISS_REFRESH_INTERVAL', 60),
+    excel_path=app.config.get('SEIBAN_LIST_PATH')
+)
+
+
+@app.before_request
+def start_background_services():
+    """製番マスタの定期読み直しは最初のリクエストで開始（import時にDB・共有フォルダへ接続しない）"""
+    seiban_master.start_refresh_thread()
+
+
+# ---------- ストリーミングレスポンス ----------
+# ?format=ndjson : 1行1イベント（columns / rows / end / error）の NDJSON
+# ?format=stream : 通常と同じJSONを行バッチごとに書き出す（chunked）
+
+
+def _stream_format():
+    """要求されたストリーミング形式（'ndjson' / 'stream'、通常レスポンスはNone）"""
+    fmt = request.args.get('format')
+    if fmt in ('ndjson', 'stream'):
+        return fmt
+    if 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return 'ndjson'
+    return None
+
+
+def _json_dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _ndjson_response(events):
+    """across_db.iter_* のイベントを NDJSON で逐次送信（途中のエラーは error イベント）"""
+    def generate():
+        try:
+            for event in events:
+                yield _json_dumps(event) + '\n'
+        except Exception as e:
+            yield _json_dumps({'type': 'error', 'error': str(e)}) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
+
+def _chunked_json_response(events, rows_key='rows'):
+    """
+    across_db.iter_* のイベントを通常と同じ形のJSONとして行バッチごとに書き出す
+
+    終端イベントの項目（count・stats など）は rows の後ろに付く。途中でエラーになった場合は
+    'success': false・'error' を付けて閉じる（ステータスは送信済みのため200のまま）
+    """
+    def generate():
+        yield '{'
+        count = 0
+        tail = {}
+        rows_open = False
+        try:
+            for event in events:
+                kind = event['type']
+                if kind == 'columns':
+                    yield '"columns": ' + _json_dumps(event['columns']) + ', '
+                elif kind == 'rows' and event['rows']:
+                    prefix = '' if rows_open else f'"{rows_key}": ['
+                    rows_open = True
+                    sep = ', ' if count else ''
+                    yield prefix + sep + ', '.join(_json_dumps(row) for row in event['rows'])
+                    count += len(event['rows'])
+                elif kind == 'end':
+                    tail = {k: v for k, v in event.items() if k != 'type'}
+        except Exception as e:
+            tail = {'success': False, 'error': str(e)}
+        if not rows_open:
+            yield f'"{rows_key}": ['
+        tail.setdefault('count', count)
+        yield '], ' + _json_dumps(tail)[1:]
+    return Response(stream_with_context(generate()), mimetype='application/json',
+                    headers={'X-Accel-Buffering': 'no'})
+
+
+def _stream_response(events, fmt, rows_key='rows'):
+    if fmt == 'ndjson':
+        return _ndjson_response(events)
+    return _chunked_json_response(events, rows_key)
+
+
+# ---------- クエリ結果キャッシュ ----------
+# ?nocache=1 でキャッシュを読まずに取得し直す（結果はキャッシュに保存）
+# レスポンスヘッダー X-Across-Cache に hit / stale / miss / bypass を返す
+
+
+def _cache_bypass():
+    return request.args.get('nocache', '').lower() in ('1', 'true')
+
+
+def _cached_result(view_name, func, *args):
+    """across_db.cached_call() の結果と状態（ヘッダー用）を返す"""
+    return across_db.cached_call(view_name, func, *args, bypass=_cache_bypass())
+
+
+def _cached_json(payload, *statuses):
+    response = jsonify(payload)
+    response.headers['X-Across-Cache'] = ','.join(statuses)
+    return response
+
 
 @app.route('/api/across-db/test')
 def across_db_test():
@@ -2338,16 +2749,118 @@ def across_db_test():
         return jsonify({'success': False, 'message': str(e)})
 
 
+@app.route('/api/across-db/pool-stats')
+def across_db_pool_stats():
+    """Across DB 接続プールの利用状況"""
+    return jsonify(across_db.get_pool_stats())
+
+
+@app.route('/api/across-db/breaker')
+def across_db_breaker():
+    """Across DB サーキットブレーカーの状態（遮断中か・再試行までの秒数・連続失敗数）"""
+    return jsonify(across_db.get_breaker_stats())
+
+
+@app.route('/api/across-db/receipt-cache-stats')
+def across_db_receipt_cache_stats():
+    """納入情報キャッシュの統計（ヒット率・件数など）"""
+    return jsonify(DeliveryUtils.get_cache_stats())
+
+
+@app.route('/api/across-db/result-cache-stats')
+def across_db_result_cache_stats():
+    """クエリ結果キャッシュの統計（ビューごとのヒット率・件数など）"""
+    return jsonify(across_db.get_result_cache_stats())
+
+
+@app.route('/api/across-db/result-cache/clear', methods=['POST'])
+def across_db_result_cache_clear():
+    """クエリ結果キャッシュを破棄（views 指定時はそのビューのみ）"""
+    data = request.get_json(silent=True) or {}
+    removed = across_db.invalidate_result_cache(data.get('views'))
+    return jsonify({'success': True, 'removed': removed})
+
+
 @app.route('/api/across-db/check-updates')
 def across_db_check_updates():
-    """DB更新チェック（手配・発注リストの変更検知）"""
+    """
+    DB更新チェック（手配・発注リストの変更検知）
+
+    差分はサーバー側ポーラーが一括で取得する。通常は最新のチェック結果を返し、
+    ?refresh=1 の場合はその場でチェックして接続中の全クライアントに配信する。
+    ?since=<seq> を付けると、その通番以降のイベントを 'events' として返す。
+    """
     try:
-        result = across_db.check_db_updates()
+        if request.args.get('refresh') == '1':
+            result = update_notifier.poll_now()
+        else:
+            # 購読者がいない間はポーラーが休止するため、古い結果ならその場でチェック
+            result = (update_notifier.latest(max_age=update_notifier.POLL_INTERVAL_SEC)
+                      or update_notifier.poll_now())
+
+        since = request.args.get('since', type=int)
+        if since is not None:
+            events, gap = update_notifier.events_since(since)
+            result = dict(result, events=events, gap=gap)
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/api/across-db/updates/stream')
+def across_db_updates_stream():
+    """
+    DB更新通知のSSEストリーム
+
+    再接続時はブラウザが送る Last-Event-ID（または ?since=）以降のイベントを再送する
+    """
+    last_seq = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_seq = int(last_seq) if last_seq not in (None, '') else None
+    except ValueError:
+        last_seq = None
+
+    return Response(
+        stream_with_context(update_notifier.stream(last_seq)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/across-db/mirror/status')
+def across_db_mirror_status():
+    """ローカルミラーの鮮度（ビューごとの最終同期時刻）と読み出しモード"""
+    return jsonify(across_db.get_mirror_status())
+
+
+@app.route('/api/across-db/mirror/sync', methods=['POST'])
+def across_db_mirror_sync():
+    """ローカルミラーを同期（full=true で全件同期）"""
+    data = request.get_json(silent=True) or {}
+    result = across_mirror.sync(full=bool(data.get('full')))
+    return jsonify(result)
+
+
+@app.route('/api/across-db/mirror/mode', methods=['POST'])
+def across_db_mirror_mode():
+    """ミラーの読み出しモードを切り替え（off / fallback / offline）"""
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode')
+    try:
+        across_db.configure_mirror(mode=mode)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if mode != 'off':
+        across_mirror.start_sync_thread()
+    return jsonify({'success': True, 'mode': mode})
+
+
+@app.route('/api/across-db/updates/stats')
+def across_db_updates_stats():
+    """更新通知の配信状況（購読者数・最新通番など）"""
+    return jsonify(update_notifier.get_stats())
+
+
 @app.route('/api/across-db/status')
 def across_db_status():
     """DB現在状態取得"""
@@ -2371,6 +2884,20 @@ def across_db_status():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/api/across-db/seiban-counts', methods=['POST'])
+def across_db_seiban_counts():
+    """複数製番の手配・発注・未発注（社内加工品）件数を一括取得"""
+    try:
+        data = request.get_json() or {}
+        seibans = data.get('seibans', [])
+        if not seibans:
+            return jsonify({'success': False, 'error': '製番が指定されていません'})
+        result = across_db.check_seiban_counts(seibans)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
 @app.route('/api/across-db/seiban-status/<seiban>')
 def across_db_seiban_status(seiban):
     """製番別の手配・発注状況取得"""
@@ -2433,8 +2960,13 @@ def across_db_query():
                 where_clause = f'{search_type} = ?'
                 params = [search_value]
 
-        result = across_db.query_view(view_name, where_clause, params, limit)
-        return jsonify(result)
+        fmt = _stream_format()
+        if fmt:
+            return _stream_response(across_db.iter_view(view_name, where_clause, params, limit), fmt)
+
+        result, status = _cached_result(view_name, across_db.query_view,
+                                        view_name, where_clause, params, limit)
+        return _cached_json(result, status)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -2446,15 +2978,15 @@ def across_db_order_detail():
         if not order_number:
             return jsonify({'error': '発注番号を入力してください'}), 400
 
-        order = across_db.search_order(order_number)
-        remaining = across_db.search_order_remaining(order_number)
-        receipts = across_db.search_receipts(order_number)
+        order, order_status = _cached_result('V_D発注', across_db.search_order, order_number)
+        remaining, remaining_status = _cached_result('V_D発注残', across_db.search_order_remaining, order_number)
+        receipts, receipts_status = _cached_result('V_D仕入', across_db.search_receipts, order_number)
 
-        return jsonify({
+        return _cached_json({
             'order': order,
             'remaining': remaining,
             'receipts': receipts
-        })
+        }, order_status, remaining_status, receipts_status)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -2495,8 +3027,8 @@ def across_db_process():
                 'error': f'製番 {seiban} のデータが見つかりません（Across DB）'
             })
 
-        # 既存のsave_to_database()でDB保存
-        save_to_database(df_merged, seiban)
+        # 既存のsave_to_database()でDB保存（明細は差分のみ反映）
+        sync_result = save_to_database(df_merged, seiban)
 
         # 更新後の状態を取得
         after_orders = Order.query.filter_by(seiban=seiban, is_archived=False).all()
@@ -2546,7 +3078,9 @@ def across_db_process():
             msg_parts.append(f"新規ユニット: {len(changes['added_units'])}件")
         if changes['updated_units']:
             msg_parts.append(f"更新ユニット: {len(changes['updated_units'])}件")
+        msg_parts.append(f"明細 追加{sync_result['inserted']}・更新{sync_result['updated']}・削除{sync_result['deleted']}件")
         msg_parts.append(f"合計: {len(df_merged)}件")
+        changes['details'] = sync_result
 
         return jsonify({
             'success': True,
@@ -2560,6 +3094,55 @@ def across_db_process():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/across-db/process-batch', methods=['POST'])
+def across_db_process_batch():
+    """
+    複数製番のDB直接一括取込
+
+    V_D手配リスト・V_D発注・V_D未発注はIN句でまとめて取得し、製番ごとにマージする。
+    並行するのはビューの取得だけで、マージ・DB保存は設計上どちらも製番順の逐次実行
+    """
+    try:
+        total_start = time.perf_counter()
+        data = request.json
+        seibans = _batch_seibans(data)
+        order_date_from = data.get('order_date_from')
+        order_date_to = data.get('order_date_to')
+        include_mihatchu = data.get('include_mihatchu', True)  # デフォルトでON
+
+        if not seibans:
+            return jsonify({'success': False, 'error': '製番を指定してください'}), 400
+
+        # 1. 全製番のマージ元データをビューごとに並行取得
+        start = time.perf_counter()
+        sources = across_db.fetch_merge_sources(seibans, order_date_from, order_date_to, include_mihatchu)
+        load_ms = int((time.perf_counter() - start) * 1000)
+
+        # 2. 製番ごとにマージ
+        start = time.perf_counter()
+        merged = _run_batch_merges(
+            seibans,
+            lambda seiban: across_db.merge_sources(seiban, sources.get(seiban, {}), include_mihatchu)
+        )
+        merge_ms = int((time.perf_counter() - start) * 1000)
+
+        # 3. DB保存は順次
+        start = time.perf_counter()
+        results = _save_batch_results(seibans, merged, '製番 {seiban} のデータが見つかりません（Across DB）')
+        save_ms = int((time.perf_counter() - start) * 1000)
+
+        return _batch_response(results, {
+            'load_ms': load_ms,
+            'merge_ms': merge_ms,
+            'save_ms': save_ms,
+            'total_ms': int((time.perf_counter() - total_start) * 1000)
+        })
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/across-db/merge-test')
 def across_db_merge_test():
     """製番でマージテスト（V_D手配リスト + V_D発注）"""
@@ -2568,6 +3151,10 @@ def across_db_merge_test():
         if not seiban:
             return jsonify({'error': '製番を入力してください'}), 400
 
+        fmt = _stream_format()
+        if fmt:
+            return _stream_response(across_db.iter_merge_test_by_seiban(seiban), fmt)
+
         result = across_db.merge_test_by_seiban(seiban)
         return jsonify(result)
     except Exception as e:
@@ -2583,8 +3170,9 @@ def across_db_mihatchu():
         if not seiban:
             return jsonify({'error': '製番を入力してください'}), 400
 
-        result = across_db.search_mihatchu(seiban, supplier_cd, order_type_cd)
-        return jsonify(result)
+        result, status = _cached_result('V_D未発注', across_db.search_mihatchu,
+                                        seiban, supplier_cd, order_type_cd)
+        return _cached_json(result, status)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -2594,8 +3182,14 @@ def across_db_zaiko_buhin():
     try:
         data = request.get_json() or {}
         seibans = data.get('seibans', None)
-        result = across_db.search_zaiko_buhin(seibans)
-        return jsonify(result)
+
+        # 全製番指定は件数が多いので、ストリーミング指定時は製番別グループ（by_seiban）を省き行を逐次送る
+        fmt = _stream_format()
+        if fmt:
+            return _stream_response(across_db.iter_zaiko_buhin(seibans), fmt)
+
+        result, status = _cached_result('V_D手配リスト', across_db.search_zaiko_buhin, seibans)
+        return _cached_json(result, status)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -2603,8 +3197,8 @@ def across_db_zaiko_buhin():
 def across_db_0zaiko():
     """0ZAIKO（在庫品発注用製番）の手配リストを検索"""
     try:
-        result = across_db.search_0zaiko_tehai()
-        return jsonify(result)
+        result, status = _cached_result('V_D手配リスト', across_db.search_0zaiko_tehai)
+        return _cached_json(result, status)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -2637,10 +3231,8 @@ def upload_file():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
-        # Get sheet names
-        wb = load_workbook(filepath, read_only=True)
-        sheet_names = wb.sheetnames
-        wb.close()
+        # Get sheet names（以降の製番検出・処理と同じキャッシュを利用）
+        sheet_names = get_sheet_names_cached(filepath)
         
         return jsonify({
             'success': True,
@@ -3094,8 +3686,9 @@ def receive_page(seiban, unit=''):
         unit = unquote(unit)  # URLデコード
         order = Order.query.filter_by(seiban=seiban, unit=unit, is_archived=False).first_or_404()
 
-        # 🔥 検収データを読み込み
-        delivery_dict = DeliveryUtils.load_delivery_data()
+        # 🔥 検収データを読み込み（全発注番号を1回のクエリで取得）
+        delivery_dict = DeliveryUtils.load_delivery_data(order_numbers=[d.order_number for d in order.details])
+        receipt_available = DeliveryUtils.is_available()
 
         # 詳細リストを取得
         details = []
@@ -3283,6 +3876,7 @@ def receive_page(seiban, unit=''):
             <span>{order.customer_abbr or ''}</span>
         </div>
     </div>
+    {'' if receipt_available else '<div class="info-box" style="background: #fff3cd; border-left: 4px solid #ffc107; font-size: 0.9em;">⚠️ Across DBに接続できないため、納入日・納入数は前回取得した内容（または空欄）で表示しています</div>'}
 
     <!-- 🔥 場所・パレット番号編集セクション -->
     <div class="info-box" style="background: #e7f3ff; border-left: 4px solid #007bff;">
@@ -4167,8 +4761,8 @@ def get_order_details(order_id):
         from urllib.parse import quote
         order = Order.query.get_or_404(order_id)
 
-        # 🔥 検収データを読み込み
-        delivery_dict = DeliveryUtils.load_delivery_data()
+        # 🔥 検収データを読み込み（全発注番号を1回のクエリで取得）
+        delivery_dict = DeliveryUtils.load_delivery_data(order_numbers=[d.order_number for d in order.details])
 
         details = []
         for detail in order.details:
@@ -4219,6 +4813,7 @@ def get_order_details(order_id):
                 'remarks': order.remarks
             },
             'details': details,
+            'receipt_degraded': not DeliveryUtils.is_available(),  # Across停止中は受入情報が古い・欠けている場合がある
             'qr_code': generate_qr_code(f"{get_server_url()}/receive/{order.seiban}/{quote(order.unit, safe='') if order.unit else ''}")
         })
     except Exception as e:
@@ -5280,9 +5875,6 @@ def get_pallets_list():
     try:
         from sqlalchemy import func
         
-        # 製番一覧表から品名を読み込み
-        seiban_info = load_seiban_info()
-        
         # パレット番号でグループ化して取得
         pallets = db.session.query(
             Order.pallet_number,
@@ -5307,15 +5899,13 @@ def get_pallets_list():
             
             orders_data = []
             for order in orders:
-                # 製番一覧表から品名を取得（既にDBに品名がある場合はそちらを優先）
-                product_name = order.product_name
-                if not product_name and order.seiban in seiban_info:
-                    product_name = seiban_info[order.seiban].get('product_name', '')
+                info = seiban_master.get(order.seiban) or {}
+
+                # 製番マスタから品名を取得（既にDBに品名がある場合はそちらを優先）
+                product_name = order.product_name or info.get('product_name', '')
                 
-                # 製番一覧表から得意先略称を取得（既にDBに得意先略称がある場合はそちらを優先）
-                customer_abbr = order.customer_abbr
-                if not customer_abbr and order.seiban in seiban_info:
-                    customer_abbr = seiban_info[order.seiban].get('customer_abbr', '')
+                # 製番マスタから得意先略称を取得（既にDBに得意先略称がある場合はそちらを優先）
+                customer_abbr = order.customer_abbr or info.get('customer_abbr', '')
                 
                 orders_data.append({
                     'id': order.id,
@@ -5356,9 +5946,6 @@ def search_pallet():
         if not search_query:
             return jsonify({'error': '検索キーワードを入力してください'}), 400
         
-        # 製番一覧表から品名と得意先略称を読み込み
-        seiban_info = load_seiban_info()  # ← load_seiban_data() から変更
-        
         # 1. 製番で検索（部分一致）
         orders_by_seiban = Order.query.filter(
             Order.seiban.like(f'%{search_query}%'),
@@ -5371,16 +5958,8 @@ def search_pallet():
             Order.is_archived == False
         ).all()
         
-        # 3. 製番一覧表から品名と得意先略称で検索
-        matching_seibans = []
-        for seiban, info in seiban_info.items():
-            product_name = info.get('product_name', '')
-            customer_abbr = info.get('customer_abbr', '')
-            
-            # 品名または得意先略称に検索キーワードが含まれる場合
-            if (search_query.lower() in product_name.lower() or 
-                search_query.lower() in customer_abbr.lower()):
-                matching_seibans.append(seiban)
+        # 3. 製番マスタの品名・得意先略称で検索（部分一致）
+        matching_seibans = [seiban for seiban, _ in seiban_master.search(search_query)]
         
         # 品名または得意先略称で見つかった製番の注文を取得
         orders_by_info = []
@@ -5401,15 +5980,13 @@ def search_pallet():
         
         results = []
         for order in all_orders:
-            # 製番一覧表から品名を取得（既にDBに品名がある場合はそちらを優先）
-            product_name = order.product_name
-            if not product_name and order.seiban in seiban_info:
-                product_name = seiban_info[order.seiban].get('product_name', '')
+            info = seiban_master.get(order.seiban) or {}
+
+            # 製番マスタから品名を取得（既にDBに品名がある場合はそちらを優先）
+            product_name = order.product_name or info.get('product_name', '')
             
-            # 製番一覧表から得意先略称を取得（既にDBに得意先略称がある場合はそちらを優先）
-            customer_abbr = order.customer_abbr
-            if not customer_abbr and order.seiban in seiban_info:
-                customer_abbr = seiban_info[order.seiban].get('customer_abbr', '')
+            # 製番マスタから得意先略称を取得（既にDBに得意先略称がある場合はそちらを優先）
+            customer_abbr = order.customer_abbr or info.get('customer_abbr', '')
             
             results.append({
                 'id': order.id,
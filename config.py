@@ -29,6 +29,54 @@ class Config:
     SEIBAN_LIST_PATH = r'\\server3\share-data\Document\Acrossデータ\製番一覧表.xlsx'
     EXPORT_EXCEL_PATH = r'\\SERVER3\Share-data\Document\仕入れ\002_手配リスト\手配発注リスト'
 
+    # Across DB 接続先（'odbc': Across DB / 'standin': ローカルのスタンドイン、社外での動作確認用）
+    ACROSS_BACKEND = 'odbc'
+    ACROSS_STANDIN_PATH = os.path.join('cache', 'across_standin.db')
+
+    # Across DB 接続プール設定
+    ACROSS_POOL_SIZE = 8             # 同時接続数の上限
+    ACROSS_POOL_IDLE_RECYCLE = 300   # アイドル接続を作り直すまでの秒数
+
+    # Across DB タイムアウト・サーキットブレーカー設定
+    ACROSS_CONNECT_TIMEOUT = 10      # 接続のタイムアウト（秒）
+    ACROSS_QUERY_TIMEOUT = 30        # クエリのタイムアウト（秒）
+    ACROSS_BREAKER_THRESHOLD = 5     # 連続で接続・タイムアウトエラーになったら遮断する回数
+    ACROSS_BREAKER_RESET = 30        # 遮断してから再試行するまでの秒数
+
+    # Across DB 取込のマージ方式（'python': 手配リスト・発注を読み込んで照合 / 'sql': DB側で照合）
+    ACROSS_MERGE_MODE = 'python'
+
+    # 納入情報（V_D仕入）キャッシュ設定
+    RECEIPT_CACHE_MAX_SIZE = 20000   # 保持する発注番号の上限
+    RECEIPT_CACHE_TTL = 600          # 有効期限（秒）
+    RECEIPT_QUERY_TIMEOUT = 5        # 画面表示時の納入情報クエリのタイムアウト（秒）
+
+    # Across DB クエリ結果キャッシュ（期限切れ後は古い結果を返しつつ裏で更新）
+    ACROSS_RESULT_CACHE_TTL = {      # ビューごとの有効期限（秒）
+        'V_D発注': 300,
+        'V_D発注残': 120,
+        'V_D仕入': 120,
+        'V_D手配リスト': 300,
+        'V_D未発注': 300,
+        'V_D受注': 1800,
+    }
+    ACROSS_RESULT_CACHE_STALE = 600     # 期限切れ後も古い結果を返す猶予（秒）
+    ACROSS_RESULT_CACHE_MAX_SIZE = 500  # 保持する結果の上限
+
+    # 製番マスタ（V_D受注の製番・品名・得意先略称、取込・パレット画面で共有）
+    SEIBAN_MASTER_REFRESH_INTERVAL = 1800   # 定期読み直しの間隔（秒）
+    SEIBAN_MASTER_MISS_REFRESH_INTERVAL = 60  # 未登録の製番を参照した時に読み直す最短間隔（秒）
+
+    # Across DB 更新通知（サーバー側ポーリング→SSE配信）
+    DB_POLL_INTERVAL = 300           # 差分チェックの間隔（秒）
+    DB_EVENT_BUFFER_SIZE = 200       # 再接続時に再送できるイベント数
+
+    # Across DB ローカルミラー（V_D系ビューのSQLite複製）
+    ACROSS_MIRROR_MODE = 'off'       # 'off' / 'fallback'（接続不可時のみミラー） / 'offline'（常にミラー）
+    ACROSS_MIRROR_PATH = os.path.join('cache', 'across_mirror.db')
+    ACROSS_MIRROR_SYNC_INTERVAL = 600          # 差分同期の間隔（秒）
+    ACROSS_MIRROR_FULL_SYNC_INTERVAL = 86400   # 全件同期の間隔（秒）
+
     # ODBC設定
     USE_ODBC = False  # ODBCを使用する場合はTrue
     ODBC_CONNECTION_STRING = ''
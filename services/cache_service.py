@@ -1,56 +1,182 @@
 """
-キャッシュ・マスタデータ管理 - cache_service.py
-製番情報の読み込み（V_D受注DBから取得、フォールバックでExcel）
+キャッシュ管理 - cache_service.py
+アップロードされたワークブックの解析結果キャッシュ
+（製番情報は services/seiban_master.py が保持する）
 """
+import os
+import json
+import time
+import hashlib
+import threading
 from pathlib import Path
 import pandas as pd
-from flask import current_app
 
 
-def load_seiban_info():
-    """製番情報を取得（V_D受注DBから取得、フォールバックでExcel）"""
-    # まずDBから取得を試みる
-    try:
-        import across_db
-        result = across_db.get_seiban_list_from_db()
-        if result.get('success') and result.get('items'):
-            # DB結果を辞書形式に変換
-            seiban_info = {}
-            for item in result['items']:
-                seiban = item.get('seiban', '')
-                if seiban:
-                    seiban_info[seiban] = {
-                        'product_name': item.get('product_name', ''),
-                        'customer_abbr': item.get('customer_name', ''),  # customer_name → customer_abbr
-                        'memo2': item.get('memo2', '')
-                    }
-            print(f"製番情報をDBから取得: {len(seiban_info)}件")
-            return seiban_info
-    except Exception as e:
-        print(f"DB取得エラー、Excelにフォールバック: {str(e)}")
+# ========================================
+# 解析済みワークブックキャッシュ（cache/ ディレクトリ）
+# ========================================
+
+WORKBOOK_CACHE_DIR = Path('cache')
+WORKBOOK_CACHE_MAX_AGE_DAYS = 7
+
+# (絶対パス, サイズ, 更新時刻ns) → 内容ハッシュ（同一ファイルの再ハッシュを避ける）
+_fingerprint_memo = {}
+_fingerprint_lock = threading.Lock()
+
+
+def get_file_fingerprint(file_path):
+    """
+    ファイルのフィンガープリントを取得
+
+    サイズ・更新時刻が前回と同じ場合は内容ハッシュを再計算しない
+
+    Returns:
+        str: '{sha1}_{size}' 形式の文字列
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+    with _fingerprint_lock:
+        cached = _fingerprint_memo.get(memo_key)
+    if cached:
+        return cached
+
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(chunk)
+    fingerprint = f"{sha1.hexdigest()}_{stat.st_size}"
+
+    with _fingerprint_lock:
+        _fingerprint_memo[memo_key] = fingerprint
+    return fingerprint
+
+
+def _workbook_cache_path(fingerprint, *key_parts, suffix='.pkl'):
+    """キャッシュファイルのパス（フィンガープリント + 読み込み条件）"""
+    key_hash = hashlib.md5(json.dumps(key_parts, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+    return WORKBOOK_CACHE_DIR / f"wb_{fingerprint}_{key_hash}{suffix}"
+
+
+def _prune_workbook_cache():
+    """古いキャッシュファイルを削除"""
+    cutoff = time.time() - WORKBOOK_CACHE_MAX_AGE_DAYS * 86400
+    for path in WORKBOOK_CACHE_DIR.glob('wb_*'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def _write_cache_file(path, writer):
+    """一時ファイルに書いてから置き換え（並行読み込みで壊れたファイルを読まない）"""
+    WORKBOOK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    writer(tmp_path)
+    os.replace(tmp_path, path)
+    _prune_workbook_cache()
+
+
+def get_sheet_names_cached(file_path):
+    """ワークブックのシート名一覧（キャッシュ優先）"""
+    fingerprint = get_file_fingerprint(file_path)
+    cache_path = _workbook_cache_path(fingerprint, 'sheet_names', suffix='.json')
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
 
-    # DBが使えない場合はExcelから読み込み（フォールバック）
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True)
+    sheet_names = wb.sheetnames
+    wb.close()
+
+    def writer(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sheet_names, f, ensure_ascii=False)
+
+    _write_cache_file(cache_path, writer)
+    return sheet_names
+
+
+def _read_pickle_cache(cache_path):
+    """キャッシュファイル（pickle）を読み込み（無い・壊れている場合はNone）"""
+    if not cache_path.exists():
+        return None
     try:
-        seiban_file = current_app.config.get('SEIBAN_LIST_PATH', r'\\server3\share-data\Document\Acrossデータ\製番一覧表.xlsx')
-        seiban_path = Path(seiban_file)
-
-        if not seiban_path.exists():
-            print(f"製番一覧表が見つかりません: {seiban_path}")
-            return {}
-
-        df = pd.read_excel(str(seiban_path), sheet_name='製番')
-
-        seiban_info = {}
-        for _, row in df.iterrows():
-            if pd.notna(row.get('製番')):
-                seiban_info[str(row['製番'])] = {
-                    'product_name': str(row.get('品名', '')) if pd.notna(row.get('品名')) else '',
-                    'customer_abbr': str(row.get('得意先略称', '')) if pd.notna(row.get('得意先略称')) else '',
-                    'memo2': str(row.get('メモ２', '')) if pd.notna(row.get('メモ２')) else ''
-                }
-
-        print(f"製番情報をExcelから取得: {len(seiban_info)}件")
-        return seiban_info
+        return pd.read_pickle(cache_path)
     except Exception as e:
-        print(f"製番一覧表読み込みエラー: {str(e)}")
-        return {}
+        print(f"ワークブックキャッシュ読み込みエラー（再解析します）: {e}")
+        return None
+
+
+def load_sheet_cached(file_path, sheet_name, columns=None, seiban_prefix=None):
+    """
+    シートを読み込み（キャッシュ優先）
+
+    製番指定時はその製番の行だけを解析して (シート, 列, 製番) 単位で保存する。
+    全製番分のキャッシュ（一括取込で作成）が既にあればそこから絞り込む
+
+    Args:
+        file_path: Excelファイルパス
+        sheet_name: シート名
+        columns: 読み込む列名のリスト（Noneで全列）
+        seiban_prefix: 製番の前方一致条件（Noneで全行）
+
+    Returns:
+        pandas.DataFrame: 読み込み結果
+    """
+    from utils import ExcelReader
+
+    fingerprint = get_file_fingerprint(file_path)
+    full_cache_path = _workbook_cache_path(fingerprint, 'sheet', sheet_name, columns)
+
+    if seiban_prefix:
+        df = _read_pickle_cache(full_cache_path)
+        if df is not None:
+            if '製番' in df.columns:
+                df = df[df['製番'].astype(str).str.startswith(seiban_prefix, na=False)].copy()
+            return df
+        cache_path = _workbook_cache_path(fingerprint, 'sheet', sheet_name, columns, seiban_prefix)
+    else:
+        cache_path = full_cache_path
+
+    df = _read_pickle_cache(cache_path)
+    if df is None:
+        df = ExcelReader.read_sheet(file_path, sheet_name, columns, seiban_prefix)
+        _write_cache_file(cache_path, df.to_pickle)
+        print(f"ワークブックキャッシュ作成: {sheet_name} {seiban_prefix or '全製番'} ({len(df)}件)")
+    return df
+
+
+def load_column_cached(file_path, sheet_name, column='製番'):
+    """
+    シートの1列だけを読み込み（キャッシュ優先）
+
+    Returns:
+        list: 列の値（空セルを除く）。列が無い場合はNone
+    """
+    from utils import ExcelReader
+
+    fingerprint = get_file_fingerprint(file_path)
+    cache_path = _workbook_cache_path(fingerprint, 'column', sheet_name, column, suffix='.json')
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    values = ExcelReader.read_column(file_path, sheet_name, column)
+
+    def writer(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(values, f, ensure_ascii=False)
+
+    _write_cache_file(cache_path, writer)
+    return values
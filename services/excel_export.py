@@ -249,8 +249,8 @@ def create_order_sheet(ws, order, sheet_name=None):
     for col_letter, width in column_widths.items():
         ws.column_dimensions[col_letter].width = width
 
-    # 検収データを読み込み
-    delivery_dict = DeliveryUtils.load_delivery_data()
+    # 検収データを読み込み（ユニットの全発注番号を1回のクエリで取得）
+    delivery_dict = DeliveryUtils.load_delivery_data(order_numbers=[d.order_number for d in order.details])
 
     # データ行（7行目から）
     row_idx = 7
@@ -0,0 +1,251 @@
+"""
+製番マスタ - seiban_master.py
+V_D受注の製番・品名・得意先略称・メモ２をプロセス内に1つ保持し、取込・パレット画面で共有する
+
+- 初回参照時に読み込み、以降は REFRESH_INTERVAL_SEC ごとに裏で読み直す（start_refresh_thread()）
+- 未登録の製番を参照した場合は、MISS_REFRESH_INTERVAL_SEC に1回まで読み直してから引き直す
+- DBに接続できない場合は製番一覧表（Excel）から読み込む。両方失敗した場合は前回の内容を使い続ける
+- 読み直しは新しい辞書を作ってから差し替えるため、参照側はロック不要
+"""
+import bisect
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# 設定（configure() で変更可能）
+REFRESH_INTERVAL_SEC = 1800    # 定期読み直しの間隔（秒）
+RETRY_INTERVAL_SEC = 60        # 読み込みに失敗した後、次に試すまでの秒数
+MISS_REFRESH_INTERVAL_SEC = 60 # 未登録の製番の参照で読み直す最短間隔（秒）
+EXCEL_PATH = None              # フォールバック用の製番一覧表（Noneで使わない）
+
+# (製番→情報の辞書, 製番の昇順リスト, 読み込み時刻, 取得元)
+_snapshot = None
+_load_lock = threading.Lock()
+_last_attempt = 0
+_miss_lock = threading.Lock()
+_last_miss_refresh = 0
+_refresher = None
+_wake = threading.Event()
+_stats = {'loads': 0, 'errors': 0, 'invalidations': 0, 'miss_refreshes': 0, 'last_error': None}
+
+
+def configure(refresh_interval=None, excel_path=None, miss_refresh_interval=None):
+    """定期読み直しの間隔（秒）・フォールバック用Excelのパス・未登録時の読み直し間隔（秒）を変更"""
+    global REFRESH_INTERVAL_SEC, EXCEL_PATH, MISS_REFRESH_INTERVAL_SEC
+    if refresh_interval is not None:
+        REFRESH_INTERVAL_SEC = refresh_interval
+        _wake.set()
+    if miss_refresh_interval is not None:
+        MISS_REFRESH_INTERVAL_SEC = miss_refresh_interval
+    if excel_path is not None:
+        EXCEL_PATH = excel_path
+
+
+def _load_from_db():
+    import across_db
+    result = across_db.get_seiban_list_from_db()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', 'DB取得エラー'))
+    return {
+        item['seiban']: {
+            'product_name': item.get('product_name', ''),
+            'customer_abbr': item.get('customer_name', ''),  # customer_name → customer_abbr
+            'memo2': item.get('memo2', '')
+        }
+        for item in result['items'] if item.get('seiban')
+    }
+
+
+def _load_from_excel():
+    seiban_path = Path(EXCEL_PATH)
+    if not seiban_path.exists():
+        raise FileNotFoundError(f"製番一覧表が見つかりません: {seiban_path}")
+
+    df = pd.read_excel(str(seiban_path), sheet_name='製番')
+
+    def text(row, col):
+        value = row.get(col)
+        return str(value) if pd.notna(value) else ''
+
+    return {
+        str(row['製番']): {
+            'product_name': text(row, '品名'),
+            'customer_abbr': text(row, '得意先略称'),
+            'memo2': text(row, 'メモ２')
+        }
+        for _, row in df.iterrows() if pd.notna(row.get('製番'))
+    }
+
+
+def refresh(force=True):
+    """
+    製番マスタを読み直す（V_D受注、失敗時は製番一覧表）
+
+    Args:
+        force: Falseの場合、待っている間に他のスレッドが読み直していれば読み直さない
+
+    Returns:
+        bool: 読み込めたか（失敗時は前回の内容を保持）
+    """
+    global _snapshot, _last_attempt
+    with _load_lock:
+        if not force and _snapshot is not None and _snapshot[2]:
+            return True
+        _last_attempt = time.time()
+        entries, source = None, None
+        try:
+            entries, source = _load_from_db(), 'V_D受注'
+        except Exception as e:
+            print(f"製番マスタ: DB取得エラー、Excelにフォールバック: {e}")
+            if EXCEL_PATH:
+                try:
+                    entries, source = _load_from_excel(), 'Excel'
+                except Exception as excel_error:
+                    e = excel_error
+            if entries is None:
+                _stats['errors'] += 1
+                _stats['last_error'] = str(e)
+                print(f"製番マスタ読み込みエラー（前回の内容を使用）: {e}")
+                return False
+
+        _snapshot = (entries, sorted(entries), time.time(), source)
+        _stats['loads'] += 1
+        _stats['last_error'] = None
+    print(f"製番マスタ読み込み: {len(entries)}件（{source}）")
+    return True
+
+
+def _current():
+    """現在の内容（未読み込み・無効化後は読み込んでから返す）"""
+    snapshot = _snapshot
+    if (snapshot is None or snapshot[2] == 0) and time.time() - _last_attempt >= RETRY_INTERVAL_SEC:
+        refresh(force=False)
+        snapshot = _snapshot
+    return snapshot or ({}, [], 0, None)
+
+
+def invalidate():
+    """次の参照時（定期読み直しスレッドがあれば即時）に読み直す"""
+    global _snapshot, _last_attempt
+    if _snapshot is not None:
+        entries, keys, _, source = _snapshot
+        _snapshot = (entries, keys, 0, source)
+    _last_attempt = 0
+    _stats['invalidations'] += 1
+    _wake.set()
+
+
+def _refresh_loop():
+    while True:
+        snapshot = _snapshot
+        if snapshot is None or time.time() - snapshot[2] >= REFRESH_INTERVAL_SEC:
+            refresh()
+        # 次の定期読み直しまで待つ（失敗直後は RETRY_INTERVAL_SEC 空ける）
+        snapshot = _snapshot
+        now = time.time()
+        due = REFRESH_INTERVAL_SEC - (now - snapshot[2]) if snapshot else 0
+        _wake.wait(max(due, RETRY_INTERVAL_SEC - (now - _last_attempt), 1))
+        _wake.clear()
+
+
+def start_refresh_thread():
+    """定期読み直しスレッドを起動（起動済みなら何もしない）"""
+    global _refresher
+    if _refresher is not None and _refresher.is_alive():
+        return
+    with _load_lock:
+        if _refresher is not None and _refresher.is_alive():
+            return
+        _refresher = threading.Thread(target=_refresh_loop, name='seiban-master-refresh', daemon=True)
+        _refresher.start()
+    print(f"製番マスタ定期読み直し開始（間隔 {REFRESH_INTERVAL_SEC}秒）")
+
+
+def _refresh_on_miss():
+    """未登録の製番を参照した時の読み直し（前回の読み込み・読み直しから MISS_REFRESH_INTERVAL_SEC 以上空ける）"""
+    global _last_miss_refresh
+    snapshot = _snapshot
+    loaded_at = snapshot[2] if snapshot else 0
+    with _miss_lock:
+        if time.time() - max(_last_miss_refresh, loaded_at) < MISS_REFRESH_INTERVAL_SEC:
+            return False
+        _last_miss_refresh = time.time()
+    _stats['miss_refreshes'] += 1
+    return refresh()
+
+
+def get(seiban):
+    """
+    製番の情報を取得（未登録なら読み直してから引き直す。読み直しは MISS_REFRESH_INTERVAL_SEC に1回まで）
+
+    Returns:
+        dict: {'product_name', 'customer_abbr', 'memo2'}（未登録ならNone）
+    """
+    info = _current()[0].get(seiban)
+    if info is None and seiban and _refresh_on_miss():
+        info = _current()[0].get(seiban)
+    return info
+
+
+def get_all():
+    """全製番の {製番: 情報} （共有の辞書のため変更しないこと）"""
+    return _current()[0]
+
+
+def find_by_prefix(prefix, limit=None):
+    """
+    製番の前方一致検索（製番の降順）
+
+    Returns:
+        list: [(製番, 情報), ...]
+    """
+    entries, keys, _, _ = _current()
+    start = bisect.bisect_left(keys, prefix)
+    end = bisect.bisect_left(keys, prefix + '\uffff')
+    matched = keys[start:end][::-1]
+    if limit is not None:
+        matched = matched[:limit]
+    return [(seiban, entries[seiban]) for seiban in matched]
+
+
+def search(text, fields=('product_name', 'customer_abbr'), limit=None):
+    """
+    品名・得意先略称などの部分一致検索（大文字小文字を区別しない、製番の降順）
+
+    Args:
+        text: 検索文字列
+        fields: 検索する項目（'seiban' を含めると製番も対象）
+
+    Returns:
+        list: [(製番, 情報), ...]
+    """
+    needle = text.lower()
+    if not needle:
+        return []
+    entries, keys, _, _ = _current()
+    matched = []
+    for seiban in reversed(keys):
+        info = entries[seiban]
+        if any(needle in (seiban if f == 'seiban' else info.get(f, '')).lower() for f in fields):
+            matched.append((seiban, info))
+            if limit is not None and len(matched) >= limit:
+                break
+    return matched
+
+
+def get_stats():
+    """読み込み状況（件数・取得元・最終読み込み時刻）"""
+    snapshot = _snapshot
+    loaded_at = snapshot[2] if snapshot else None
+    return dict(
+        _stats,
+        count=len(snapshot[0]) if snapshot else 0,
+        source=snapshot[3] if snapshot else None,
+        loaded_at=loaded_at or None,
+        age_sec=round(time.time() - loaded_at) if loaded_at else None,
+        refresh_interval_sec=REFRESH_INTERVAL_SEC,
+        miss_refresh_interval_sec=MISS_REFRESH_INTERVAL_SEC,
+        running=_refresher is not None and _refresher.is_alive()
+    )
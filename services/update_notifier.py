@@ -0,0 +1,227 @@
+"""
+Across DB 更新通知 - update_notifier.py
+サーバー内の1本のポーリングスレッドで check_db_updates() を実行し、
+結果を Server-Sent Events で接続中の全ブラウザに配信する
+
+各イベントには通番（seq）を付け、直近のイベントをリングバッファに保持する。
+再接続したクライアントは Last-Event-ID（または ?since=）以降のイベントを受け取り直せる。
+SSE購読者がいない間はポーリングを休止し、stop() でスレッドを終了できる。
+"""
+import json
+import threading
+import time
+from collections import deque
+
+# 配信設定（configure() で変更可能）
+POLL_INTERVAL_SEC = 300      # DB差分チェックの間隔（秒）
+EVENT_BUFFER_SIZE = 200      # 再接続時に再送できるイベント数
+KEEPALIVE_SEC = 25           # 無通信時に送るコメント行の間隔（プロキシのタイムアウト対策）
+
+_events = deque(maxlen=EVENT_BUFFER_SIZE)   # [(seq, result)]
+_seq = 0
+_cond = threading.Condition()
+_check_lock = threading.Lock()              # 定期チェックと手動チェックの重複実行を防ぐ
+_poller = None
+_stop = threading.Event()                   # 起動中のポーリングスレッドの停止指示
+_wake = threading.Event()
+_subscribed = threading.Event()             # SSE購読者が1人以上いる間セット
+_stats = {'polls': 0, 'errors': 0, 'subscribers': 0, 'last_poll': None}
+
+
+def configure(poll_interval=None, buffer_size=None):
+    """ポーリング間隔（秒）・再送用バッファ件数を変更"""
+    global POLL_INTERVAL_SEC, _events
+    if poll_interval is not None:
+        POLL_INTERVAL_SEC = poll_interval
+        _wake.set()
+    if buffer_size is not None:
+        with _cond:
+            _events = deque(_events, maxlen=buffer_size)
+
+
+def _publish(result):
+    """チェック結果に通番を付けてバッファに追加し、待機中の購読者を起こす"""
+    global _seq
+    with _cond:
+        _seq += 1
+        result = dict(result, seq=_seq)
+        _events.append((_seq, result))
+        _cond.notify_all()
+    return result
+
+
+def poll_now():
+    """
+    DB差分チェックを1回実行して全購読者に配信
+
+    Returns:
+        dict: check_db_updates() の結果に 'seq' を付けたもの
+    """
+    import across_db
+    with _check_lock:
+        try:
+            result = across_db.check_db_updates()
+        except Exception as e:
+            result = {'success': False, 'has_updates': False, 'error': str(e)}
+        _stats['polls'] += 1
+        _stats['last_poll'] = time.time()
+        if not result.get('success'):
+            _stats['errors'] += 1
+        if result.get('tehai_changes', {}).get('new_seibans'):
+            from services import seiban_master
+            seiban_master.invalidate()   # 新規製番を製番マスタに反映
+        return _publish(result)
+
+
+def _poll_loop(stop):
+    while not stop.is_set():
+        # 購読者がいない間はDBに問い合わせない（購読開始で _subscribed がセットされ再開）
+        if not _subscribed.is_set():
+            _subscribed.wait()
+            continue
+        # 休止明け・手動チェック直後は前回チェックから間隔が空くまで待つ
+        due = POLL_INTERVAL_SEC - (time.time() - (_stats['last_poll'] or 0))
+        if due > 0:
+            _wake.wait(due)
+            _wake.clear()
+            continue
+        poll_now()
+
+
+def ensure_started():
+    """ポーリングスレッドを起動（最初の購読時、stop() 後は次の購読時に再起動）"""
+    global _poller, _stop
+    with _cond:
+        if _poller is not None and _poller.is_alive() and not _stop.is_set():
+            return
+        _stop = threading.Event()
+        _poller = threading.Thread(target=_poll_loop, args=(_stop,),
+                                   name='across-update-poller', daemon=True)
+        _poller.start()
+    print(f"Across更新ポーリング開始（間隔 {POLL_INTERVAL_SEC}秒）")
+
+
+def stop(timeout=5):
+    """
+    ポーリングスレッドを停止
+
+    実行中のチェックがあれば終わるまで最大 timeout 秒待つ。
+    接続中のSSEストリームはそのまま（新しい結果が配信されないだけ）
+
+    Returns:
+        bool: スレッドが終了したか
+    """
+    global _poller
+    with _cond:
+        poller = _poller
+        _stop.set()
+    _wake.set()
+    _subscribed.set()       # 休止中の待機を解除（ループは _stop を見て抜ける）
+    if poller is None:
+        return True
+    poller.join(timeout)
+    with _cond:
+        if _subscribed.is_set() and _stats['subscribers'] == 0:
+            _subscribed.clear()
+        if _poller is poller and not poller.is_alive():
+            _poller = None
+    return not poller.is_alive()
+
+
+def latest(max_age=None):
+    """
+    最新のチェック結果
+
+    Args:
+        max_age: 指定時、最後のチェックがこの秒数より古ければNone（購読者がいない間は休止しているため）
+
+    Returns:
+        dict or None: まだ1回もチェックしていなければNone
+    """
+    if max_age is not None and time.time() - (_stats['last_poll'] or 0) > max_age:
+        return None
+    with _cond:
+        return _events[-1][1] if _events else None
+
+
+def events_since(seq):
+    """
+    指定通番より後のイベントを取得
+
+    バッファから溢れて欠落がある場合、またはサーバー再起動で通番が巻き戻った場合は
+    最新の結果だけを返す（スナップショット表示は最新で足り、通知の取りこぼしは 'gap' で知らせる）
+
+    Returns:
+        tuple: (イベントのリスト, 欠落があったか)
+    """
+    with _cond:
+        if not _events:
+            return [], seq is not None and seq > _seq
+        oldest = _events[0][0]
+        if seq is not None and (seq + 1 < oldest or seq > _seq):
+            return [_events[-1][1]], True
+        return [r for s, r in _events if seq is None or s > seq], False
+
+
+def _format_event(result, event='db-update'):
+    data = json.dumps(result, ensure_ascii=False, default=str)
+    return f"id: {result['seq']}\nevent: {event}\ndata: {data}\n\n"
+
+
+def stream(last_seq=None):
+    """
+    SSEストリームのジェネレータ
+
+    Args:
+        last_seq: クライアントが最後に受け取った通番（Noneなら最新の結果のみ送る）
+
+    Yields:
+        str: text/event-stream 形式のメッセージ
+    """
+    ensure_started()
+    with _cond:
+        _stats['subscribers'] += 1
+        _subscribed.set()
+    try:
+        yield "retry: 5000\n\n"
+
+        if last_seq is None:
+            current = latest()
+            pending = [current] if current else []
+        else:
+            pending, gap = events_since(last_seq)
+            if gap:
+                yield f"event: gap\ndata: {json.dumps({'since': last_seq})}\n\n"
+        for result in pending:
+            yield _format_event(result)
+        if pending:
+            sent = pending[-1]['seq']
+        else:
+            with _cond:
+                sent = last_seq if last_seq is not None and last_seq <= _seq else 0
+
+        while True:
+            with _cond:
+                _cond.wait_for(lambda: _seq > sent, timeout=KEEPALIVE_SEC)
+                fresh = [r for s, r in _events if s > sent]
+            if not fresh:
+                yield ": keepalive\n\n"
+                continue
+            for result in fresh:
+                yield _format_event(result)
+            sent = fresh[-1]['seq']
+    finally:
+        with _cond:
+            _stats['subscribers'] -= 1
+            if _stats['subscribers'] == 0:
+                _subscribed.clear()
+
+
+def get_stats():
+    """配信状況（購読者数・最新通番・ポーリング回数）"""
+    with _cond:
+        seq = _seq
+        buffered = len(_events)
+    running = _poller is not None and _poller.is_alive() and not _stop.is_set()
+    return dict(_stats, seq=seq, buffered=buffered, poll_interval_sec=POLL_INTERVAL_SEC,
+                running=running, suspended=running and not _subscribed.is_set())
@@ -3,6 +3,26 @@
  * V_D系ビューへの直接クエリUI
  */
 
+// ========== NDJSONストリーム読み込み ==========
+// サーバーの ?format=ndjson レスポンスを1行（1イベント）ずつ onEvent に渡す
+async function readNdjson(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) onEvent(JSON.parse(line));
+        }
+        if (done) break;
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
 // ========== 接続テスト ==========
 async function testAcrossConnection() {
     const resultDiv = document.getElementById('acrossTestResult');
@@ -413,8 +433,9 @@ async function searchMihatchu() {
     }
 }
 
-// ========== DB更新チェック ==========
-async function checkDbUpdates() {
+// ========== 製番別件数チェック ==========
+// （index.html の checkDbUpdates はサーバー側の更新通知用。名前が衝突しないよう別名にしている）
+async function checkSeibanCounts() {
     const resultDiv = document.getElementById('dbUpdateCheckResult');
     resultDiv.innerHTML = '<div style="padding:10px; color:#666;">更新確認中...</div>';
 
@@ -435,7 +456,7 @@ async function checkDbUpdates() {
     }
 
     try {
-        const res = await fetch('/api/across-db/check-updates', {
+        const res = await fetch('/api/across-db/seiban-counts', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ seibans: seibans })
@@ -520,7 +541,7 @@ function autoCheckDbUpdates() {
     setTimeout(() => {
         const resultDiv = document.getElementById('dbUpdateCheckResult');
         if (resultDiv && document.querySelectorAll('.seiban-cb').length > 0) {
-            checkDbUpdates();
+            checkSeibanCounts();
         }
     }, 2000);
 }
@@ -542,25 +563,46 @@ async function searchZaikoBuhin() {
     });
 
     try {
-        const res = await fetch('/api/across-db/zaiko-buhin', {
+        // 全製番だと件数が多いので NDJSON で受け取り、届いた行から描画する
+        const res = await fetch('/api/across-db/zaiko-buhin?format=ndjson', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ seibans: seibans.length > 0 ? seibans : null })
         });
-        const data = await res.json();
-
-        if (data.error) {
-            resultDiv.innerHTML = '<div class="alert alert-danger">' + escapeForTable(data.error) + '</div>';
+        if (!res.ok) {
+            const data = await res.json();
+            resultDiv.innerHTML = '<div class="alert alert-danger">' + escapeForTable(data.error || '検索失敗') + '</div>';
             return;
         }
 
-        if (!data.success) {
-            resultDiv.innerHTML = '<div class="alert alert-danger">検索失敗</div>';
-            return;
+        const data = { columns: [], rows: [], by_seiban: {}, count: 0, seiban_count: 0 };
+        let failed = false;
+        await readNdjson(res, event => {
+            if (event.type === 'columns') {
+                data.columns = event.columns;
+            } else if (event.type === 'rows') {
+                for (const row of event.rows) {
+                    const seiban = row[0] || '';
+                    (data.by_seiban[seiban] = data.by_seiban[seiban] || []).push(row);
+                }
+                data.rows.push(...event.rows);
+                data.count = data.rows.length;
+                data.seiban_count = Object.keys(data.by_seiban).length;
+                renderZaikoBuhinResult(data, resultDiv);
+            } else if (event.type === 'end') {
+                data.count = event.count;
+                data.seiban_count = event.seiban_count;
+                renderZaikoBuhinResult(data, resultDiv);
+            } else if (event.type === 'error') {
+                failed = true;
+                resultDiv.insertAdjacentHTML('afterbegin',
+                    '<div class="alert alert-danger">' + escapeForTable(event.error) + '</div>');
+            }
+        });
+        if (!failed && data.rows.length === 0) {
+            renderZaikoBuhinResult(data, resultDiv);
         }
 
-        renderZaikoBuhinResult(data, resultDiv);
-
     } catch (e) {
         resultDiv.innerHTML = '<div class="alert alert-danger">検索失敗: ' + e + '</div>';
     }
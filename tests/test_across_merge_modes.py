@@ -0,0 +1,131 @@
+"""
+Across DB取込のマージ方式（'python' / 'sql'）の一致テスト
+
+スタンドイン（SQLite）に空白類・大文字小文字・NULLを含むキーの手配リストと発注を作り、
+MergeUtils による照合とDB側の照合（_pushdown_merge_sql）が同じ発注を選ぶことを確認する。
+"""
+import random
+
+import pytest
+
+import across_db
+import across_standin
+from utils.merge_utils import MergeUtils
+
+
+SEIBANS = ['MHT0620', 'MHT0621']
+
+# 同じ値の表記ゆれ（前後の空白類、文字列中の空白、大文字小文字、NULL）
+MATERIALS = ['UNIT-A', ' UNIT-A', 'UNIT-A\t', '　UNIT-A', 'UNIT-A\r\n', '\xa0UNIT-A ',
+             'unit-a', 'UNIT-B', '', '  ', None]
+SPECS = ['NKA-001', 'NKA-001 ', '\tNKA-001', 'NKA-001　', 'NKA 001', 'NKA　001', 'NKA\t001',
+         'nka-001', 'NKA-002', '　', '', None]
+ORDER_TYPES = ['追加工', ' 追加工', '追加工　', '加工用ブランク', '\t', '', None]
+
+
+def _row(view, values):
+    """列名→値のdictから STANDIN_VIEWS の列順の行タプルを作成（未指定の列はNULL）"""
+    return tuple(values.get(name) for name, _ in across_standin.STANDIN_VIEWS[view])
+
+
+def _edge_case_rows(seed):
+    rng = random.Random(seed)
+    tehai = []
+    hatchu = []
+    order_numbers = rng.sample(range(1, 1000), 80)
+    for seiban in SEIBANS:
+        for line in range(1, 41):
+            tehai.append(_row('V_D手配リスト', {
+                '製番': seiban, 'ページNo': 1, '行No': line, '品名': f'部品{line}',
+                '材質': rng.choice(MATERIALS), '仕様１': rng.choice(SPECS), '手配区分': rng.choice(ORDER_TYPES),
+            }))
+        for _ in range(40):
+            hatchu.append(_row('V_D発注', {
+                '発注番号': f'{order_numbers.pop():08d}', '製番': seiban,
+                '材質': rng.choice(MATERIALS), '仕様１': rng.choice(SPECS), '手配区分': rng.choice(ORDER_TYPES),
+            }))
+    return {'V_D手配リスト': tehai, 'V_D発注': hatchu}
+
+
+@pytest.fixture
+def standin(tmp_path):
+    previous_path = across_db.STANDIN_PATH
+    previous_backend = across_db.configure_backend()
+
+    def create(rows):
+        path = across_standin.create_standin_database(tmp_path / 'standin.db', rows)
+        across_db.configure_backend('standin', path)
+        return path
+
+    yield create
+    across_db.configure_backend(previous_backend, previous_path)
+
+
+def _python_matches(sources):
+    """mode='python' の取得結果を MergeUtils で照合 → {(製番, 行No): (発注番号, マッチ種別)}"""
+    matches = {}
+    for seiban, source in sources.items():
+        positions, match_types, _ = MergeUtils.match_records(source['tehai'], source['hatchu'])
+        for rec, pos, match_type in zip(source['tehai'], positions, match_types):
+            order_number = source['hatchu'][pos]['発注番号'] if pos >= 0 else None
+            matches[(seiban, rec['行No'])] = (order_number, match_type)
+    return matches
+
+
+def _sql_matches(sources):
+    """mode='sql' の取得結果 → {(製番, 行No): (発注番号, マッチ種別)}"""
+    matches = {}
+    for seiban, source in sources.items():
+        for rec in source['merged']:
+            rank = rec.get('一致')
+            rank = int(rank) if rank not in (None, '') else None
+            match_type = across_db.PUSHDOWN_MATCH_TYPES.get(rank, MergeUtils.MATCH_NONE)
+            matches[(seiban, rec['行No'])] = (rec.get('発注番号') or None, match_type)
+    return matches
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sql_merge_matches_python_merge(standin, seed):
+    standin(_edge_case_rows(seed))
+
+    python_sources = across_db.fetch_merge_sources(SEIBANS, include_mihatchu=False, mode='python')
+    sql_sources = across_db.fetch_merge_sources(SEIBANS, include_mihatchu=False, mode='sql')
+
+    expected = _python_matches(python_sources)
+    assert len(expected) == 80
+    assert any(order_number for order_number, _ in expected.values())
+    assert _sql_matches(sql_sources) == expected
+
+
+def test_whitespace_variants_match_in_both_modes(standin):
+    """前後のタブ・全角スペース・改行・NBSPは除去し、文字列中の空白は区別する"""
+    standin({
+        'V_D手配リスト': [
+            _row('V_D手配リスト', {'製番': 'MHT0620', '行No': 1, '材質': '　UNIT-A\t',
+                                   '仕様１': 'NKA-001\r\n', '手配区分': '追加工'}),
+            _row('V_D手配リスト', {'製番': 'MHT0620', '行No': 2, '材質': 'UNIT-B',
+                                   '仕様１': '\xa0NKA-002\u3000', '手配区分': '\t'}),
+            _row('V_D手配リスト', {'製番': 'MHT0620', '行No': 3, '材質': 'UNIT-A',
+                                   '仕様１': 'nka-001', '手配区分': ''}),
+            _row('V_D手配リスト', {'製番': 'MHT0620', '行No': 4, '材質': '',
+                                   '仕様１': 'NKA　002', '手配区分': ''}),
+        ],
+        'V_D発注': [
+            _row('V_D発注', {'発注番号': '00000001', '製番': 'MHT0620', '材質': 'UNIT-A',
+                             '仕様１': ' NKA-001', '手配区分': '追加工　'}),
+            _row('V_D発注', {'発注番号': '00000002', '製番': 'MHT0620', '材質': 'UNIT-C',
+                             '仕様１': 'NKA-002\t', '手配区分': '加工用ブランク'}),
+            _row('V_D発注', {'発注番号': '00000003', '製番': 'MHT0620', '材質': '',
+                             '仕様１': 'NKA 002', '手配区分': ''}),
+        ],
+    })
+
+    expected = {
+        ('MHT0620', '1'): ('00000001', MergeUtils.MATCH_PRIMARY),
+        ('MHT0620', '2'): ('00000002', MergeUtils.MATCH_FALLBACK),
+        ('MHT0620', '3'): (None, MergeUtils.MATCH_NONE),
+        ('MHT0620', '4'): (None, MergeUtils.MATCH_NONE),
+    }
+    for mode, matches in (('python', _python_matches), ('sql', _sql_matches)):
+        sources = across_db.fetch_merge_sources(['MHT0620'], include_mihatchu=False, mode=mode)
+        assert matches(sources) == expected, mode
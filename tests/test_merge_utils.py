@@ -0,0 +1,259 @@
+"""
+MergeUtils のマッチ処理テスト
+
+索引による照合が、旧実装（発注データを手配リスト1行ごとに全件走査）と
+同じ結果になることを確認する。
+
+    python -m pytest tests
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from utils.merge_utils import MergeUtils
+
+
+def reference_match(tehai_records, order_records):
+    """旧実装と同じ全件走査によるマッチ（索引版との等価性確認用）"""
+    norm = MergeUtils.normalize_key
+    positions = []
+    for t in tehai_records:
+        material, spec1 = norm(t.get('材質')), norm(t.get('仕様１'))
+        seiban, order_type = norm(t.get('製番')), norm(t.get('手配区分'))
+        pos = -1
+        if material and spec1 and seiban:
+            for i, h in enumerate(order_records):
+                if (norm(h.get('材質')) == material and norm(h.get('仕様１')) == spec1
+                        and norm(h.get('製番')) == seiban):
+                    pos = i
+                    break
+        if pos < 0 and spec1 and seiban:
+            for i, h in enumerate(order_records):
+                if norm(h.get('製番')) == seiban and norm(h.get('仕様１')) == spec1:
+                    h_type = norm(h.get('手配区分'))
+                    if order_type and h_type and order_type != h_type:
+                        continue
+                    pos = i
+                    break
+        positions.append(pos)
+    return positions
+
+
+def rec(material='', spec1='', seiban='', order_type='', **extra):
+    return dict({'材質': material, '仕様１': spec1, '製番': seiban, '手配区分': order_type}, **extra)
+
+
+# ========================================
+# normalize_key
+# ========================================
+
+@pytest.mark.parametrize('value, expected', [
+    (' NKA-00437 ', 'NKA-00437'),
+    (11.0, '11'),
+    (11.5, '11.5'),
+    (11, '11'),
+    (None, ''),
+    (float('nan'), ''),
+    ('', ''),
+])
+def test_normalize_key(value, expected):
+    assert MergeUtils.normalize_key(value) == expected
+
+
+# ========================================
+# 決まったケース
+# ========================================
+
+def test_primary_match():
+    orders = [rec('UNIT-B', 'NKA-001', 'MHT0620'), rec('UNIT-A', 'NKA-001', 'MHT0620')]
+    positions, types, stats = MergeUtils.match_records([rec('UNIT-A', 'NKA-001', 'MHT0620')], orders)
+    assert positions == [1]
+    assert types == [MergeUtils.MATCH_PRIMARY]
+    assert stats['primary'] == 1 and stats['fallback'] == 0
+
+
+def test_primary_wins_over_earlier_fallback_candidate():
+    """材質違いの行が先にあっても、材質まで一致する行を優先する"""
+    orders = [rec('UNIT-B', 'NKA-001', 'MHT0620'), rec('UNIT-A', 'NKA-001', 'MHT0620')]
+    tehai = [rec('UNIT-A', 'NKA-001', 'MHT0620')]
+    positions, _, _ = MergeUtils.match_records(tehai, orders)
+    assert positions == reference_match(tehai, orders) == [1]
+
+
+def test_fallback_when_material_differs_or_blank():
+    orders = [rec('UNIT-B', 'NKA-001', 'MHT0620')]
+    tehai = [rec('UNIT-A', 'NKA-001', 'MHT0620'), rec('', 'NKA-001', 'MHT0620')]
+    positions, types, stats = MergeUtils.match_records(tehai, orders)
+    assert positions == [0, 0]
+    assert types == [MergeUtils.MATCH_FALLBACK] * 2
+    assert stats['fallback'] == 2
+
+
+def test_typed_tehai_falls_back_to_untyped_order():
+    """手配リストに区分があり、同区分の発注が無い場合は区分空欄の発注にマッチする"""
+    orders = [
+        rec('', 'NKA-001', 'MHT0620', '加工用ブランク'),
+        rec('', 'NKA-001', 'MHT0620', ''),
+    ]
+    tehai = [rec('', 'NKA-001', 'MHT0620', '追加工')]
+    positions, types, _ = MergeUtils.match_records(tehai, orders)
+    assert positions == reference_match(tehai, orders) == [1]
+    assert types == [MergeUtils.MATCH_FALLBACK]
+
+
+def test_typed_tehai_takes_earliest_of_same_type_or_untyped():
+    orders = [
+        rec('', 'NKA-001', 'MHT0620', ''),
+        rec('', 'NKA-001', 'MHT0620', '追加工'),
+    ]
+    tehai = [rec('', 'NKA-001', 'MHT0620', '追加工')]
+    positions, _, _ = MergeUtils.match_records(tehai, orders)
+    assert positions == reference_match(tehai, orders) == [0]
+
+
+def test_typed_tehai_does_not_match_other_type():
+    orders = [rec('', 'NKA-001', 'MHT0620', '加工用ブランク')]
+    positions, types, stats = MergeUtils.match_records([rec('', 'NKA-001', 'MHT0620', '追加工')], orders)
+    assert positions == [-1]
+    assert types == [MergeUtils.MATCH_NONE]
+    assert stats['unmatched'] == 1
+
+
+def test_untyped_tehai_matches_any_type():
+    orders = [rec('', 'NKA-001', 'MHT0620', '加工用ブランク'), rec('', 'NKA-001', 'MHT0620', '')]
+    positions, _, _ = MergeUtils.match_records([rec('', 'NKA-001', 'MHT0620', '')], orders)
+    assert positions == [0]
+
+
+def test_blank_spec_never_matches():
+    """仕様１が空の行は材質・製番が一致してもマッチしない"""
+    orders = [rec('UNIT-A', '', 'MHT0620'), rec('UNIT-A', 'NKA-001', 'MHT0620')]
+    tehai = [rec('UNIT-A', '', 'MHT0620'), rec('UNIT-A', '  ', 'MHT0620'), rec('UNIT-A', None, 'MHT0620')]
+    positions, _, stats = MergeUtils.match_records(tehai, orders)
+    assert positions == reference_match(tehai, orders) == [-1, -1, -1]
+    assert stats['match_rate'] == 0
+
+
+def test_blank_seiban_never_matches():
+    orders = [rec('UNIT-A', 'NKA-001', '')]
+    positions, _, _ = MergeUtils.match_records([rec('UNIT-A', 'NKA-001', '')], orders)
+    assert positions == [-1]
+
+
+def test_duplicate_keys_first_wins():
+    orders = [
+        rec('UNIT-A', 'NKA-001', 'MHT0620', '', 発注番号='P-1'),
+        rec('UNIT-A', 'NKA-001', 'MHT0620', '', 発注番号='P-2'),
+        rec('UNIT-B', 'NKA-002', 'MHT0620', '追加工', 発注番号='P-3'),
+        rec('UNIT-C', 'NKA-002', 'MHT0620', '追加工', 発注番号='P-4'),
+    ]
+    tehai = [
+        rec('UNIT-A', 'NKA-001', 'MHT0620'),
+        rec('UNIT-A', 'NKA-001', 'MHT0620'),
+        rec('UNIT-Z', 'NKA-002', 'MHT0620', '追加工'),
+    ]
+    positions, _, _ = MergeUtils.match_records(tehai, orders)
+    assert positions == reference_match(tehai, orders) == [0, 0, 2]
+
+
+def test_keys_are_normalized():
+    orders = [rec(' UNIT-A ', 'NKA-001 ', 'MHT0620', None), rec('UNIT-B', 11.0, 'MHT0620')]
+    tehai = [rec('UNIT-A', ' NKA-001', ' MHT0620 ', ''), rec('UNIT-B', '11', 'MHT0620')]
+    positions, types, _ = MergeUtils.match_records(tehai, orders)
+    assert positions == reference_match(tehai, orders) == [0, 1]
+    assert types == [MergeUtils.MATCH_PRIMARY] * 2
+
+
+def test_match_columns_with_prebuilt_index():
+    """正規化済みの列と build_order_index() の索引で直接照合する"""
+    index = MergeUtils.build_order_index(
+        ['UNIT-A', ''], ['NKA-001', 'NKA-002'], ['MHT0620', 'MHT0620'], ['', '追加工'])
+    positions, types, stats = MergeUtils.match_columns(
+        (['UNIT-A', 'UNIT-A', ''], ['NKA-001', 'NKA-002', 'NKA-003'],
+         ['MHT0620', 'MHT0620', 'MHT0620'], ['', '追加工', '']),
+        index)
+    assert positions == [0, 1, -1]
+    assert types == [MergeUtils.MATCH_PRIMARY, MergeUtils.MATCH_FALLBACK, MergeUtils.MATCH_NONE]
+    assert stats['matched'] == 2
+
+
+def test_empty_inputs():
+    assert MergeUtils.match_records([], [rec('A', 'B', 'C')])[0] == []
+    positions, _, stats = MergeUtils.match_records([rec('A', 'B', 'C')], [])
+    assert positions == [-1]
+    assert stats == {'total': 1, 'primary': 0, 'fallback': 0, 'matched': 0,
+                     'unmatched': 1, 'match_rate': 0}
+
+
+# ========================================
+# 全件走査との等価性（ランダム）
+# ========================================
+
+def _random_record(rng):
+    return {
+        '材質': rng.choice(['', 'UNIT-A', 'UNIT-B', ' UNIT-A ', None]),
+        '仕様１': rng.choice(['', 'NKA-001', 'NKA-002', 'NKA-003 ', 11.0, '11']),
+        '製番': rng.choice(['MHT0620', 'MHT0621', '']),
+        '手配区分': rng.choice(['', '追加工', '加工用ブランク', None]),
+    }
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_nested_loop_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        order_records = [_random_record(rng) for _ in range(rng.randint(0, 30))]
+        tehai_records = [_random_record(rng) for _ in range(rng.randint(0, 30))]
+        positions, types, stats = MergeUtils.match_records(tehai_records, order_records)
+        expected = reference_match(tehai_records, order_records)
+        assert positions == expected
+        assert stats['matched'] == sum(1 for p in expected if p >= 0)
+        assert [t != MergeUtils.MATCH_NONE for t in types] == [p >= 0 for p in expected]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_dataframe_matching_with_shared_index(seed):
+    """DataFrame版・全製番分の索引を製番ごとに使い回しても全件走査と同じ"""
+    rng = random.Random(seed)
+    order_records = [_random_record(rng) for _ in range(60)]
+    tehai_records = [_random_record(rng) for _ in range(60)]
+    df_order = pd.DataFrame(order_records)
+    df_tehai = pd.DataFrame(tehai_records)
+
+    positions, _, _ = MergeUtils.match_dataframes(df_tehai, df_order)
+    assert positions == reference_match(tehai_records, order_records)
+
+    index = MergeUtils.index_dataframe(df_order)
+    for seiban, group in df_tehai.groupby('製番'):
+        group_positions, _, _ = MergeUtils.match_dataframes(group, None, index=index)
+        expected = reference_match(group.to_dict('records'), order_records)
+        assert group_positions == expected, seiban
+
+
+# ========================================
+# apply_order_columns
+# ========================================
+
+def test_apply_order_columns():
+    df_order = pd.DataFrame([
+        rec('UNIT-A', 'NKA-001', 'MHT0620', 発注番号=1001, 仕入先略称='A社', 仕入先CD=501,
+            納期=pd.Timestamp('2026-04-03')),
+        rec('', 'NKA-002', 'MHT0620', 発注番号=1002, 仕入先略称='B社', 仕入先CD=502, 納期=''),
+    ])
+    df_tehai = pd.DataFrame([
+        rec('UNIT-A', 'NKA-001', 'MHT0620', 納期='26/01/01'),
+        rec('', 'NKA-002', 'MHT0620', 納期='26/02/02'),
+        rec('', 'NKA-009', 'MHT0620', 納期='26/03/03'),
+    ])
+    positions, types, _ = MergeUtils.match_dataframes(df_tehai, df_order)
+    merged = MergeUtils.apply_order_columns(df_tehai, df_order, positions, types)
+
+    assert merged['発注番号'].tolist() == ['1001', '1002', '']
+    assert merged['仕入先略称'].tolist() == ['A社', 'B社', '']
+    assert merged['仕入先CD'].tolist() == ['501', '502', '']
+    # 発注側の納期が空なら手配リストの値を残す
+    assert merged['納期'].tolist() == ['26/04/03', '26/02/02', '26/03/03']
+    assert merged['match_type'].tolist() == [
+        MergeUtils.MATCH_PRIMARY, MergeUtils.MATCH_FALLBACK, MergeUtils.MATCH_NONE]
+    assert '発注番号' not in df_tehai.columns
@@ -0,0 +1,113 @@
+"""
+取込（save_to_database）の再取込テスト
+
+受入済みの明細を再取込しても受入状態（is_received / received_at / received_quantity と
+備考の過不足メモ）が失われないことを確認する。
+
+app.py は Excel COM（win32com・pythoncom）を import するため Windows 環境でのみ実行する。
+DBは TestConfig（FLASK_ENV=testing）の instance/test_order_management.db を使う。
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+os.environ['FLASK_ENV'] = 'testing'
+pytest.importorskip('win32com.client')
+pytest.importorskip('pythoncom')
+
+import app as order_app  # noqa: E402
+
+SEIBAN = 'MHT0620'
+RECEIVED_AT = datetime(2026, 9, 24, 10, 30)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    assert order_app.app.config['SQLALCHEMY_DATABASE_URI'].endswith('test_order_management.db')
+    # 製番マスタ（Across DB）・Excel出力（共有フォルダ）には接続しない
+    monkeypatch.setattr(order_app.seiban_master, 'get',
+                        lambda seiban: {'product_name': '自動搬送装置', 'customer_abbr': 'A社'})
+    monkeypatch.setattr(order_app, 'get_order_excel_path', lambda *args, **kwargs: None)
+
+    with order_app.app.app_context():
+        order_app.db.drop_all()
+        order_app.db.create_all()
+        yield order_app.db
+        order_app.db.session.remove()
+        order_app.db.drop_all()
+
+
+def _merged_dataframe(delivery_date='26/09/25', remarks=''):
+    """save_to_database() に渡すマージ済みDataFrame（在庫部品2行）"""
+    rows = []
+    for line, (order_number, name, spec1, quantity) in enumerate([
+        ('00089002', 'ベースプレート', 'NKA-001', 2),
+        ('00089005', 'カバー', 'NKA-002', 1),
+    ], start=1):
+        rows.append({
+            '製番': SEIBAN, '材質': 'UNIT-A', '発注番号': order_number, '品名': name, '仕様１': spec1,
+            '仕様２': '', '手配数': quantity, '単位': '個', '手配区分CD': '15', '手配区分': '在庫部品',
+            '仕入先略称': '精密', '仕入先CD': 'S01', '納期': delivery_date, '回答納期': '',
+            '品目CD': '', 'メーカー': '', '備考': remarks, '員数': 1, '必要数': quantity,
+            '部品No': '1', 'ページNo': '1', '行No': str(line), '階層': 2,
+        })
+    return pd.DataFrame(rows)
+
+
+def _detail(order_number):
+    return order_app.OrderDetail.query.filter_by(order_number=order_number).one()
+
+
+def _receive_partially(detail):
+    """数量指定の受入（2個中1個）と同じ状態にする"""
+    detail.is_received = True
+    detail.received_at = RECEIVED_AT
+    detail.received_quantity = 1
+    detail.remarks = '【不足：1個】'
+    order_app.ReceivedHistory.record_receive(
+        order_number=detail.order_number, item_name=detail.item_name, spec1=detail.spec1,
+        quantity=detail.quantity, client_ip='127.0.0.1', received_quantity=1
+    )
+    order_app.ReceivedHistory.query.one().received_at = RECEIVED_AT
+    order_app.db.session.commit()
+
+
+def test_reimport_keeps_receive_fields(db):
+    order_app.save_to_database(_merged_dataframe(), SEIBAN)
+    detail = _detail('00089002')
+    detail_id = detail.id
+    _receive_partially(detail)
+
+    result = order_app.save_to_database(_merged_dataframe(delivery_date='26/10/01', remarks='至急'), SEIBAN)
+
+    assert result['inserted'] == 0 and result['deleted'] == 0
+    detail = _detail('00089002')
+    assert detail.id == detail_id
+    assert detail.is_received is True
+    assert detail.received_at == RECEIVED_AT
+    assert detail.received_quantity == 1
+    assert detail.remarks == '【不足：1個】 至急'
+    assert detail.delivery_date == '26/10/01'   # 受入以外の列は取込値で更新される
+
+    other = _detail('00089005')
+    assert other.is_received is False
+    assert other.received_at is None and other.received_quantity is None
+
+
+def test_recreated_detail_restores_receive_fields_from_history(db):
+    order_app.save_to_database(_merged_dataframe(), SEIBAN)
+    _receive_partially(_detail('00089002'))
+
+    # ユニットを削除して作り直す（受入状態は ReceivedHistory から復元）
+    order_app.OrderDetail.query.delete()
+    order_app.Order.query.delete()
+    order_app.db.session.commit()
+    order_app.save_to_database(_merged_dataframe(), SEIBAN)
+
+    detail = _detail('00089002')
+    assert detail.is_received is True
+    assert detail.received_at == RECEIVED_AT
+    assert detail.received_quantity == 1
+    assert _detail('00089005').is_received is False
@@ -6,6 +6,8 @@ from .qr_generator import generate_qr_code
 from .excel_gantt_chart import create_gantt_chart_sheet
 from .email_sender import EmailSender
 from .delivery_utils import DeliveryUtils
+from .merge_utils import MergeUtils
+from .excel_reader import ExcelReader
 __all__ = [
     'Constants',
     'DataUtils',
@@ -14,5 +16,7 @@ __all__ = [
     'generate_qr_code',
     'create_gantt_chart_sheet',
     'EmailSender',
-    'DeliveryUtils'
+    'DeliveryUtils',
+    'MergeUtils',
+    'ExcelReader'
 ]
\ No newline at end of file
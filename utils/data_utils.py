@@ -83,6 +83,56 @@ class DataUtils:
         except (ValueError, TypeError):
             return order_str
 
+    # コード列ごとの正規化方式（True: ゼロパディングも除去）
+    CODE_COLUMNS = {
+        '発注番号': True,
+        '手配区分CD': True,
+        '仕入先CD': False,
+    }
+
+    @staticmethod
+    def normalize_code_column(series, strip_leading_zeros=True):
+        """
+        コード列を列単位で正規化（normalize_order_number の列版）
+
+        Args:
+            series: 正規化する列（pandas.Series）
+            strip_leading_zeros: ゼロパディングを除去するか
+
+        Returns:
+            pandas.Series: 正規化された文字列の列（None/NaNは空文字列）
+
+        Examples:
+            [86922.0, '00086922', None, 'ABC'] → ['86922', '86922', '', 'ABC']
+        """
+        result = series.astype(object).where(series.notna(), '').astype(str).str.strip()
+        result = result.mask(result.isin(['nan', 'None', 'NaT']), '')
+        # 浮動小数点由来の .0 を除去（86922.0 → 86922）
+        result = result.str.replace(r'^(-?\d+)\.0+$', r'\1', regex=True)
+        if strip_leading_zeros:
+            # 数字のみの値はゼロパディングを除去（00086922 → 86922）
+            result = result.str.replace(r'^0+(?=\d+$)', '', regex=True)
+        return result
+
+    @staticmethod
+    def normalize_code_columns(df, columns=None):
+        """
+        発注番号・手配区分CD・仕入先CDを正規化文字列に一括変換
+
+        Args:
+            df: 対象DataFrame（存在しない列は無視）
+            columns: 対象列名のリスト（省略時は CODE_COLUMNS すべて）
+
+        Returns:
+            pandas.DataFrame: 正規化後のDataFrame
+        """
+        for col in (columns or DataUtils.CODE_COLUMNS):
+            if col in df.columns:
+                df[col] = DataUtils.normalize_code_column(
+                    df[col], DataUtils.CODE_COLUMNS.get(col, True)
+                )
+        return df
+
 
 # テスト用コード
 if __name__ == '__main__':
@@ -103,3 +153,8 @@ if __name__ == '__main__':
     print(f"'00086922' → '{DataUtils.normalize_order_number('00086922')}'")
     print(f"86922.0 → '{DataUtils.normalize_order_number(86922.0)}'")
     print(f"None → '{DataUtils.normalize_order_number(None)}'")
+
+    # normalize_code_columnのテスト
+    print("\n=== normalize_code_column テスト ===")
+    sample = pd.Series([86922.0, '00086922', None, 'ABC', '116.0', ' 0 '])
+    print(f"{sample.tolist()} → {DataUtils.normalize_code_column(sample).tolist()}")
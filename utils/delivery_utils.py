@@ -2,24 +2,179 @@
 検収データユーティリティ（DB直接クエリで VD_仕入 から取得）
 """
 
-# キャッシュ用辞書（発注番号 -> 納入情報）
-_delivery_cache = {}
+import threading
+import time
+from collections import OrderedDict
+
+# 納入実績がない場合の値
+EMPTY_DELIVERY_INFO = {'納入日': None, '納入数': 0}
+
+# キャッシュ設定（DeliveryUtils.configure_cache() で変更可能）
+RECEIPT_CACHE_MAX_SIZE = 20000   # 保持する発注番号の上限
+RECEIPT_CACHE_TTL_SEC = 600      # 有効期限（秒）
+RECEIPT_QUERY_TIMEOUT_SEC = 5    # VD_仕入集計のタイムアウト（納入情報は画面の補足表示のため短く）
+
+
+class ReceiptCache:
+    """
+    納入情報のLRUキャッシュ（件数上限＋有効期限、スレッドセーフ）
+
+    キーは8桁ゼロパディングした発注番号（画面側の正規化有無に関わらず同じエントリを指す）
+    期限切れのエントリは件数上限で押し出されるまで残し、DBに問い合わせられない間の代替に使う
+    """
+
+    def __init__(self, max_size=RECEIPT_CACHE_MAX_SIZE, ttl=RECEIPT_CACHE_TTL_SEC):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # {キー: (登録時刻, 納入情報)}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'expired_served': 0, 'evictions': 0,
+                       'invalidations': 0, 'skipped_lookups': 0}
+
+    @staticmethod
+    def key(order_number):
+        """発注番号をキャッシュキーに変換"""
+        return str(order_number).strip().zfill(8)
+
+    def get(self, order_number):
+        """キャッシュ済みの納入情報（なければNone）"""
+        key = self.key(order_number)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            stored_at, info = entry
+            if time.time() - stored_at > self.ttl:
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return info
+
+    def get_expired(self, order_number):
+        """有効期限に関係なくキャッシュ済みの納入情報（なければNone、DB停止中の代替用）"""
+        with self._lock:
+            entry = self._data.get(self.key(order_number))
+            if entry is None:
+                return None
+            self._stats['expired_served'] += 1
+            return entry[1]
+
+    def set(self, order_number, info):
+        key = self.key(order_number)
+        with self._lock:
+            self._data[key] = (time.time(), info)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, order_numbers):
+        """指定発注番号のエントリを削除し、削除件数を返す"""
+        removed = 0
+        with self._lock:
+            for order_number in order_numbers:
+                if self._data.pop(self.key(order_number), None) is not None:
+                    removed += 1
+            self._stats['invalidations'] += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._data)
+            self._data.clear()
+            self._stats['invalidations'] += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0
+        stats['max_size'] = self.max_size
+        stats['ttl_sec'] = self.ttl
+        stats['query_timeout_sec'] = RECEIPT_QUERY_TIMEOUT_SEC
+        return stats
+
+    def count_skipped(self):
+        with self._lock:
+            self._stats['skipped_lookups'] += 1
+
+
+# キャッシュ本体（発注番号 -> 納入情報）
+_delivery_cache = ReceiptCache()
 
 
 class DeliveryUtils:
     """検収データユーティリティ（VD_仕入からDB直接クエリ）"""
 
     @classmethod
-    def load_delivery_data(cls, force_reload=False):
+    def load_delivery_data(cls, force_reload=False, order_numbers=None):
         """
-        検収データを返す（互換性維持用 - キャッシュをクリアするトリガーとして使用）
+        検収データを返す
+
+        order_numbers を渡すと、ユニット・製番分の発注番号を1回のクエリでまとめて取得する
+
+        Args:
+            force_reload: キャッシュをクリアしてから取得
+            order_numbers: 事前取得する発注番号のリスト（Noneなら取得しない）
 
         Returns:
-            dict: 空の辞書（個別クエリで取得するため）
+            dict: {発注番号: {'納入日': str, '納入数': float}}（get_delivery_info の delivery_dict に渡す）
         """
         if force_reload:
             cls.clear_cache()
-        return {}
+        if not order_numbers:
+            return {}
+        return cls.get_delivery_info_bulk(order_numbers)
+
+    @classmethod
+    def get_delivery_info_bulk(cls, order_numbers):
+        """
+        複数発注番号の納入情報をまとめて取得（キャッシュにないものだけVD_仕入を集計クエリ）
+
+        Args:
+            order_numbers: 発注番号のリスト
+
+        Returns:
+            dict: {発注番号: {'納入日': str, '納入数': float}}（実績なしは納入日None・納入数0）
+        """
+        keys = list(dict.fromkeys(
+            str(n).strip() for n in order_numbers if n is not None and str(n).strip()
+        ))
+
+        result = {}
+        missing = []
+        for key in keys:
+            info = _delivery_cache.get(key)
+            if info is None:
+                missing.append(key)
+            else:
+                result[key] = info
+
+        if missing:
+            import across_db
+            try:
+                summary = across_db.get_receipt_summary(missing, timeout=RECEIPT_QUERY_TIMEOUT_SEC)
+                for key in missing:
+                    info = summary.get(key, dict(EMPTY_DELIVERY_INFO))
+                    _delivery_cache.set(key, info)
+                    result[key] = info
+            except Exception as e:
+                # 納入情報は補足表示のため、取得できなくても画面は返す（期限切れのキャッシュがあれば使う）
+                if isinstance(e, across_db.AcrossUnavailableError):
+                    _delivery_cache.count_skipped()
+                else:
+                    print(f"[DeliveryUtils] VD_仕入クエリエラー ({len(missing)}件): {e}")
+                for key in missing:
+                    info = _delivery_cache.get_expired(key)
+                    if info is not None:
+                        result[key] = info
+
+        return {k: result.get(k, dict(EMPTY_DELIVERY_INFO)) for k in keys}
 
     @classmethod
     def get_delivery_info(cls, order_number, delivery_dict=None):
@@ -28,82 +183,58 @@ class DeliveryUtils:
 
         Args:
             order_number: 発注番号
-            delivery_dict: 互換性維持用（使用しない）
+            delivery_dict: load_delivery_data(order_numbers=...) で事前取得した辞書
 
         Returns:
             dict: {'納入日': str, '納入数': float}
         """
-        global _delivery_cache
-
         if not order_number:
-            return {'納入日': None, '納入数': 0}
+            return dict(EMPTY_DELIVERY_INFO)
 
-        # キャッシュにあればそれを返す
         order_number_str = str(order_number).strip()
-        if order_number_str in _delivery_cache:
-            return _delivery_cache[order_number_str]
+        if delivery_dict and order_number_str in delivery_dict:
+            return delivery_dict[order_number_str]
+
+        return cls.get_delivery_info_bulk([order_number_str]).get(
+            order_number_str, dict(EMPTY_DELIVERY_INFO)
+        )
 
+    @classmethod
+    def invalidate(cls, order_numbers):
+        """
+        新しい検収が入った発注番号のキャッシュを破棄（across_db.check_db_updates から呼ばれる）
+
+        Returns:
+            int: 破棄した件数
+        """
+        return _delivery_cache.invalidate(order_numbers)
+
+    @classmethod
+    def configure_cache(cls, max_size=None, ttl=None, query_timeout=None):
+        """キャッシュの件数上限・有効期限（秒）・VD_仕入集計のタイムアウト（秒）を変更"""
+        global RECEIPT_QUERY_TIMEOUT_SEC
+        if max_size is not None:
+            _delivery_cache.max_size = max_size
+        if ttl is not None:
+            _delivery_cache.ttl = ttl
+        if query_timeout is not None:
+            RECEIPT_QUERY_TIMEOUT_SEC = query_timeout
+
+    @classmethod
+    def is_available(cls):
+        """納入情報を最新で取得できる状態か（Across DB が遮断中なら False、画面の注記用）"""
         try:
             import across_db
-            result = across_db.search_receipts(order_number_str)
-
-            if result['count'] == 0:
-                info = {'納入日': None, '納入数': 0}
-                _delivery_cache[order_number_str] = info
-                return info
-
-            columns = result['columns']
-            rows = result['rows']
-
-            # カラムインデックスを取得（カラム名のパターンマッチ）
-            date_idx = None
-            qty_idx = None
-            for i, col in enumerate(columns):
-                if not col:
-                    continue
-                col_str = str(col)
-                # 納入日/仕入日/入荷日/伝票日付 など
-                if any(pattern in col_str for pattern in ['納入日', '仕入日', '入荷日', '検収日', '伝票日付', '日付']):
-                    if date_idx is None:  # 最初に見つかったものを使用
-                        date_idx = i
-                # 納入数/仕入数/数量 など
-                if any(pattern in col_str for pattern in ['納入数', '仕入数', '入荷数', '数量']):
-                    if qty_idx is None:  # 最初に見つかったものを使用
-                        qty_idx = i
-
-            # カラムが見つからなかった場合のログ
-            if date_idx is None or qty_idx is None:
-                print(f"[DeliveryUtils] VD_仕入カラム: {columns}")
-                print(f"[DeliveryUtils] 日付カラムidx={date_idx}, 数量カラムidx={qty_idx}")
-
-            # 複数行の場合（分納）: 最新日付を使用、数量は合計
-            latest_date = None
-            total_qty = 0
-
-            for row in rows:
-                if date_idx is not None and row[date_idx]:
-                    date_val = row[date_idx]
-                    if latest_date is None or (date_val and date_val > latest_date):
-                        latest_date = date_val
-                if qty_idx is not None and row[qty_idx]:
-                    try:
-                        total_qty += float(row[qty_idx])
-                    except (ValueError, TypeError):
-                        pass
-
-            info = {
-                '納入日': latest_date,
-                '納入数': total_qty
-            }
-            _delivery_cache[order_number_str] = info
-            return info
+            return across_db.is_available()
+        except Exception:
+            return False
 
-        except Exception as e:
-            print(f"[DeliveryUtils] VD_仕入クエリエラー (発注番号={order_number}): {e}")
-            return {'納入日': None, '納入数': 0}
+    @classmethod
+    def get_cache_stats(cls):
+        """キャッシュのヒット率などの統計"""
+        return _delivery_cache.stats()
 
     @classmethod
     def clear_cache(cls):
         """キャッシュをクリア"""
-        global _delivery_cache
-        _delivery_cache = {}
+        _delivery_cache.clear()
@@ -0,0 +1,126 @@
+"""
+Excel読み込みユーティリティモジュール
+openpyxl の read_only モードで行を順次読み込み、必要な列・製番の行だけを保持する
+"""
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+class ExcelReader:
+    """手配リスト・発注リストExcelのストリーミング読み込み"""
+
+    # マージに必要な列（手配リスト）
+    TEHAI_COLUMNS = [
+        '製番', '材質', '仕様１', '仕様２', '品名', '品目CD', '手配区分CD', '手配区分',
+        'メーカー', '備考', '手配数', '単位', '員数', '必要数', '部品No', 'ページNo',
+        '行No', '階層', '発注番号', '仕入先略称', '仕入先CD', '納期', '回答納期'
+    ]
+
+    # マージに必要な列（発注リスト）
+    HATCHU_COLUMNS = [
+        '製番', '材質', '仕様１', '手配区分CD', '手配区分', '発注番号',
+        '仕入先略称', '仕入先CD', '納期', '回答納期', '発注日'
+    ]
+
+    @staticmethod
+    def _seiban_str(value):
+        """製番セル値を比較用文字列に変換（空セルは空文字列）"""
+        if value is None:
+            return ''
+        return str(value).strip()
+
+    @staticmethod
+    def read_sheet(file_path, sheet_name, columns=None, seiban_prefix=None, seiban_col='製番'):
+        """
+        シートを1行ずつ読み込み、指定列・指定製番の行だけをDataFrame化
+
+        Args:
+            file_path: Excelファイルパス
+            sheet_name: シート名
+            columns: 読み込む列名のリスト（Noneで全列、シートに無い列は無視）
+            seiban_prefix: 製番の前方一致条件（Noneで全行）
+            seiban_col: 製番列名
+
+        Returns:
+            pandas.DataFrame: 1行目をヘッダーとしたDataFrame（製番は前後空白除去済み）
+        """
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name]
+            header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            if header is None:
+                return pd.DataFrame(columns=columns or [])
+
+            # ヘッダー名 → 列位置（重複時は先頭の列）
+            header_index = {}
+            for idx, name in enumerate(header):
+                if name is not None:
+                    header_index.setdefault(str(name).strip(), idx)
+
+            wanted = columns if columns is not None else list(header_index.keys())
+            selected = [(name, header_index[name]) for name in wanted if name in header_index]
+            names = [name for name, _ in selected]
+            indices = [idx for _, idx in selected]
+
+            seiban_idx = header_index.get(seiban_col)
+            seiban_pos = names.index(seiban_col) if seiban_col in names else None
+            filter_idx = seiban_idx if seiban_prefix else None
+
+            # 必要な列の右端までだけセルを展開する
+            max_col = max(indices + ([filter_idx] if filter_idx is not None else []), default=0) + 1
+
+            records = []
+            for row in ws.iter_rows(min_row=2, max_col=max_col, values_only=True):
+                if filter_idx is not None:
+                    seiban = ExcelReader._seiban_str(row[filter_idx] if filter_idx < len(row) else None)
+                    if not seiban.startswith(seiban_prefix):
+                        continue
+
+                values = [row[idx] if idx < len(row) else None for idx in indices]
+                if all(v is None for v in values):
+                    continue
+                if seiban_pos is not None:
+                    values[seiban_pos] = ExcelReader._seiban_str(values[seiban_pos])
+                records.append(values)
+        finally:
+            wb.close()
+
+        return pd.DataFrame(records, columns=names)
+
+    @staticmethod
+    def read_column(file_path, sheet_name, column='製番'):
+        """
+        シートの1列だけを読み込む（製番検出・件数集計用）
+
+        Args:
+            file_path: Excelファイルパス
+            sheet_name: シート名
+            column: 列名
+
+        Returns:
+            list: 列の値（空セルを除く、前後空白除去済み文字列）。列が無い場合はNone
+        """
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name]
+            header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            if header is None:
+                return None
+
+            col_idx = None
+            for idx, name in enumerate(header):
+                if name is not None and str(name).strip() == column:
+                    col_idx = idx + 1
+                    break
+            if col_idx is None:
+                return None
+
+            values = []
+            for row in ws.iter_rows(min_row=2, min_col=col_idx, max_col=col_idx, values_only=True):
+                text = ExcelReader._seiban_str(row[0] if row else None)
+                if text:
+                    values.append(text)
+            return values
+        finally:
+            wb.close()
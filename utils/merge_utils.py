@@ -0,0 +1,286 @@
+"""
+手配リスト×発注データ マージユーティリティモジュール
+発注データからキー索引を一度だけ構築し、手配リスト1行ごとの全件走査を避ける
+
+Excel取込（process_excel_file_from_dataframes）と Across DB取込
+（across_db.merge_from_db / merge_test_by_seiban）は同じマッチ処理を使う。
+
+マッチポリシー:
+    キー値は normalize_key() で正規化（None/NaN→''、前後空白除去、整数値の float→整数文字列）
+    前後から除去する空白は str.strip() と同じ KEY_WHITESPACE（DB側で照合する across_db の mode='sql' も同じ文字を除去）
+    1. Primary: 材質 + 仕様１ + 製番 が一致（3項目すべて空でない行のみ）
+    2. Fallback: 製番 + 仕様１ が一致（2項目とも空でない行のみ）
+       手配リスト・発注データの双方に手配区分がある場合は手配区分も一致すること
+       （どちらかが空なら手配区分は問わない）
+    いずれも発注データの並び順で最初に該当した行を採用する（先勝ち）
+"""
+
+import pandas as pd
+
+
+class MergeUtils:
+    """手配リストと発注データのキー結合ユーティリティ"""
+
+    # 行ごとのマッチ種別
+    MATCH_PRIMARY = '材質+仕様１'
+    MATCH_FALLBACK = '仕様１(+区分)'
+    MATCH_NONE = ''
+
+    # normalize_key()（str.strip()）がキーの前後から除去する空白類（半角・全角スペース、タブ、改行など）
+    KEY_WHITESPACE = ''.join(c for c in map(chr, range(0x3001)) if c.isspace())
+
+    @staticmethod
+    def normalize_key(value):
+        """
+        マッチキー用の値正規化
+
+        Examples:
+            >>> MergeUtils.normalize_key(' NKA-00437 ')
+            'NKA-00437'
+            >>> MergeUtils.normalize_key(11.0)
+            '11'
+            >>> MergeUtils.normalize_key('\u3000NKA-001\t\r\n')
+            'NKA-001'
+            >>> MergeUtils.normalize_key(None)
+            ''
+        """
+        if value is None:
+            return ''
+        if isinstance(value, float):
+            if value != value:
+                return ''
+            if value.is_integer():
+                return str(int(value))
+        return str(value).strip()
+
+    @staticmethod
+    def _normalized_column(records, col):
+        """レコード列（dictのリスト）から指定キーの正規化済み値リストを作成"""
+        normalize = MergeUtils.normalize_key
+        return [normalize(rec.get(col)) for rec in records]
+
+    @staticmethod
+    def _normalized_df_column(df, col):
+        """DataFrameの列を正規化済み値リストに変換（列が無い場合は空文字で埋める）"""
+        if col not in df.columns:
+            return [''] * len(df)
+        normalize = MergeUtils.normalize_key
+        return [normalize(v) for v in df[col].tolist()]
+
+    @staticmethod
+    def build_order_index(materials, specs, seibans, order_types):
+        """
+        発注データのキー索引を構築
+
+        各キーについて最初に出現した行位置のみを保持する（先勝ち）
+
+        Args:
+            materials, specs, seibans, order_types: 正規化済みの発注データ列（同じ長さ）
+
+        Returns:
+            dict: {
+                'primary': {(材質, 仕様１, 製番): 行位置},
+                'fallback': {(製番, 仕様１): 行位置},
+                'fallback_typed': {(製番, 仕様１, 手配区分): 行位置}
+            }
+        """
+        primary = {}
+        fallback = {}
+        fallback_typed = {}
+
+        for pos, (material, spec1, seiban, order_type) in enumerate(
+                zip(materials, specs, seibans, order_types)):
+            primary.setdefault((material, spec1, seiban), pos)
+            fallback.setdefault((seiban, spec1), pos)
+            fallback_typed.setdefault((seiban, spec1, order_type), pos)
+
+        return {
+            'primary': primary,
+            'fallback': fallback,
+            'fallback_typed': fallback_typed
+        }
+
+    @staticmethod
+    def match_columns(tehai_columns, index):
+        """
+        正規化済みの手配リスト列を発注データの索引で照合
+
+        Args:
+            tehai_columns: 手配リストの (材質, 仕様１, 製番, 手配区分) 列のタプル
+            index: build_order_index() 済みの発注データの索引
+
+        Returns:
+            tuple: (行位置リスト（未マッチは-1）, マッチ種別リスト, 統計dict)
+        """
+        primary = index['primary']
+        fallback = index['fallback']
+        fallback_typed = index['fallback_typed']
+
+        positions = []
+        match_types = []
+        primary_count = 0
+        fallback_count = 0
+
+        for material, spec1, seiban, order_type in zip(*tehai_columns):
+            pos = -1
+            match_type = MergeUtils.MATCH_NONE
+
+            if material and spec1 and seiban:
+                pos = primary.get((material, spec1, seiban), -1)
+                if pos >= 0:
+                    match_type = MergeUtils.MATCH_PRIMARY
+                    primary_count += 1
+
+            if pos < 0 and spec1 and seiban:
+                if order_type:
+                    # 同区分と区分空欄の候補のうち、発注データ上で先に現れた方
+                    typed = fallback_typed.get((seiban, spec1, order_type), -1)
+                    untyped = fallback_typed.get((seiban, spec1, ''), -1)
+                    candidates = [p for p in (typed, untyped) if p >= 0]
+                    pos = min(candidates) if candidates else -1
+                else:
+                    pos = fallback.get((seiban, spec1), -1)
+                if pos >= 0:
+                    match_type = MergeUtils.MATCH_FALLBACK
+                    fallback_count += 1
+
+            positions.append(pos)
+            match_types.append(match_type)
+
+        total = len(positions)
+        matched = primary_count + fallback_count
+        stats = {
+            'total': total,
+            'primary': primary_count,
+            'fallback': fallback_count,
+            'matched': matched,
+            'unmatched': total - matched,
+            'match_rate': round(matched / total * 100, 1) if total else 0
+        }
+        return positions, match_types, stats
+
+    @staticmethod
+    def index_records(order_records):
+        """発注データ（dictのリスト）のキー索引を構築（match_records の index 引数用）"""
+        keys = ('材質', '仕様１', '製番', '手配区分')
+        order_columns = tuple(MergeUtils._normalized_column(order_records, k) for k in keys)
+        return MergeUtils.build_order_index(*order_columns)
+
+    @staticmethod
+    def match_records(tehai_records, order_records, index=None):
+        """
+        dictのリスト同士でマッチング（Across DB取込用）
+
+        Args:
+            tehai_records: 手配リストのレコード（dictのリスト）
+            order_records: 発注データのレコード（dictのリスト）
+            index: index_records() 済みの索引（Noneなら order_records から構築）
+
+        Returns:
+            tuple: (行位置リスト（未マッチは-1）, マッチ種別リスト, 統計dict)
+        """
+        keys = ('材質', '仕様１', '製番', '手配区分')
+        tehai_columns = tuple(MergeUtils._normalized_column(tehai_records, k) for k in keys)
+        if index is None:
+            index = MergeUtils.index_records(order_records)
+        return MergeUtils.match_columns(tehai_columns, index)
+
+    @staticmethod
+    def index_dataframe(df_order):
+        """発注データ（DataFrame）のキー索引を構築（match_dataframes の index 引数用）"""
+        keys = ('材質', '仕様１', '製番', '手配区分')
+        order_columns = tuple(MergeUtils._normalized_df_column(df_order, k) for k in keys)
+        return MergeUtils.build_order_index(*order_columns)
+
+    @staticmethod
+    def match_dataframes(df_tehai, df_order, index=None):
+        """
+        DataFrame同士でマッチング（Excel取込用）
+
+        Args:
+            df_tehai: 手配リスト（DataFrame）
+            df_order: 発注データ（DataFrame）
+            index: index_dataframe(df_order) 済みの索引（一括取込で製番をまたいで再利用）
+
+        Returns:
+            tuple: (行位置リスト（未マッチは-1）, マッチ種別リスト, 統計dict)
+            行位置は df_order 上の位置（キーに製番を含むため、全製番分の索引でも製番ごとの照合と同じ結果）
+        """
+        keys = ('材質', '仕様１', '製番', '手配区分')
+        tehai_columns = tuple(MergeUtils._normalized_df_column(df_tehai, k) for k in keys)
+        if index is None:
+            index = MergeUtils.index_dataframe(df_order)
+        return MergeUtils.match_columns(tehai_columns, index)
+
+    @staticmethod
+    def format_delivery_date(value):
+        """
+        納期を表示用（YY/MM/DD）に整形
+
+        Returns:
+            str or None: 空・変換不能の場合はNone（既存値を保持する）
+        """
+        if value is None or value == '':
+            return None
+        if pd.isna(value):
+            return None
+        if hasattr(value, 'strftime'):
+            return value.strftime('%y/%m/%d')
+        return str(value)
+
+    @staticmethod
+    def apply_order_columns(df_tehai, df_order, positions, match_types):
+        """
+        マッチした発注データの列を手配リストに一括反映
+
+        Args:
+            df_tehai: 手配リスト（fillna済みDataFrame）
+            df_order: 発注データ（fillna済みDataFrame）
+            positions: match_dataframes() の行位置リスト
+            match_types: match_dataframes() のマッチ種別リスト
+
+        Returns:
+            pandas.DataFrame: 発注番号・仕入先略称・仕入先CD・納期・match_type を反映したDataFrame
+        """
+        df_tehai = df_tehai.copy()
+        df_tehai['match_type'] = match_types
+
+        pos_series = pd.Series(positions, index=df_tehai.index)
+        hit = pos_series >= 0
+        if not hit.any():
+            return df_tehai
+
+        source = df_order.iloc[pos_series[hit].values]
+
+        for col, as_str in (('発注番号', True), ('仕入先略称', False), ('仕入先CD', True)):
+            if col not in source.columns:
+                continue
+            if col not in df_tehai.columns:
+                df_tehai[col] = ''
+            values = source[col]
+            if as_str:
+                values = values.astype(str)
+            df_tehai[col] = df_tehai[col].astype(object)
+            df_tehai.loc[hit, col] = values.values
+
+        if '納期' in source.columns:
+            formatted = pd.Series(
+                [MergeUtils.format_delivery_date(v) for v in source['納期'].tolist()],
+                index=pos_series[hit].index
+            )
+            formatted = formatted[formatted.notna()]
+            if not formatted.empty:
+                if '納期' not in df_tehai.columns:
+                    df_tehai['納期'] = ''
+                df_tehai['納期'] = df_tehai['納期'].astype(object)
+                df_tehai.loc[formatted.index, '納期'] = formatted.values
+
+        return df_tehai
+
+
+# テスト用コード（全件走査との等価性は tests/test_merge_utils.py）
+if __name__ == '__main__':
+    print("=== normalize_key テスト ===")
+    print(f"' A ' → '{MergeUtils.normalize_key(' A ')}'")
+    print(f"11.0 → '{MergeUtils.normalize_key(11.0)}'")
+    print(f"None → '{MergeUtils.normalize_key(None)}'")